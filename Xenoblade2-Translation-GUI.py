@@ -1,184 +1,356 @@
 import ttkbootstrap as tk
-from ttkbootstrap import ttk, Style
+from ttkbootstrap import ttk
 from tkinter import filedialog, messagebox
-import json
 import os
 import threading
-import shutil
 import configparser
-from tkinter import font  # Keep this for now, might be needed for text height calculation
-import re
+from tkinter import font  # Used for text height calculation
 import atexit
+import functools
+import itertools
+import queue
+import time
+from bdat_core import (STATS, EditHistory, EditSession, FileWatcher, FuzzyIndex, ProjectDB, Table, TableCache, TableRows, Prefetcher, align_tables, ProjectManifest, SearchIndex, TranslationMemory,
+                       TranslationProgress, apply_translations, bdat_roots, count_translated, file_progress, file_signature, display_text, is_translated, line_too_long,
+                       line_lengths, list_json_files, load_line_limit_rules, resolve_original_path, run_progress,
+                       save_tables, scan_base_dir, write_json_atomic,
+                       DEFAULT_CACHE_BUDGET_MB, FUZZY_INDEX_FILENAME, PROJECT_DB_FILENAME, SEARCH_INDEX_FILENAME)
 
 # --- New Global Variables ---
 BASE_DIR = None
 SECOND_BASE_DIR = None  # For translated files
 CURRENT_JSON_PATH = None
 CURRENT_ORIGINAL_JSON_PATH = None  # Path to original language file
-FOLDER_STATUS = {}  # Dictionary to store folder status (color)
-CURRENT_JSON_DATA = None
-CURRENT_ORIGINAL_JSON_DATA = None  # Original language data
+FOLDER_STATUS = {}  # Dictionary to store folder status (color), loaded from PROJECT_DB
+PROJECT_DB = None  # Project database of the base dir, holding the folder and file status
+CURRENT_JSON_DATA = None  # Table of the opened file
+CURRENT_ORIGINAL_JSON_DATA = None  # Table of the original language file
 TREE = None  # global tree variable
-UNSAVED_CHANGES = False
-GAME_VERSION = None  # 'Xenoblade2' or 'Xenoblade3'
+GAME_VERSION = None  # 'Xenoblade2', 'Xenoblade3' or 'XenobladeX'
+GAME_TITLES = {"Xenoblade2": "X2", "Xenoblade3": "X3", "XenobladeX": "X"}  # Window title suffix per game
+LINE_RULES = load_line_limit_rules(GAME_VERSION)  # Line limits by filename prefix for the current game
+TABLE_ROWS = TableRows()  # Backing row store of the table: (id, label, original text, translated text)
+TABLE_VIEW_START = 0  # Index in TABLE_ROWS of the first row shown in TREE
+TABLE_BUFFER_ROWS = 10  # Rows materialized below the visible window
+DIRTY_ROWS = set()  # Indices in TABLE_ROWS edited since the table was loaded or saved
+ENCODED_ROWS = None  # Encoded JSON of each row of the current table, reused between saves
+TABLE_LINE_LIMIT = None  # Characters per line allowed in the current table, None for no limit
+TABLE_SUGGESTIONS = {}  # Index in TABLE_ROWS -> translation memory suggestion for an untranslated row
+EDIT_HISTORIES = {}  # JSON path -> EditHistory of its cell edits, kept when switching files
+UNDO_LIMIT = 500  # Undo steps kept per file
+TEXT_INPUT_CLASSES = ("Text", "Entry", "TEntry", "TCombobox", "TSpinbox")  # Widgets that handle Ctrl+Z themselves
+SESSION = EditSession()  # Unsaved edits of the files other than the opened one
+SAVE_ALL_RUNNING = False  # Whether Save All is writing files in the background
+DISK_SIGNATURES = {}  # JSON path -> (mtime, size) when the opened or a buffered file was loaded or saved
+MEASURE_FONTS = {}  # (family, size) -> font.Font used to measure text
+TEXT_HEIGHT_CACHE_SIZE = 4096  # Max number of memoized text height measurements
+CACHE_BUDGET_MB = DEFAULT_CACHE_BUDGET_MB  # Memory budget of the parsed table cache
+TABLE_CACHE = TableCache(CACHE_BUDGET_MB * 1024 * 1024)  # Parsed tables, keyed by path, mtime and size
+LOAD_GENERATION = 0  # Incremented for every load, so results of superseded loads are dropped
+PREFETCHER = Prefetcher(TABLE_CACHE)  # Parses the files after the opened one in the background
+PREFETCH_COUNT = 3  # Number of following files in the folder to prefetch
+SEARCH_INDEX = None  # Full-text index over the row texts of the base dir
+MEMORY = None  # Exact-match translation memory, kept up to date by SEARCH_INDEX
+FUZZY_INDEX = None  # Trigram index of the translated originals, kept up to date by MEMORY
+FUZZY_MATCH_LIMIT = 3  # Near matches shown below the cell editor
+SEARCH_RESULT_LIMIT = 200  # Max number of rows listed in the Find Text window
+CHAR_COUNT_LABELS = 8  # Lines listed by the character counter of the cell editor, the last one sums up the rest
+CHAR_COUNT_FOLLOW_MS = 200  # How often the character counter checks whether the editor moved
 
 # --- Helper Functions ---
 def load_json(filepath):
-    """Loads JSON data from a file."""
+    """Loads a JSON file as a Table."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return Table.load(filepath)
     except Exception as e:
         messagebox.showerror("Error Loading JSON", str(e))
         return None
 
-def save_json(filepath, data):
-    """Saves JSON data to a file, replacing the 'name' field with 'edited_text'."""
+def save_json(filepath, data, row_chunks=None):
+    """Saves a Table or JSON data to a file, written atomically so a crash never truncates the file.
+    row_chunks optionally holds already encoded rows (see write_json_atomic).
+    Asks before overwriting a file that another program changed since it was loaded.
+    Returns True if the file was written."""
+    if changed_on_disk(filepath) and not messagebox.askyesno(
+            "File Changed on Disk", f"{os.path.basename(filepath)} was changed on disk after it was opened.\n\n"
+            "Overwrite it with your changes?", icon='warning'):
+        return False
     try:
-        # First, create a copy of the data to avoid modifying the original
-        data_copy = json.loads(json.dumps(data))
-
-        for row in data_copy['rows']:
-            if 'edited_text' in row:
-                # Save to last field in row
-                last_field = list(row.keys())[-1]
-                row[last_field] = row['edited_text']
-                del row['edited_text']  # Remove the 'edited_text' field after saving
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data_copy, f, ensure_ascii=False, indent=2)
+        write_json_atomic(filepath, data, row_chunks)
         messagebox.showinfo("Success", "JSON saved successfully!")
+        return True
     except Exception as e:
         messagebox.showerror("Error Saving JSON", str(e))
+        return False
 
-def show_character_counts(text_widget):
-    """Show character counts for each line in a tooltip."""
-    # Get the text and split by newlines
-    text = text_widget.get("1.0", "end-1c")
-    lines = text.split('\\n')
-
-    # Create a tooltip window
+def show_character_counts(text_widget, limit=None):
+    """Shows the length of every line of the cell editor in a tooltip above it, kept up to date while typing.
+    Lines are split at real and escaped newlines and measured like check_line_length, so lines longer
+    than limit turn red. A fixed pool of labels is reused, and on a key press only the editor lines the
+    cursor was and is on are measured again. The tooltip only moves when the editor does."""
     tooltip = tk.Toplevel(text_widget)
     tooltip.wm_overrideredirect(True)
-    tooltip.wm_geometry("+%d+%d" % (text_widget.winfo_rootx(), text_widget.winfo_rooty() - 70))
-
-    # Create labels for each line count
-    for i, line in enumerate(lines):
-        count = len(line)
-        label = ttk.Label(tooltip, text=f"Line {i+1}: {count} chars", background="#FFFFE0")  # Light yellow background
-        label.pack()
-
-    # Update position when text widget moves
-    def update_position():
-        tooltip.wm_geometry("+%d+%d" % (text_widget.winfo_rootx(), text_widget.winfo_rooty() - 70))
-        tooltip.after(100, update_position)
-
-    update_position()
-
-    # Destroy tooltip when text widget loses focus
-    def destroy_tooltip(event=None):
-        tooltip.destroy()
+    labels = [ttk.Label(tooltip, background="#FFFFE0") for _ in range(CHAR_COUNT_LABELS)]  # Light yellow background
+    shown = [None] * CHAR_COUNT_LABELS  # (text, over limit) currently on each label, None if unpacked
+    state = {
+        'lengths': [],  # Per editor line, the display line lengths in it
+        'cursor_line': 1,
+        'position': None
+    }
 
-    text_widget.bind('<FocusOut>', destroy_tooltip)
+    def show_counts():
+        line_count = sum(len(editor_line) for editor_line in state['lengths'])
+        position = 0
+        for length in itertools.chain.from_iterable(state['lengths']):
+            if position == CHAR_COUNT_LABELS:
+                break
+            too_long = limit is not None and length > limit
+            text = f"Line {position + 1}: {length}/{limit} chars" if limit is not None else f"Line {position + 1}: {length} chars"
+            if position == CHAR_COUNT_LABELS - 1 and line_count > CHAR_COUNT_LABELS:
+                text += f" (+{line_count - CHAR_COUNT_LABELS} more lines"
+                if limit is not None:
+                    # The summary turns red if any of the lines it stands for is too long
+                    hidden = itertools.islice(itertools.chain.from_iterable(state['lengths']), CHAR_COUNT_LABELS, None)
+                    hidden_too_long = sum(1 for hidden_length in hidden if hidden_length > limit)
+                    if hidden_too_long:
+                        text += f", {hidden_too_long} too long"
+                        too_long = True
+                text += ")"
+            if shown[position] != (text, too_long):
+                # Only labels whose text changed are touched, none are created or destroyed
+                labels[position].config(text=text, foreground="red" if too_long else "")
+                if shown[position] is None:
+                    labels[position].pack(anchor=tk.W)
+                shown[position] = (text, too_long)
+            position += 1
+        for unused in range(position, CHAR_COUNT_LABELS):
+            if shown[unused] is not None:
+                labels[unused].pack_forget()
+                shown[unused] = None
+
+    def count_all_lines():
+        state['lengths'] = [line_lengths(line) for line in text_widget.get("1.0", "end-1c").split('\n')]
+
+    def update_counts(event=None):
+        if not text_widget.winfo_exists():
+            return
+        line_count = int(text_widget.index("end-1c").split('.')[0])
+        cursor_line = int(text_widget.index(tk.INSERT).split('.')[0])
+        lengths = state['lengths']
+        if len(lengths) != line_count:
+            count_all_lines()  # Lines were added or removed, e.g. with Ctrl+Return or a paste
+        else:
+            for line_number in {state['cursor_line'], cursor_line}:
+                lengths[line_number - 1] = line_lengths(text_widget.get(f"{line_number}.0", f"{line_number}.end"))
+        state['cursor_line'] = cursor_line
+        show_counts()
+
+    def follow_editor():
+        if not tooltip.winfo_exists() or not text_widget.winfo_exists():
+            return  # The editor was closed, stop following it
+        position = (text_widget.winfo_rootx(), text_widget.winfo_rooty() - tooltip.winfo_reqheight())
+        if position != state['position']:
+            state['position'] = position
+            tooltip.wm_geometry("+%d+%d" % position)
+        root.after(CHAR_COUNT_FOLLOW_MS, follow_editor)
+
+    count_all_lines()
+    show_counts()
+    tooltip.update_idletasks()  # The labels decide the tooltip's height
+    follow_editor()
+    text_widget.bind('<KeyRelease>', update_counts)
     return tooltip
 
-def check_line_length(filename, text):
-    """Checks if any line in the text exceeds the character limit based on the filename.
-    Ignores characters within square brackets."""
-    if not text:
-        return False
+def show_fuzzy_matches(text_widget, original_text):
+    """Shows the originals most similar to original_text and their translations below the cell editor.
+    Returns the window, or None if there is nothing to show."""
+    if not FUZZY_INDEX or not FUZZY_INDEX.ready or not original_text:
+        return None
+    matches = []
+    for score, text in FUZZY_INDEX.search(original_text, limit=FUZZY_MATCH_LIMIT):
+        translation = MEMORY.lookup(text)
+        if translation:
+            matches.append((score, text, translation))
+    if not matches:
+        return None
 
-    if filename.startswith("bf"):
-        limit = 55
-    elif filename.startswith("campfev") or filename.startswith("fev") or filename.startswith("kizuna") or filename.startswith("qst") or filename.startswith("tlk"):
-        limit = 41
-    else:
-        return False  # No limit defined for this filename
-
-    lines = text.split('\\n')
-    for line in lines:
-        # Remove content within square brackets
-        line = re.sub(r'\[.*?\]', '', line)
-        if len(line) > limit:
-            return True
-    return False
-
-def calculate_text_height(text, font, width):
-    """Calculates the height of the text based on the font and width."""
-    text_widget = tk.Text(root, font=font, width=width)
-    text_widget.insert("1.0", text)
-    text_widget.update_idletasks()  # Force update of the widget
-    
-    # Calculate total height needed
-    total_lines = 1
-    for line in text.split('\\n'):
-        text_widget.delete("1.0", "end")
-        text_widget.insert("1.0", line)
-        text_widget.update_idletasks()
-        bbox = text_widget.bbox("end")
-        if bbox:
-            total_lines += bbox[1] // bbox[3] if bbox[3] > 0 else 1
-    
-    line_height = font.metrics("linespace")
+    def shorten(text, length=90):
+        text = display_text(text)
+        return text if len(text) <= length else text[:length - 3] + "..."
+
+    popup = tk.Toplevel(text_widget)
+    popup.wm_overrideredirect(True)
+    popup.wm_geometry("+%d+%d" % (text_widget.winfo_rootx(), text_widget.winfo_rooty() + text_widget.winfo_height() + 5))
+    for score, text, translation in matches:
+        label = ttk.Label(popup, text=f"{score:.0%}  {shorten(text)}\n      → {shorten(translation)}",
+                          background="#E8F4FD", justify=tk.LEFT)
+        label.pack(anchor=tk.W, fill=tk.X)
+    return popup
+
+def get_measure_font(family, size):
+    """Returns a shared font object for measuring text, creating it on first use."""
+    key = (family, size)
+    measure_font = MEASURE_FONTS.get(key)
+    if measure_font is None:
+        measure_font = MEASURE_FONTS[key] = font.Font(family=family, size=size)
+    return measure_font
+
+@functools.lru_cache(maxsize=TEXT_HEIGHT_CACHE_SIZE)
+@STATS.timed("measure text height")  # Only cache misses are timed
+def calculate_text_height(text, family, size, width):
+    """Calculates the height of the text wrapped at `width` characters, based on font metrics.
+    Results are memoized; call calculate_text_height.cache_clear() when the font size changes."""
+    measure_font = get_measure_font(family, size)
+    # Text widgets measure their width in average characters, using the width of "0"
+    wrap_width = max(1, width * measure_font.measure("0"))
+
+    # Count the wrapped display lines of every \n separated line
+    total_lines = 0
+    for line in str(text).split('\\n'):
+        line_width = measure_font.measure(line) if line else 0
+        total_lines += max(1, -(-line_width // wrap_width))
+
+    line_height = measure_font.metrics("linespace")
     height = total_lines * line_height
-    
-    text_widget.destroy()
     return height + 10  # Add extra padding
 
+@STATS.timed("populate table")
 def populate_table(tree, original_data, translated_data):
-    """Populates the Treeview table with JSON data from both original and translated files."""
-    # Clear existing data
-    for item in tree.get_children():
-        tree.delete(item)
-
-    def format_text(text):
-        if not text:
-            return ""
-        # Replace special characters with visible representations
-        text = text.replace('\n', '\\n').replace('\t', '\\t').replace('\r', '\\r')
-        # Handle square brackets by adding spaces around them for better visibility
-        #text = text.replace('[', ' [ ').replace(']', ' ] ')
-        return text
+    """Populates the table's backing row store with JSON data from both original and translated files.
+    Only the rows in the visible window are materialized as Treeview items (see render_table_window)."""
+    global TABLE_ROWS, TABLE_VIEW_START, ENCODED_ROWS, TABLE_LINE_LIMIT
 
     # Use the configured DataTable.Treeview style
     TREE.configure(style='DataTable.Treeview')
 
     # Use translated data if available, otherwise use original
-    data = translated_data if translated_data else original_data
-    
-    if data and 'rows' in data:
-        for idx, row in enumerate(data['rows']):
-            # Get original text if available - always use last field in row
-            original_text = ""
-            if original_data and 'rows' in original_data and len(original_data['rows']) > idx:
-                original_row = original_data['rows'][idx]
-                original_text = list(original_row.values())[-1] if original_row else ''
-            
-            # Get translated text - always use last field in row
-            translated_text = list(row.values())[-1] if row else ''
-
-            item_id = tree.insert("", "end", values=(
-                row.get('$id', ''),
-                row.get('label', ''),
-                format_text(original_text),
-                format_text(translated_text)
-            ))
-            
-            # Check line length and apply tag
-            if CURRENT_JSON_PATH:
-                filename = os.path.basename(CURRENT_JSON_PATH)
-                if check_line_length(filename, format_text(translated_text)):
-                    tree.item(item_id, tags=("red",))
-
-            # Calculate text height for the "EDITED TEXT" column
-            text = row.get('name', '')
-            font_size = font_size_var.get()
-            width = 200 // 7
-            if root.winfo_exists():  # Only calculate height if root window exists
-                font_style = font.Font(family="Calibri", size=font_size)
-                height = calculate_text_height(text, font_style, width)
-                s = ttk.Style()
-                s.configure('Treeview', rowheight=int(height + 15))
+    data = translated_data if translated_data is not None else original_data
+
+    # Rows are read from the tables when rendered, the text column is resolved once per table
+    TABLE_ROWS = TableRows(data, original_data)
+    TABLE_VIEW_START = 0
+    TABLE_LINE_LIMIT = LINE_RULES.limit(os.path.basename(CURRENT_JSON_PATH)) if CURRENT_JSON_PATH else None
+    TABLE_SUGGESTIONS.clear()
+    DIRTY_ROWS.clear()
+    ENCODED_ROWS = None
+    if data is not None and len(data):
+        ENCODED_ROWS = [None] * len(data)  # Filled in by the first save
+
+        # Suggest the translation of identical originals for untranslated rows
+        if MEMORY and MEMORY.ready and TABLE_ROWS.alignment is not None:
+            for idx, original_text, translated_text in TABLE_ROWS.alignment.text_pairs(data, original_data):
+                if original_text and not is_translated(original_text, translated_text):
+                    suggestion = MEMORY.lookup(original_text)
+                    if suggestion:
+                        TABLE_SUGGESTIONS[idx] = display_text(suggestion)
+
+        update_row_height(data)
+
+    # Items of the previous table share their ids (row indices) with the new one
+    TREE.delete(*TREE.get_children())
+    render_table_window()
+
+def update_row_height(data):
+    """Sets the row height of the table from the text of a table's rows."""
+    # All rows share one row height, so only the last row's value ever took effect
+    if len(data) and root.winfo_exists():  # Only calculate height if root window exists
+        text = data.value(len(data) - 1, 'name')
+        font_size = font_size_var.get()
+        width = 200 // 7
+        height = calculate_text_height(text, "Calibri", font_size, width)
+        s = ttk.Style()
+        s.configure('Treeview', rowheight=int(height + 15))
+
+def table_row_height():
+    """Returns the current row height of the data table in pixels."""
+    style = ttk.Style()
+    for style_name in ('DataTable.Treeview', 'Treeview'):
+        try:
+            row_height = int(style.lookup(style_name, 'rowheight'))
+        except (TypeError, ValueError):
+            continue
+        if row_height > 0:
+            return row_height
+    return 40
+
+def table_visible_rows():
+    """Returns how many table rows fit in the visible area of the table."""
+    height = TREE.winfo_height()
+    if height <= 1:  # Not mapped yet
+        height = TREE.winfo_reqheight()
+    return max(1, height // table_row_height())
+
+def row_tags(index):
+    """Returns the Treeview tags of the row at index: red if a line is too long, and suggested
+    if the translation memory has a suggestion for it."""
+    tags = ("red",) if line_too_long(TABLE_ROWS.text(index), TABLE_LINE_LIMIT) else ()
+    if index in TABLE_SUGGESTIONS:
+        tags += ("suggested",)
+    return tags
+
+@STATS.timed("render table window")
+def render_table_window():
+    """Materializes Treeview items for the visible window of TABLE_ROWS plus a small buffer.
+    Item ids are the row indices in TABLE_ROWS, so rows can always be mapped back to the store."""
+    global TABLE_VIEW_START
+
+    visible = table_visible_rows()
+    TABLE_VIEW_START = max(0, min(TABLE_VIEW_START, len(TABLE_ROWS) - visible))
+    end = min(len(TABLE_ROWS), TABLE_VIEW_START + visible + TABLE_BUFFER_ROWS)
+
+    # Drop items that scrolled out of the window, keep the ones still inside it
+    stale = [item for item in TREE.get_children() if not TABLE_VIEW_START <= int(item) < end]
+    if stale:
+        TREE.delete(*stale)
+
+    for position, index in enumerate(range(TABLE_VIEW_START, end)):
+        item_id = str(index)
+        if TREE.exists(item_id):
+            continue
+        TREE.insert("", position, iid=item_id, values=TABLE_ROWS[index], tags=row_tags(index))
+
+    TREE.yview_moveto(0)  # The window itself never scrolls, the scrollbar tracks TABLE_VIEW_START
+    if TABLE_ROWS:
+        tree_scroll.set(TABLE_VIEW_START / len(TABLE_ROWS), min(len(TABLE_ROWS), TABLE_VIEW_START + visible) / len(TABLE_ROWS))
+    else:
+        tree_scroll.set(0, 1)
+
+def table_yview(*args):
+    """Scrollbar command for the virtualized table."""
+    global TABLE_VIEW_START
+    if not TABLE_ROWS:
+        return
+    if args[0] == 'moveto':
+        TABLE_VIEW_START = int(float(args[1]) * len(TABLE_ROWS))
+    elif args[0] == 'scroll':
+        amount = int(args[1])
+        if args[2] == 'pages':
+            amount *= table_visible_rows()
+        TABLE_VIEW_START += amount
+    render_table_window()
+
+def table_mousewheel(event):
+    """Scrolls the virtualized table with the mouse wheel."""
+    if event.num == 4 or event.delta > 0:
+        table_yview('scroll', -3, 'units')
+    else:
+        table_yview('scroll', 3, 'units')
+    return "break"
+
+def table_key_scroll(event):
+    """Keeps keyboard navigation working across the edges of the rendered window."""
+    if event.keysym in ('Prior', 'Next'):
+        table_yview('scroll', -1 if event.keysym == 'Prior' else 1, 'pages')
+        return "break"
+    focused = TREE.focus()
+    if not focused:
+        return None
+    index = int(focused)
+    if event.keysym == 'Down' and index + 1 >= TABLE_VIEW_START + table_visible_rows():
+        table_yview('scroll', 1, 'units')
+    elif event.keysym == 'Up' and index - 1 < TABLE_VIEW_START:
+        table_yview('scroll', -1, 'units')
+    return None  # Let the default binding move the focus
 
 # --- GUI Functions ---
 
@@ -187,8 +359,10 @@ def browse_base_dir():
     global BASE_DIR
     BASE_DIR = filedialog.askdirectory()
     if BASE_DIR:
+        PREFETCHER.cancel()  # Pending files belong to the previous directory
         base_dir_label.config(text=f"Base Directory: {BASE_DIR}")
-        populate_file_list()
+        load_config()  # Status of the new base dir
+        populate_file_list()  # The search index is refreshed once the scan finished
         save_gui_state()  # Save the GUI state
 
 def browse_second_base_dir():
@@ -196,214 +370,689 @@ def browse_second_base_dir():
     global SECOND_BASE_DIR
     SECOND_BASE_DIR = filedialog.askdirectory()
     if SECOND_BASE_DIR:
+        PREFETCHER.cancel()  # Pending files belong to the previous directory
         second_base_dir_label.config(text=f"Second Directory: {SECOND_BASE_DIR}")
+        start_search_indexing()  # Original texts are indexed too
+        start_progress_scan()  # Progress is measured against the originals
+        start_file_watcher()  # Originals changed on disk affect the progress too
         save_gui_state()  # Save the GUI state
 
 # Add this at the top with other global variables
 ORIGINAL_FILE_LIST = []
+SCAN_CANCEL = None  # Event that cancels the running file list scan
+PROJECT_MANIFEST = None  # Cached layout of the base dir, shown before the scan finishes
+SCAN_POLL_MS = 20  # How often scan results are picked up by the UI
+SCAN_BATCHES_PER_POLL = 4  # Folder batches added per poll, so the UI stays responsive
+FILTER_QUERY = ""  # Search text the file list is currently filtered by
+FILTER_JOB = None  # Pending debounced filter run
+FILTER_DELAY_MS = 150  # Typing pause before the file list is filtered
+PROGRESS = None  # Cached translation progress per file of the base dir
+PROGRESS_CANCEL = None  # Event that cancels the running progress computation
+FILE_PROGRESS = {}  # JSON path -> (translated rows, rows), as shown in the file list
+DIRTY_MARKER = "● "  # Shown before the name of files with unsaved edits
+DIRTY_FILES = set()  # JSON paths shown with DIRTY_MARKER in the file list
+WATCHER_CANCEL = None  # Event that stops the running file watcher
+WATCH_POLL_MS = 250  # How often file watcher results are picked up by the UI
+
+def file_list_entry(item_id, text, values):
+    """Returns the ORIGINAL_FILE_LIST record of a file list item, with its lowercase name precomputed."""
+    return {
+        'id': item_id,
+        'text': text,
+        'lower': text.lower(),
+        'values': values,
+        'visible': True  # Whether the item is attached to the file list
+    }
+
+def file_list_text(json_path, json_file):
+    """Returns the file list text of a file, with DIRTY_MARKER if it has unsaved edits."""
+    return DIRTY_MARKER + json_file if json_path in DIRTY_FILES else json_file
+
+def mark_dirty_file(json_path, dirty):
+    """Shows or hides the unsaved edits marker of a file in the file list."""
+    if not json_path or (json_path in DIRTY_FILES) == dirty:
+        return
+    if dirty:
+        DIRTY_FILES.add(json_path)
+    else:
+        DIRTY_FILES.discard(json_path)
+    for folder in ORIGINAL_FILE_LIST:
+        for child in folder['children']:
+            if child['values'][1] == json_path:
+                if file_list.exists(child['id']):
+                    file_list.item(child['id'], text=file_list_text(json_path, child['text']))
+                return
+
+def update_dirty_marker():
+    """Shows in the file list whether the opened file has unsaved edits."""
+    mark_dirty_file(CURRENT_JSON_PATH, bool(DIRTY_ROWS))
 
 def filter_folders(event=None):
-    """Filters folders based on search text."""
+    """Filters folders based on search text, once the user pauses typing."""
+    global FILTER_JOB
+    if FILTER_JOB:
+        root.after_cancel(FILTER_JOB)
+    FILTER_JOB = root.after(FILTER_DELAY_MS, apply_file_filter)
+
+@STATS.timed("filter file list")
+def apply_file_filter():
+    """Shows the folders and files matching the search text and detaches the others.
+    Items are never recreated, so their tags survive filtering."""
+    global FILTER_QUERY, FILTER_JOB
+    FILTER_JOB = None
     search_text = search_var.get().lower()
-    
-    if not ORIGINAL_FILE_LIST:
+    if search_text == FILTER_QUERY:
         return
-        
-    # Clear the current view
-    for item in file_list.get_children():
-        file_list.delete(item)
-    
-    # Rebuild the tree from original list
+
+    # Anything matching the new text also matched the previous one if it contains it,
+    # so only the items that are currently visible need to be checked
+    narrowing = FILTER_QUERY in search_text
+    FILTER_QUERY = search_text
+
+    folder_position = 0
     for folder in ORIGINAL_FILE_LIST:
-        folder_name = folder['text'].lower()
-        folder_matches = not search_text or search_text in folder_name
-        
-        # If folder matches or any child matches, show it
-        if folder_matches or any(search_text in child['text'].lower() for child in folder['children']):
-            # Check if folder has a color tag
-            folder_tags = ()
-            if folder['text'] in FOLDER_STATUS:
-                folder_tags = (FOLDER_STATUS[folder['text']],)
-            
-            # Recreate the folder item
-            folder_id = file_list.insert("", "end", 
-                text=folder['text'], 
-                values=folder['values'],
-                tags=folder_tags
-            )
-            
-            # Add matching children
-            for child in folder['children']:
-                if not search_text or search_text in child['text'].lower():
-                    # Check if child has a color tag
-                    child_tags = ()
-                    rel_path = child['values'][1].replace(BASE_DIR + '\\', '').replace('\\', '/')
-                    if rel_path in FOLDER_STATUS:
-                        child_tags = (FOLDER_STATUS[rel_path],)
-                    
-                    child_id = file_list.insert(folder_id, "end", 
-                        text=child['text'], 
-                        values=child['values'],
-                        tags=child_tags
-                    )
-
-def detect_game_version(base_dir):
-    """Detects whether this is Xenoblade 2, 3 or X based on folder structure and bschema files."""
-    # Check for Xenoblade 3 structure (has game/ and evt/ folders)
-    game_path = os.path.join(base_dir, "game")
-    evt_path = os.path.join(base_dir, "evt")
-    
-    if os.path.exists(game_path) and os.path.exists(evt_path):
-        # Found Xenoblade 3 structure
-        root.title("BDAT Translation Tool [X3]")
-        return "Xenoblade3"
-    
-    # Check for Xenoblade X structure (Modern schema but direct bdat folders)
-    for item in os.listdir(base_dir):
-        item_path = os.path.join(base_dir, item)
-        if os.path.isdir(item_path):
-            # Check for bschema file
-            bschema_path = os.path.join(item_path, f"{item}.bschema")
-            if os.path.exists(bschema_path):
-                try:
-                    with open(bschema_path, 'r') as f:
-                        bschema = json.load(f)
-                        if "version" in bschema and isinstance(bschema["version"], dict) and "Legacy" in bschema["version"]:
-                            root.title("BDAT Translation Tool [X2]")
-                            return "Xenoblade2"
-                        elif "version" in bschema and bschema["version"] == "Modern":
-                            # Check if this is X or 3 by looking for game/evt folders
-                            if not os.path.exists(game_path) and not os.path.exists(evt_path):
-                                root.title("BDAT Translation Tool [X]")
-                                return "XenobladeX"
-                            else:
-                                root.title("BDAT Translation Tool [X3]")
-                                return "Xenoblade3"
-                except:
-                    continue
-    root.title("BDAT Translation Tool [X2]")
-    return "Xenoblade2"  # Default to XB2 if unsure
+        if narrowing and not folder['visible']:
+            continue
+
+        folder_matches = filter_folder_children(folder, search_text, narrowing)
+        if folder_matches != folder['visible']:
+            folder['visible'] = folder_matches
+            if folder_matches:
+                file_list.move(folder['id'], "", folder_position)
+            else:
+                file_list.detach(folder['id'])
+        if folder_matches:
+            folder_position += 1
+
+def filter_folder_children(folder, search_text, narrowing=False):
+    """Attaches the children of a file list folder that match search_text and detaches the others.
+    Returns whether the folder itself should be shown."""
+    child_position = 0
+    for child in folder['children']:
+        if narrowing and not child['visible']:
+            continue
+        child_matches = not search_text or search_text in child['lower']
+        if child_matches != child['visible']:
+            child['visible'] = child_matches
+            if child_matches:
+                file_list.move(child['id'], folder['id'], child_position)
+            else:
+                file_list.detach(child['id'])
+        if child_matches:
+            child_position += 1
+
+    # If folder matches or any child matches, show it
+    return not search_text or search_text in folder['lower'] or child_position > 0
+
+def file_status_key(json_path):
+    """Returns the FOLDER_STATUS key of a JSON file: its path relative to the BDAT folder."""
+    # Get the BDAT folder name (parent folder)
+    bdat_folder = os.path.basename(os.path.dirname(os.path.dirname(json_path)))
+    # Get relative path within BDAT folder
+    rel_path = os.path.relpath(json_path, os.path.join(BASE_DIR, bdat_folder))
+    # Convert to forward slashes for consistency
+    return rel_path.replace('\\', '/')
 
 def populate_file_list():
-    """Populates the file list with BDAT folders and JSON files."""
-    global ORIGINAL_FILE_LIST, GAME_VERSION
-    # Clear existing list
+    """Populates the file list with BDAT folders and JSON files.
+    Folders cached in the project manifest are shown right away. The base dir is then scanned on a
+    worker thread, and folders that changed since are added or updated in batches as they are found.
+    Starting a new scan cancels the previous one."""
+    global ORIGINAL_FILE_LIST, FILTER_QUERY, SCAN_CANCEL, PROJECT_MANIFEST, PROGRESS, WATCHER_CANCEL
+    if SCAN_CANCEL:
+        SCAN_CANCEL.set()
+        SCAN_CANCEL = None
+    if WATCHER_CANCEL:
+        WATCHER_CANCEL.set()  # Restarted once the scan finished
+        WATCHER_CANCEL = None
+    if PROGRESS_CANCEL:
+        PROGRESS_CANCEL.set()
+    FILE_PROGRESS.clear()
+
+    # Clear existing list, including items detached by the filter
     for item in file_list.get_children():
         file_list.delete(item)
+    for folder in ORIGINAL_FILE_LIST:
+        if file_list.exists(folder['id']):
+            file_list.delete(folder['id'])
+    ORIGINAL_FILE_LIST = []  # Reset the original list
+    FILTER_QUERY = search_var.get().lower()  # Folders are filtered as they are added
+
+    if not BASE_DIR or not os.path.exists(BASE_DIR):
+        PROJECT_MANIFEST = PROGRESS = None
+        return
+
+    if PROGRESS:
+        PROGRESS.save()
+    PROGRESS = TranslationProgress(BASE_DIR)
+    PROGRESS.load()
+    manifest = PROJECT_MANIFEST = ProjectManifest(BASE_DIR)
+    if manifest.load():
+        set_game_version(manifest.game_version)
+        add_file_list_folders(manifest.cached_folders())
+
+    cancelled = SCAN_CANCEL = threading.Event()
+    results = queue.Queue()
+    base_dir = BASE_DIR
 
-    if BASE_DIR and os.path.exists(BASE_DIR):
-        ORIGINAL_FILE_LIST = []  # Reset the original list
+    def worker():
         try:
-            GAME_VERSION = detect_game_version(BASE_DIR)
+            scan_base_dir(base_dir, results.put, cancelled, manifest)
         except Exception as e:
-            messagebox.showerror("Error", f"Could not detect game version: {str(e)}")
-            return
+            results.put(('error', e))
 
-        if GAME_VERSION == "Xenoblade3":
-            # Xenoblade 3 has game/ and evt/ folders
-            for top_folder in ["game", "evt"]:
-                top_folder_path = os.path.join(BASE_DIR, top_folder)
-                if os.path.exists(top_folder_path):
-                    for bdat_folder in os.listdir(top_folder_path):
-                        bdat_folder_path = os.path.join(top_folder_path, bdat_folder)
-                        if os.path.isdir(bdat_folder_path):
-                            folder_id = file_list.insert("", "end", text=f"{top_folder}/{bdat_folder}", values=("folder", bdat_folder_path))
-                            ORIGINAL_FILE_LIST.append({
-                                'id': folder_id,
-                                'text': f"{top_folder}/{bdat_folder}",
-                                'values': ("folder", bdat_folder_path),
-                                'children': []
-                            })
-                            
-                            if bdat_folder in FOLDER_STATUS:
-                                file_list.item(folder_id, tags=(FOLDER_STATUS[bdat_folder],))
-
-                            inner_folder_path = os.path.join(bdat_folder_path, bdat_folder)
-                            if os.path.isdir(inner_folder_path):
-                                json_files = [f for f in os.listdir(inner_folder_path) if f.endswith(".json")]
-                                for json_file in json_files:
-                                    json_path = os.path.join(inner_folder_path, json_file)
-                                    child_id = file_list.insert(folder_id, "end", text=json_file, values=("file", json_path))
-                                    ORIGINAL_FILE_LIST[-1]['children'].append({
-                                        'id': child_id,
-                                        'text': json_file,
-                                        'values': ("file", json_path)
-                                    })
+    def poll():
+        if cancelled.is_set():
+            return  # A newer scan replaced this one
+        for _ in range(SCAN_BATCHES_PER_POLL):
+            try:
+                kind, payload = results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'version':
+                set_game_version(payload)
+            elif kind == 'folders':
+                add_file_list_folders(payload)
+                scan_label.config(text=f"Scanning... {len(ORIGINAL_FILE_LIST)} folders")
+            elif kind == 'error':
+                scan_label.config(text="")
+                messagebox.showerror("Error", f"Could not scan base directory: {str(payload)}")
+                return
+            elif kind == 'done':
+                scan_label.config(text="")
+                remove_missing_folders(set(payload))
+                file_list_scanned()
+                return
+        root.after(SCAN_POLL_MS, poll)
+
+    scan_label.config(text="Scanning...")
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(SCAN_POLL_MS, poll)
+
+def set_game_version(game_version):
+    """Stores the detected game version and shows it in the window title."""
+    global GAME_VERSION, LINE_RULES
+    GAME_VERSION = game_version
+    LINE_RULES = load_line_limit_rules(game_version)
+    root.title(f"BDAT Translation Tool [{GAME_TITLES.get(game_version, 'X2')}]")
+
+@STATS.timed("add file list folders")
+def add_file_list_folders(batch):
+    """Adds a batch of scanned BDAT folders and their JSON files to the file list.
+    Folders already in the list get their files replaced."""
+    existing = {folder['text']: folder for folder in ORIGINAL_FILE_LIST}
+    for display_name, bdat_folder_path, json_files in batch:
+        folder = existing.get(display_name)
+        if folder:
+            for child in folder['children']:
+                file_list.delete(child['id'])
+            folder['children'] = []
+            folder_id = folder['id']
         else:
-            # Xenoblade 2 has direct bdat folders
-            for bdat_folder in os.listdir(BASE_DIR):
-                bdat_folder_path = os.path.join(BASE_DIR, bdat_folder)
-                if os.path.isdir(bdat_folder_path):
-                    folder_id = file_list.insert("", "end", text=bdat_folder, values=("folder", bdat_folder_path))
-                    ORIGINAL_FILE_LIST.append({
-                        'id': folder_id,
-                        'text': bdat_folder,
-                        'values': ("folder", bdat_folder_path),
-                        'children': []
-                    })
-                    
-                    if bdat_folder in FOLDER_STATUS:
-                        file_list.item(folder_id, tags=(FOLDER_STATUS[bdat_folder],))
-
-                    inner_folder_path = os.path.join(bdat_folder_path, bdat_folder)
-                    if os.path.isdir(inner_folder_path):
-                        json_files = [f for f in os.listdir(inner_folder_path) if f.endswith(".json")]
-                        for json_file in json_files:
-                            json_path = os.path.join(inner_folder_path, json_file)
-                            child_id = file_list.insert(folder_id, "end", text=json_file, values=("file", json_path))
-                            ORIGINAL_FILE_LIST[-1]['children'].append({
-                                'id': child_id,
-                                'text': json_file,
-                                'values': ("file", json_path)
-                            })
-
-
-def load_table_data(json_path):
-    """Loads the selected JSON file into the table."""
-    global CURRENT_JSON_PATH, CURRENT_JSON_DATA, CURRENT_ORIGINAL_JSON_PATH, CURRENT_ORIGINAL_JSON_DATA, GAME_VERSION
+            folder_tags = (FOLDER_STATUS[display_name],) if display_name in FOLDER_STATUS else ()
+            folder_id = file_list.insert("", "end", text=display_name, values=("folder", bdat_folder_path), tags=folder_tags)
+            folder = file_list_entry(folder_id, display_name, ("folder", bdat_folder_path))
+            folder['children'] = []
+            ORIGINAL_FILE_LIST.append(folder)
+
+        inner_folder_path = os.path.join(bdat_folder_path, os.path.basename(bdat_folder_path))
+        for json_file in json_files:
+            json_path = os.path.join(inner_folder_path, json_file)
+            key = file_status_key(json_path)
+            child_tags = (FOLDER_STATUS[key],) if key in FOLDER_STATUS else ()
+            child_id = file_list.insert(folder_id, "end", text=file_list_text(json_path, json_file), values=("file", json_path), tags=child_tags)
+            folder['children'].append(file_list_entry(child_id, json_file, ("file", json_path)))
+
+        # Keep the current search text applied to new folders
+        refilter_folder(folder)
+
+def refilter_folder(folder):
+    """Applies the current search text to a file list folder whose files changed."""
+    if not FILTER_QUERY:
+        return
+    folder_matches = filter_folder_children(folder, FILTER_QUERY)
+    if folder_matches != folder['visible']:
+        folder['visible'] = folder_matches
+        if folder_matches:
+            position = sum(1 for other in ORIGINAL_FILE_LIST[:ORIGINAL_FILE_LIST.index(folder)] if other['visible'])
+            file_list.move(folder['id'], "", position)
+        else:
+            file_list.detach(folder['id'])
 
-    CURRENT_JSON_PATH = json_path
-    CURRENT_JSON_DATA = load_json(CURRENT_JSON_PATH)
-    
+def remove_missing_folders(folder_names):
+    """Removes folders that a finished scan didn't find anymore from the file list."""
+    global ORIGINAL_FILE_LIST
+    for folder in ORIGINAL_FILE_LIST:
+        if folder['text'] not in folder_names:
+            file_list.delete(folder['id'])
+    ORIGINAL_FILE_LIST = [folder for folder in ORIGINAL_FILE_LIST if folder['text'] in folder_names]
+
+def file_list_scanned():
+    """Called once the file list scan has finished."""
+    start_search_indexing()
+    start_progress_scan()
+    start_file_watcher()
+
+def start_file_watcher():
+    """Watches both base dirs for files changed by other programs, e.g. a new BDAT extraction,
+    and updates only the affected file list items, cached tables and progress (see FileWatcher)."""
+    global WATCHER_CANCEL
+    if WATCHER_CANCEL:
+        WATCHER_CANCEL.set()
+        WATCHER_CANCEL = None
+    if not BASE_DIR or not os.path.isdir(BASE_DIR):
+        return
+
+    cancelled = WATCHER_CANCEL = threading.Event()
+    results = queue.Queue()
+    watcher = FileWatcher([BASE_DIR, SECOND_BASE_DIR], GAME_VERSION, results.put)
+
+    def poll():
+        if cancelled.is_set():
+            return  # A newer watcher replaced this one
+        while True:
+            try:
+                kind, payload = results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'folders':
+                folders_changed_on_disk(payload)
+            elif kind == 'files':
+                files_changed_on_disk(payload)
+            elif kind == 'rescan':
+                populate_file_list()  # Changes were lost, the scan starts a new watcher
+                return
+        root.after(WATCH_POLL_MS, poll)
+
+    threading.Thread(target=watcher.run, args=(cancelled,), daemon=True).start()
+    root.after(WATCH_POLL_MS, poll)
+
+def changed_on_disk(json_path):
+    """Returns whether a file changed on disk since the table was loaded or saved."""
+    signature = DISK_SIGNATURES.get(json_path)
+    if signature is None:
+        return False  # Not opened, or opened before it existed
+    try:
+        return file_signature(json_path) != signature
+    except OSError:
+        return True
+
+def editor_open():
+    """Returns whether a cell of the table is being edited."""
+    return any(child.winfo_class() == "Text" for child in TREE.winfo_children())
+
+def folders_changed_on_disk(folder_paths):
+    """Adds, updates or removes the file list folders of BDAT folders that changed on disk.
+    Only the files that were added or removed are touched, so the other items keep their state."""
+    global ORIGINAL_FILE_LIST
+    if not BASE_DIR:
+        return
+    display_names = {}
+    for prefix, root_path in bdat_roots(BASE_DIR, GAME_VERSION):
+        display_names[os.path.normcase(os.path.normpath(root_path))] = prefix
+    existing = {folder['values'][1]: folder for folder in ORIGINAL_FILE_LIST}
+    added = []
+    for bdat_folder_path in folder_paths:
+        prefix = display_names.get(os.path.normcase(os.path.dirname(bdat_folder_path)))
+        if prefix is None:
+            continue  # A folder of the second base dir, which isn't listed
+        folder = existing.get(bdat_folder_path)
+        if not os.path.isdir(bdat_folder_path):
+            if folder:
+                file_list.delete(folder['id'])
+                ORIGINAL_FILE_LIST = [other for other in ORIGINAL_FILE_LIST if other is not folder]
+            continue
+        json_files = list_json_files(bdat_folder_path)
+        if folder is None:
+            add_file_list_folders([(prefix + os.path.basename(bdat_folder_path), bdat_folder_path, json_files)])
+            continue
+
+        names = set(json_files)
+        for child in folder['children']:
+            if child['text'] not in names:
+                file_list.delete(child['id'])
+        folder['children'] = [child for child in folder['children'] if child['text'] in names]
+        listed = {child['text'] for child in folder['children']}
+        inner_folder_path = os.path.join(bdat_folder_path, os.path.basename(bdat_folder_path))
+        for json_file in json_files:
+            if json_file in listed:
+                continue
+            json_path = os.path.join(inner_folder_path, json_file)
+            key = file_status_key(json_path)
+            child_tags = (FOLDER_STATUS[key],) if key in FOLDER_STATUS else ()
+            child_id = file_list.insert(folder['id'], "end", text=file_list_text(json_path, json_file), values=("file", json_path), tags=child_tags)
+            folder['children'].append(file_list_entry(child_id, json_file, ("file", json_path)))
+            added.append(json_path)
+        refilter_folder(folder)
+    if added:
+        refresh_changed_files(added)
+
+def files_changed_on_disk(paths):
+    """Drops the cached tables of files that other programs changed and updates their progress and
+    search index entries. The opened table is reloaded if it has no unsaved edits."""
+    translated_paths = []
+    for path in paths:
+        if DISK_SIGNATURES.get(path) is not None and not changed_on_disk(path):
+            continue  # Written by this tool
+        TABLE_CACHE.invalidate_changed(path)
+        json_path = path
+        if SECOND_BASE_DIR and BASE_DIR and os.path.normcase(path).startswith(os.path.normcase(os.path.join(SECOND_BASE_DIR, ''))):
+            json_path = os.path.join(BASE_DIR, os.path.relpath(path, SECOND_BASE_DIR))  # An original changed
+        if os.path.exists(json_path):
+            translated_paths.append(json_path)
+    if translated_paths:
+        refresh_changed_files(translated_paths)
+
+    current_paths = [path for path in (CURRENT_JSON_PATH, CURRENT_ORIGINAL_JSON_PATH) if path in paths and changed_on_disk(path)]
+    if not current_paths or CURRENT_JSON_DATA is None:
+        return
+    if DIRTY_ROWS or editor_open():
+        status_label.config(text=f"{os.path.basename(current_paths[0])} changed on disk, saving will ask before overwriting it")
+    elif os.path.exists(CURRENT_JSON_PATH):
+        focus = TREE.focus()
+        load_table_data(CURRENT_JSON_PATH, select_row=int(focus) if focus else None)
+
+def refresh_changed_files(json_paths):
+    """Indexes files changed on disk again and shows their new progress, on a worker thread."""
+    results = queue.Queue()
+    base_dir, second_base_dir, game_version = BASE_DIR, SECOND_BASE_DIR, GAME_VERSION
+    search_index, progress = SEARCH_INDEX, PROGRESS if SECOND_BASE_DIR else None
+
+    def worker():
+        progress_results = []
+        for json_path in json_paths:
+            original_path = resolve_original_path(json_path, base_dir, second_base_dir, game_version)
+            if search_index:
+                search_index.update_file(base_dir, second_base_dir, game_version, json_path)
+            if progress:
+                try:
+                    translated, total = file_progress(json_path, original_path)
+                except (OSError, ValueError):
+                    continue
+                progress.set(json_path, original_path, translated, total)
+                progress_results.append((json_path, translated, total))
+        results.put(progress_results)
+
+    def poll():
+        try:
+            progress_results = results.get_nowait()
+        except queue.Empty:
+            root.after(SCAN_POLL_MS, poll)
+            return
+        if progress_results and progress is PROGRESS:
+            show_progress(progress_results)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(SCAN_POLL_MS, poll)
+
+def progress_text(translated, total):
+    """Formats translation progress as a percentage; only fully translated items show 100%."""
+    return f"{translated * 100 // total}%" if total else ""
+
+def show_progress(results, items=None):
+    """Shows (JSON path, translated rows, rows) results as percentages on the files and their folders.
+    items maps JSON paths to their (folder, file) file list entries and is built if not given."""
+    if items is None:
+        items = {child['values'][1]: (folder, child) for folder in ORIGINAL_FILE_LIST for child in folder['children']}
+    folders = {}
+    for json_path, translated, total in results:
+        FILE_PROGRESS[json_path] = (translated, total)
+        if json_path in items:
+            folder, child = items[json_path]
+            if file_list.exists(child['id']):
+                file_list.set(child['id'], "Progress", progress_text(translated, total))
+            folders[folder['id']] = folder
+
+    # Folders add up the rows of their files
+    for folder_id, folder in folders.items():
+        if not file_list.exists(folder_id):
+            continue
+        translated = total = 0
+        for child in folder['children']:
+            counts = FILE_PROGRESS.get(child['values'][1])
+            if counts:
+                translated += counts[0]
+                total += counts[1]
+        file_list.set(folder_id, "Progress", progress_text(translated, total))
+
+def start_progress_scan():
+    """Compares every file with its original in the background and shows the progress in the file list.
+    Cached results show up right away; files changed since are compared in parallel, a folder at a time."""
+    global PROGRESS_CANCEL
+    if PROGRESS_CANCEL:
+        PROGRESS_CANCEL.set()
+        PROGRESS_CANCEL = None
+    if not PROGRESS or not BASE_DIR or not SECOND_BASE_DIR:
+        return
+
+    cancelled = PROGRESS_CANCEL = threading.Event()
+    results = queue.Queue()
+    progress = PROGRESS
+    base_dir, second_base_dir, game_version = BASE_DIR, SECOND_BASE_DIR, GAME_VERSION
+    items = {child['values'][1]: (folder, child) for folder in ORIGINAL_FILE_LIST for child in folder['children']}
+    folders = [[child['values'][1] for child in folder['children']] for folder in ORIGINAL_FILE_LIST]
+
+    def worker():
+        stale = []
+        original_paths = {}
+        for json_paths in folders:
+            cached = []
+            jobs = []
+            for json_path in json_paths:
+                if cancelled.is_set():
+                    return
+                original_path = original_paths[json_path] = resolve_original_path(json_path, base_dir, second_base_dir, game_version)
+                counts = progress.get(json_path, original_path)
+                if counts is None:
+                    jobs.append((json_path, original_path))
+                else:
+                    cached.append((json_path,) + counts)
+            if cached:
+                results.put(cached)
+            if jobs:
+                stale.append(jobs)
+
+        def emit(batch):
+            for json_path, translated, total in batch:
+                progress.set(json_path, original_paths[json_path], translated, total)
+            results.put(batch)
+
+        if stale:
+            try:
+                run_progress(stale, emit, cancelled)
+            except (OSError, ValueError) as e:
+                print(f"Error computing translation progress: {e}")
+        progress.save()
+        results.put(None)
+
+    def poll():
+        if cancelled.is_set():
+            return  # A newer computation replaced this one
+        while True:
+            try:
+                batch = results.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                return
+            show_progress(batch, items)
+        root.after(SCAN_POLL_MS, poll)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(SCAN_POLL_MS, poll)
+
+def load_table_data(json_path, select_row=None):
+    """Loads the selected JSON file into the table, optionally selecting the row at index select_row.
+    The translated and original files are parsed on a worker thread through TABLE_CACHE,
+    and the table is populated back on the Tk thread once both are available."""
+    global LOAD_GENERATION
+
+    LOAD_GENERATION += 1
+    generation = LOAD_GENERATION
     # Find corresponding file in second base dir if it exists
-    CURRENT_ORIGINAL_JSON_DATA = None
-    if SECOND_BASE_DIR:
-        # Get relative path from first base dir
-        rel_path = os.path.relpath(json_path, BASE_DIR)
-        # Build path in second base dir
-        original_path = os.path.join(SECOND_BASE_DIR, rel_path)
-        if os.path.exists(original_path):
-            CURRENT_ORIGINAL_JSON_PATH = original_path
-            CURRENT_ORIGINAL_JSON_DATA = load_json(original_path)
-        elif GAME_VERSION in ["Xenoblade3", "XenobladeX"]:
-            # For XB3, also check if the file exists in the other top-level folder (game/evt)
-            parts = rel_path.split(os.sep)
-            if len(parts) > 1 and parts[0] in ["game", "evt"]:
-                # Try the opposite folder
-                opposite_folder = "evt" if parts[0] == "game" else "game"
-                opposite_path = os.path.join(SECOND_BASE_DIR, opposite_folder, *parts[1:])
-                if os.path.exists(opposite_path):
-                    CURRENT_ORIGINAL_JSON_PATH = opposite_path
-                    CURRENT_ORIGINAL_JSON_DATA = load_json(opposite_path)
-    
-    if CURRENT_JSON_DATA:
-        populate_table(TREE, CURRENT_ORIGINAL_JSON_DATA, CURRENT_JSON_DATA)
+    original_path = resolve_original_path(json_path, BASE_DIR, SECOND_BASE_DIR, GAME_VERSION)
+    buffered = SESSION.files.get(json_path)
+    results = queue.Queue()
+
+    def worker():
+        # Taken before parsing, so a change made while parsing still counts as a change
+        signatures = {}
+        for path in (json_path, original_path):
+            try:
+                signatures[path] = file_signature(path) if path else None
+            except OSError:
+                signatures[path] = None
+        if buffered is not None:
+            # The unsaved edits of the file belong to the tables they were made on
+            results.put(([(buffered[0].table, None), (buffered[0].original, None)], signatures))
+            return
+        loaded = []
+        for path in (json_path, original_path):
+            if not path:
+                loaded.append((None, None))
+                continue
+            try:
+                loaded.append((TABLE_CACHE.load(path), None))
+            except Exception as e:
+                loaded.append((None, e))
+        if loaded[0][0] is not None and loaded[1][0] is not None:
+            align_tables(loaded[0][0], loaded[1][0])  # Joined here rather than on the Tk thread
+        results.put((loaded, signatures))
+
+    def poll():
+        try:
+            loaded, signatures = results.get_nowait()
+        except queue.Empty:
+            root.after(20, poll)
+            return
+        if generation != LOAD_GENERATION:
+            return  # Another file was selected in the meantime
+        set_loading_state(None)
+        finish_table_load(json_path, original_path, loaded, signatures)
+        if select_row is not None:
+            show_table_row(select_row)
+
+    set_loading_state(json_path)
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(20, poll)
+
+@STATS.timed("show table")
+def finish_table_load(json_path, original_path, loaded, signatures=None):
+    """Shows a table loaded by load_table_data. The unsaved edits of the previous file are kept in SESSION,
+    and those of the loaded file are taken back from it."""
+    global CURRENT_JSON_PATH, CURRENT_JSON_DATA, CURRENT_ORIGINAL_JSON_PATH, CURRENT_ORIGINAL_JSON_DATA
+    global ENCODED_ROWS
+
+    if CURRENT_JSON_PATH and CURRENT_JSON_DATA is not None:
+        SESSION.stash(CURRENT_JSON_PATH, TABLE_ROWS, ENCODED_ROWS)
+    buffered = SESSION.take(json_path)
+
+    # Only the opened and the buffered files can be saved, and need to know whether they changed on disk
+    kept = set(SESSION.files)
+    if buffered is not None:
+        kept.add(json_path)  # Its edits were made on the table as it was loaded back then
+    for path in list(DISK_SIGNATURES):
+        if path not in kept:
+            del DISK_SIGNATURES[path]
+    for path, signature in (signatures or {}).items():
+        if path and signature is not None and path not in kept:
+            DISK_SIGNATURES[path] = signature
+
+    (data, error), (original_data, original_error) = loaded
+    for error in (error, original_error):
+        if error:
+            messagebox.showerror("Error Loading JSON", str(error))
 
-def file_list_select(event):
-    """Handles selection in the file list."""
-    global CURRENT_JSON_PATH, UNSAVED_CHANGES
+    CURRENT_JSON_PATH = json_path
+    CURRENT_JSON_DATA = data
+    CURRENT_ORIGINAL_JSON_PATH = original_path if original_data is not None else None
+    CURRENT_ORIGINAL_JSON_DATA = original_data
 
-    # Check for unsaved changes before proceeding
-    if UNSAVED_CHANGES and CURRENT_JSON_PATH:
-        response = messagebox.askyesnocancel("Warning", "You have unsaved changes. Do you want to save them?", icon='warning')
-        if response is True:  # Yes, save changes
-            save_table_data()
-        elif response is None:  # Cancel
-            return  # Do nothing, stay on the current file
+    if CURRENT_JSON_DATA is not None:
+        populate_table(TREE, CURRENT_ORIGINAL_JSON_DATA, CURRENT_JSON_DATA)
+        if buffered is not None and buffered[0].table is CURRENT_JSON_DATA:
+            rows, encoded_rows = buffered
+            TABLE_ROWS.edits.update(rows.edits)
+            DIRTY_ROWS.update(rows.edits)
+            for index in rows.edits:
+                TABLE_SUGGESTIONS.pop(index, None)
+            if encoded_rows is not None:
+                ENCODED_ROWS = encoded_rows
+            refresh_table_window()
+        prefetch_neighbours(json_path)
+        messages = []
+        alignment = TABLE_ROWS.alignment
+        if alignment and (alignment.missing or alignment.unmatched):
+            # Dumps of different game versions, rows are matched by id or label
+            messages.append(f"{len(alignment.missing)} rows have no original, "
+                            f"{len(alignment.unmatched)} original rows are not in this file")
+        if TABLE_SUGGESTIONS:
+            messages.append(f"{len(TABLE_SUGGESTIONS)} rows can be filled from memory")
+        if messages:
+            status_label.config(text="; ".join(messages))
+        if PROJECT_MANIFEST:
+            PROJECT_MANIFEST.set_row_count(json_path, len(CURRENT_JSON_DATA))
+
+def prefetch_neighbours(json_path):
+    """Warms the table cache with the next few files in the folder of json_path."""
+    next_paths = []
+    for folder in ORIGINAL_FILE_LIST:
+        paths = [child['values'][1] for child in folder['children']]
+        if json_path in paths:
+            start = paths.index(json_path) + 1
+            next_paths = paths[start:start + PREFETCH_COUNT]
+            break
+    PREFETCHER.schedule(next_paths, lambda path: resolve_original_path(path, BASE_DIR, SECOND_BASE_DIR, GAME_VERSION))
+
+def show_table_row(index):
+    """Scrolls the table to the row at index and selects it."""
+    global TABLE_VIEW_START
+    if not 0 <= index < len(TABLE_ROWS):
+        return
+    TABLE_VIEW_START = max(0, index - table_visible_rows() // 2)
+    render_table_window()
+    TREE.selection_set(str(index))
+    TREE.focus(str(index))
+
+def set_loading_state(json_path):
+    """Shows or clears the loading indicator while a table is parsed in the background."""
+    if json_path:
+        status_label.config(text=f"Loading {os.path.basename(json_path)}...")
+        root.config(cursor="watch")
+    else:
+        status_label.config(text="")
+        root.config(cursor="")
+
+def unsaved_files():
+    """Returns (JSON path, TableRows, encoded rows) of every file with unsaved edits, the opened one first."""
+    files = []
+    if CURRENT_JSON_PATH and CURRENT_JSON_DATA is not None and TABLE_ROWS.edits:
+        files.append((CURRENT_JSON_PATH, TABLE_ROWS, ENCODED_ROWS))
+    files.extend((json_path, rows, encoded_rows) for json_path, (rows, encoded_rows) in SESSION.files.items()
+                 if json_path != CURRENT_JSON_PATH)
+    return files
+
+def close_window():
+    """Asks to save the unsaved edits of all files, then saves the GUI state and closes the window."""
+    if SAVE_ALL_RUNNING:
+        messagebox.showinfo("Info", "Files are still being saved.")
+        return
+    count = len(unsaved_files())
+    if count:
+        response = messagebox.askyesnocancel("Warning", f"{count} files have unsaved changes. Do you want to save them?", icon='warning')
+        if response is None:  # Cancel
+            return
+        if response:  # The window is closed once every file is saved
+            save_all_files(close_when_done=True)
+            return
+    save_gui_state()
+    root.destroy()
 
+def file_list_select(event):
+    """Handles selection in the file list. Unsaved edits of the current file are kept in memory."""
     selected_item = file_list.selection()
-    if not selected_item:
-        return
+    if len(selected_item) != 1:
+        return  # Nothing, or several items selected with Ctrl or Shift to be marked at once
 
     item_type = file_list.item(selected_item, 'values')[0]
     item_path = file_list.item(selected_item, 'values')[1]
@@ -414,63 +1063,372 @@ def file_list_select(event):
         # Load the first JSON file in the folder
         inner_folder_path = os.path.join(item_path, os.path.basename(item_path))
         if os.path.isdir(inner_folder_path):
-            json_files = [f for f in os.listdir(inner_folder_path) if f.endswith(".json")]
+            json_files = list_json_files(item_path)
             if json_files:
                 first_json_path = os.path.join(inner_folder_path, json_files[0])
                 load_table_data(first_json_path)
-    
-    UNSAVED_CHANGES = False  # Reset the flag after loading new data
 
+@STATS.timed("save table")
 def save_table_data():
-    """Saves the edited data back to the JSON file."""
-    global CURRENT_JSON_PATH, CURRENT_JSON_DATA, UNSAVED_CHANGES
+    """Saves the edited rows back to the JSON file."""
+    global CURRENT_JSON_PATH, CURRENT_JSON_DATA
 
-    if not CURRENT_JSON_PATH or not CURRENT_JSON_DATA:
+    if not CURRENT_JSON_PATH or CURRENT_JSON_DATA is None:
         messagebox.showerror("Error", "No JSON file loaded.")
         return
 
-    # Get data from the treeview
-    for index, item in enumerate(TREE.get_children()):
+    if SAVE_ALL_RUNNING:
+        messagebox.showinfo("Info", "Files are still being saved.")
+        return
+
+    if not DIRTY_ROWS:
+        messagebox.showinfo("Info", "No changes to save.")
+        return
+
+    # Only rows edited since the last save are written back to the table
+    edits = write_back_edits(TABLE_ROWS, ENCODED_ROWS)
+    if save_json(CURRENT_JSON_PATH, CURRENT_JSON_DATA, ENCODED_ROWS):
+        files_saved([(CURRENT_JSON_PATH, TABLE_ROWS)])
+    else:
+        restore_edits(CURRENT_JSON_PATH, TABLE_ROWS, edits)
+    update_dirty_marker()
+
+def write_back_edits(rows, encoded_rows):
+    """Writes the edits of a file's rows into its table before saving. Returns the edits, so they
+    can be restored if the file can't be written."""
+    edits = dict(rows.edits)
+    for index in rows.apply_edits():
+        if encoded_rows is not None and index < len(encoded_rows):
+            encoded_rows[index] = None  # Only edited rows are encoded again
+    if rows is TABLE_ROWS:
+        DIRTY_ROWS.difference_update(edits)
+    return edits
+
+def restore_edits(json_path, rows, edits):
+    """Marks the edits of a file that couldn't be written as unsaved again."""
+    TABLE_CACHE.invalidate(json_path)  # The table holds edits that never made it to disk
+    for index, text in edits.items():
+        rows.edits.setdefault(index, text)  # Edits made while saving are newer
+    if rows is TABLE_ROWS:
+        DIRTY_ROWS.update(edits)
+
+def files_saved(saved):
+    """Updates the caches, indexes and progress of saved (JSON path, TableRows) files."""
+    for json_path, rows in saved:
+        remember_signature(json_path)
+        TABLE_CACHE.store(json_path, rows.table)  # The cached table now matches the file
+        if PROJECT_MANIFEST:
+            PROJECT_MANIFEST.set_row_count(json_path, len(rows.table))
+    if SEARCH_INDEX:
+        paths = [json_path for json_path, _ in saved]
+        base_dir, second_base_dir, game_version, search_index = BASE_DIR, SECOND_BASE_DIR, GAME_VERSION, SEARCH_INDEX
+        threading.Thread(target=lambda: [search_index.update_file(base_dir, second_base_dir, game_version, json_path)
+                                         for json_path in paths], daemon=True).start()
+    if PROGRESS and SECOND_BASE_DIR:
+        # Only the saved files changed, their progress comes straight from the tables
+        results = []
+        for json_path, rows in saved:
+            if json_path == CURRENT_JSON_PATH:
+                original_path = CURRENT_ORIGINAL_JSON_PATH
+            else:
+                original_path = resolve_original_path(json_path, BASE_DIR, SECOND_BASE_DIR, GAME_VERSION)
+            translated, total = count_translated(rows.text_pairs())
+            PROGRESS.set(json_path, original_path if rows.original is not None else None, translated, total)
+            results.append((json_path, translated, total))
+        show_progress(results)
+
+def remember_signature(json_path):
+    """Records the signature of a file this tool just wrote, see changed_on_disk."""
+    try:
+        DISK_SIGNATURES[json_path] = file_signature(json_path)
+    except OSError:
+        DISK_SIGNATURES.pop(json_path, None)
+
+def save_all_files(event=None, close_when_done=False):
+    """Saves every file with unsaved edits, several at a time on worker threads, and reports the
+    results in one summary. With close_when_done, the window is closed if every file was saved."""
+    global SAVE_ALL_RUNNING
+    if SAVE_ALL_RUNNING:
+        return
+    files = unsaved_files()
+    if not files:
+        if close_when_done:
+            save_gui_state()
+            root.destroy()
+        else:
+            messagebox.showinfo("Info", "No changes to save.")
+        return
+
+    # Files changed on disk by another program are only overwritten if the user agrees
+    skipped = [json_path for json_path, _, _ in files if changed_on_disk(json_path)]
+    if skipped:
+        names = "\n".join(os.path.basename(json_path) for json_path in skipped[:20])
+        response = messagebox.askyesnocancel(
+            "Files Changed on Disk", f"{len(skipped)} files were changed on disk after they were opened:\n{names}\n\n"
+            "Overwrite them with your changes? Choose No to save only the other files.", icon='warning')
+        if response is None:  # Cancel
+            return
+        if response:
+            skipped = []
+        files = [file for file in files if file[0] not in skipped]
+    errors = [f"{os.path.basename(json_path)}: changed on disk, not saved" for json_path in skipped]
+    if not files:
+        messagebox.showwarning("Save All", "No files were saved.\n\n" + "\n".join(errors[:20]))
+        return
+
+    # The edits are written into the tables here, the workers only encode and write them
+    rows_by_path = {}
+    jobs = []
+    for json_path, rows, encoded_rows in files:
+        rows_by_path[json_path] = (rows, write_back_edits(rows, encoded_rows))
+        jobs.append((json_path, rows.table, encoded_rows))
+    SAVE_ALL_RUNNING = True
+    results = queue.Queue()
+
+    def worker():
         try:
-            edited_text = TREE.item(item)['values'][3]  # Get the value from the translated text column
-            # Convert visible special characters back to actual characters
-            if edited_text is not None:
-                if not isinstance(edited_text, str):
-                    print(f"Problem in row {index}: Found non-string value (type={type(edited_text)}), converting to string. Content={repr(edited_text)}")  # Debug output
-                    edited_text = str(edited_text)
-                edited_text = edited_text.replace('\\n', '\n').replace('\\t', '\t').replace('\\r', '\r')
-            
-            if CURRENT_JSON_DATA and 'rows' in CURRENT_JSON_DATA and len(CURRENT_JSON_DATA['rows']) > index:
-                # Save to last field in row
-                row = CURRENT_JSON_DATA['rows'][index]
-                last_field = list(row.keys())[-1]
-                row['edited_text'] = edited_text
+            save_tables(jobs, lambda json_path, error: results.put((json_path, error)))
         except Exception as e:
-            print(f"Error in row {index}: {str(e)}. Value type={type(edited_text)}, Content={repr(edited_text)}")  # Debug output
-            raise  # Re-raise the exception after logging it
+            results.put((None, e))
+        finally:
+            results.put(None)
 
-    save_json(CURRENT_JSON_PATH, CURRENT_JSON_DATA)
-    UNSAVED_CHANGES = False  # Reset the flag after saving
+    saved = []
+
+    def poll():
+        global SAVE_ALL_RUNNING
+        while True:
+            try:
+                result = results.get_nowait()
+            except queue.Empty:
+                root.after(SCAN_POLL_MS, poll)
+                return
+            if result is None:
+                break
+            json_path, error = result
+            if json_path is None:
+                errors.append(f"Save All: {error}")
+                continue
+            rows, edits = rows_by_path[json_path]
+            if error is None:
+                saved.append((json_path, rows))
+                remember_signature(json_path)  # Before the file watcher reports the write
+                if json_path in SESSION and not SESSION.files[json_path][0].edits:
+                    SESSION.take(json_path)
+            else:
+                errors.append(f"{os.path.basename(json_path)}: {error}")
+                restore_edits(json_path, rows, edits)
+            mark_dirty_file(json_path, json_path in SESSION or (json_path == CURRENT_JSON_PATH and bool(DIRTY_ROWS)))
+            status_label.config(text=f"Saving... {len(saved) + len(errors) - len(skipped)}/{len(jobs)} files")
+
+        SAVE_ALL_RUNNING = False
+        files_saved(saved)
+        status_label.config(text=f"Saved {len(saved)} of {len(jobs) + len(skipped)} files")
+        if close_when_done and not errors:
+            save_gui_state()
+            root.destroy()
+            return
+        message = f"Saved {len(saved)} of {len(jobs) + len(skipped)} files."
+        if errors:
+            messagebox.showwarning("Save All", message + "\n\nCould not save:\n" + "\n".join(errors[:20]))
+        else:
+            messagebox.showinfo("Save All", message)
+
+    status_label.config(text=f"Saving {len(jobs)} files...")
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(SCAN_POLL_MS, poll)
 
 def undo_changes():
-    """Reloads the original JSON data into the table, discarding changes."""
-    global CURRENT_JSON_PATH, CURRENT_JSON_DATA, CURRENT_ORIGINAL_JSON_DATA, UNSAVED_CHANGES
-    if CURRENT_JSON_PATH:
-        # Reload the JSON data
-        CURRENT_JSON_DATA = load_json(CURRENT_JSON_PATH)
-        if CURRENT_JSON_DATA:
-            # Repopulate the table with original and translated data
-            populate_table(TREE, CURRENT_ORIGINAL_JSON_DATA, CURRENT_JSON_DATA)
-            messagebox.showinfo("Info", "Changes undone. Table reloaded from file.")
-            UNSAVED_CHANGES = False  # Reset the flag after undo
-    else:
+    """Discards all unsaved edits of the current file. This is a step of the edit history, so Ctrl+Z
+    brings the edits back. The file is only read again if the table no longer matches it."""
+    global CURRENT_JSON_DATA
+    if not CURRENT_JSON_PATH or CURRENT_JSON_DATA is None:
         messagebox.showinfo("Info", "No file loaded.")
+        return
+    discard_edits()
+    if TABLE_CACHE.get(CURRENT_JSON_PATH) is CURRENT_JSON_DATA:
+        refresh_table_window()
+        messagebox.showinfo("Info", "Changes undone. Press Ctrl+Z to bring them back.")
+    else:
+        # The table holds edits of a failed save, or the file changed on disk
+        remember_signature(CURRENT_JSON_PATH)  # Taken first, so a change while parsing still counts
+        try:
+            data = TABLE_CACHE.load(CURRENT_JSON_PATH)
+        except Exception as e:
+            messagebox.showerror("Error Loading JSON", str(e))
+            return
+        CURRENT_JSON_DATA = data
+        populate_table(TREE, CURRENT_ORIGINAL_JSON_DATA, CURRENT_JSON_DATA)
+        messagebox.showinfo("Info", "Changes undone. Table reloaded from file.")
+
+def edit_history():
+    """Returns the edit history of the current file."""
+    history = EDIT_HISTORIES.get(CURRENT_JSON_PATH)
+    if history is None:
+        history = EDIT_HISTORIES[CURRENT_JSON_PATH] = EditHistory(UNDO_LIMIT)
+    return history
+
+def discard_edits():
+    """Drops the unsaved edits of the table, recording it in the edit history."""
+    edited = [(index, TABLE_ROWS.text(index)) for index in sorted(DIRTY_ROWS)]
+    TABLE_ROWS.edits.clear()
+    DIRTY_ROWS.clear()
+    edit_history().record([(index, text, TABLE_ROWS.text(index)) for index, text in edited])
+    update_dirty_marker()
+
+def set_row_text(index, text):
+    """Sets the shown translated text of a row and updates its tree item if it is rendered.
+    A row edited back to its saved text is no longer dirty."""
+    TABLE_ROWS.set_text(index, text)
+    if text == display_text(CURRENT_JSON_DATA.text(index)):
+        del TABLE_ROWS.edits[index]
+        DIRTY_ROWS.discard(index)
+    else:
+        DIRTY_ROWS.add(index)
+    TABLE_SUGGESTIONS.pop(index, None)
+    update_dirty_marker()
+    if TREE.exists(str(index)):
+        TREE.item(str(index), values=TABLE_ROWS[index], tags=row_tags(index))
+
+def typing_in_widget(event):
+    """Returns whether a key event comes from a widget that edits text itself, like the cell editor."""
+    widget = getattr(event, 'widget', None)
+    try:
+        return widget.winfo_class() in TEXT_INPUT_CLASSES
+    except (AttributeError, tk.TclError):
+        return False
+
+def apply_history_step(changes, action):
+    """Sets the (row index, text) changes of an undo or redo step and shows the last changed row."""
+    if not changes:
+        status_label.config(text=f"Nothing to {action}")
+        return
+    for index, text in changes:
+        if index < len(TABLE_ROWS):
+            set_row_text(index, text)
+    show_table_row(changes[-1][0])
+    status_label.config(text=f"{action.capitalize()}: {len(changes)} {'row' if len(changes) == 1 else 'rows'}")
+
+def undo_edit(event=None):
+    """Reverts the last cell edit of the current file (Ctrl+Z), without reading the file."""
+    if typing_in_widget(event) or CURRENT_JSON_DATA is None:
+        return None
+    apply_history_step(edit_history().undo(), "undo")
+    return "break"
+
+def redo_edit(event=None):
+    """Repeats the last undone cell edit of the current file (Ctrl+Y)."""
+    if typing_in_widget(event) or CURRENT_JSON_DATA is None:
+        return None
+    apply_history_step(edit_history().redo(), "redo")
+    return "break"
+
+def refresh_table_window():
+    """Renders the visible rows again, e.g. after many rows changed at once."""
+    TREE.delete(*TREE.get_children())
+    render_table_window()
+
+def fill_from_memory():
+    """Fills every untranslated row of the table that has a translation memory suggestion."""
+    if not TABLE_SUGGESTIONS:
+        messagebox.showinfo("Info", "No rows can be filled from memory.")
+        return
+    edit_history().record([(index, TABLE_ROWS.text(index), suggestion) for index, suggestion in TABLE_SUGGESTIONS.items()])
+    for index, suggestion in TABLE_SUGGESTIONS.items():
+        TABLE_ROWS.set_text(index, suggestion)
+        DIRTY_ROWS.add(index)
+    count = len(TABLE_SUGGESTIONS)
+    TABLE_SUGGESTIONS.clear()
+    update_dirty_marker()
+    refresh_table_window()
+    status_label.config(text=f"Filled {count} rows from memory")
+
+def propagate_translations():
+    """Copies the saved translations of the current file to every untranslated row with the same
+    original text, in all files of the base dir. Rows in the current file are filled in the table."""
+    if CURRENT_JSON_DATA is None or CURRENT_ORIGINAL_JSON_DATA is None:
+        messagebox.showinfo("Info", "Please open a file that has an original in the second directory.")
+        return
+    if unsaved_files():  # Propagated rows are written to the files on disk
+        messagebox.showinfo("Info", "Please save your changes first (Save All saves every file).")
+        return
+    if not MEMORY or not MEMORY.ready:
+        messagebox.showinfo("Info", "The translation memory is still being built, please try again in a moment.")
+        return
+
+    # Translations of the current file, as saved
+    translations = {}
+    alignment = align_tables(CURRENT_JSON_DATA, CURRENT_ORIGINAL_JSON_DATA)
+    for _, original_text, text in alignment.text_pairs(CURRENT_JSON_DATA, CURRENT_ORIGINAL_JSON_DATA):
+        if original_text and is_translated(original_text, text):
+            translations.setdefault(original_text, text)
+    if not translations:
+        messagebox.showinfo("Info", "The current file has no translated rows.")
+        return
+
+    current_rel_path = os.path.relpath(CURRENT_JSON_PATH, BASE_DIR).replace('\\', '/')
+    targets = MEMORY.untranslated_rows(translations)
+    current_targets = targets.pop(current_rel_path, [])
+    target_rows = sum(len(row_targets) for row_targets in targets.values())
+    if not messagebox.askyesno("Propagate Translations",
+                               f"Copy {len(translations)} translations to {target_rows} untranslated rows in {len(targets)} other files?"):
+        return
+
+    # Identical originals in the current file are filled in the table
+    current_targets = [(row_index, original_text) for row_index, original_text in current_targets if row_index < len(TABLE_ROWS)]
+    edit_history().record([(row_index, TABLE_ROWS.text(row_index), display_text(translations[original_text]))
+                           for row_index, original_text in current_targets])
+    for row_index, original_text in current_targets:
+        TABLE_ROWS.set_text(row_index, display_text(translations[original_text]))
+        DIRTY_ROWS.add(row_index)
+        TABLE_SUGGESTIONS.pop(row_index, None)
+    if current_targets:
+        update_dirty_marker()
+        refresh_table_window()
+
+    results = queue.Queue()
+    base_dir, second_base_dir, game_version, search_index = BASE_DIR, SECOND_BASE_DIR, GAME_VERSION, SEARCH_INDEX
+
+    def worker():
+        changed_rows = changed_files = 0
+        errors = []
+        for rel_path, row_targets in targets.items():
+            json_path = os.path.join(base_dir, *rel_path.split('/'))
+            try:
+                changed = apply_translations(json_path, [(row_index, original_text, translations[original_text])
+                                                         for row_index, original_text in row_targets])
+            except (OSError, ValueError) as e:
+                errors.append(f"{rel_path}: {e}")
+                continue
+            if changed:
+                changed_rows += changed
+                changed_files += 1
+                TABLE_CACHE.invalidate(json_path)
+                search_index.update_file(base_dir, second_base_dir, game_version, json_path)  # Also updates MEMORY
+        results.put((changed_rows, changed_files, errors))
+
+    def poll():
+        try:
+            changed_rows, changed_files, errors = results.get_nowait()
+        except queue.Empty:
+            root.after(SCAN_POLL_MS, poll)
+            return
+        status_label.config(text="")
+        start_progress_scan()  # Only the changed files are compared again
+        message = f"Updated {changed_rows} rows in {changed_files} files."
+        if current_targets:
+            message += f" {len(current_targets)} rows of the current file were filled in the table and still need saving."
+        if errors:
+            messagebox.showwarning("Propagate Translations", message + "\n\nCould not update:\n" + "\n".join(errors[:20]))
+        else:
+            messagebox.showinfo("Propagate Translations", message)
+
+    status_label.config(text="Propagating translations...")
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(SCAN_POLL_MS, poll)
 
 def edit_cell(event):
     """Handles cell editing in the Treeview."""
-    global UNSAVED_CHANGES
-    if not UNSAVED_CHANGES:
-        UNSAVED_CHANGES = True  # Set flag on first edit
     for item in TREE.selection():
         # Identify column and row
         column = TREE.identify_column(event.x)
@@ -484,14 +1442,15 @@ def edit_cell(event):
             # Get bounding box of the cell
             x, y, width, height = TREE.bbox(item, column)
 
-            # Get current value of the cell (already formatted)
-            value = TREE.item(item, 'values')[column_id]
+            # Get current value of the cell (already formatted) from the row store
+            row_index = int(item)
+            value = TABLE_ROWS.text(row_index)
 
             # Create a text widget for multiline editing
             font_size = font_size_var.get()
             font_style = font.Font(family="Calibri", size=font_size)
             # Calculate needed height based on text content
-            text_height = calculate_text_height(value, font_style, width)
+            text_height = calculate_text_height(value, "Calibri", font_size, width)
             height = max(text_height // 20, 4)  # Convert pixels to lines, minimum 4 lines
             
             # Create text widget with proper sizing
@@ -508,37 +1467,34 @@ def edit_cell(event):
             text_widget.place(x=x, y=y, width=max(width, 100), height=max(height*20, 80))  # Minimum reasonable sizes
             text_widget.focus()
 
-            # Show character counts
-            tooltip = show_character_counts(text_widget)
+            # Show character counts, updated while typing
+            tooltip = show_character_counts(text_widget, TABLE_LINE_LIMIT)
+
+            # Show similar originals that are already translated
+            text_widget.update_idletasks()  # The popup goes below the editor, so it needs its size
+            matches_popup = show_fuzzy_matches(text_widget, TABLE_ROWS.original_row_text(row_index))
 
             def save_value(event=None):
                 # Get the text and convert special characters back to visible format
                 new_value = text_widget.get("1.0", "end-1c")
                 formatted_value = new_value.replace('\n', '\\n').replace('\t', '\\t').replace('\r', '\\r')
 
-                # Update the tree values
-                values = list(TREE.item(item, 'values'))
-                values[column_id] = formatted_value  # Store formatted version
-                TREE.item(item, values=values)
-                UNSAVED_CHANGES = True  # Set the flag when a change is made
-
-                # Check line length and apply tag
-                if CURRENT_JSON_PATH:
-                    filename = os.path.basename(CURRENT_JSON_PATH)
-                    if check_line_length(filename, formatted_value):
-                        TREE.item(item, tags=("red",))
-                    else:
-                        TREE.item(item, tags=())  # Remove the tag if it exists
+                # Update the row store, and the tree item if it is still rendered
+                previous_value = TABLE_ROWS.text(row_index)
+                if previous_value != formatted_value:
+                    edit_history().record([(row_index, previous_value, formatted_value)])
+                    set_row_text(row_index, formatted_value)  # Only dirty rows are written back on save
 
                 # Update row height
                 font_size = font_size_var.get()
-                font_style = font.Font(family="Calibri", size=font_size)
-                height = calculate_text_height(formatted_value, font_style, width//7)
+                height = calculate_text_height(formatted_value, "Calibri", font_size, width//7)
                 s = ttk.Style()
                 s.configure('Treeview', rowheight=int(height + 15))
                 
                 text_widget.destroy()
                 tooltip.destroy()
+                if matches_popup:
+                    matches_popup.destroy()
 
             # Bind enter key to save the value
             text_widget.bind('<Return>', save_value)
@@ -551,102 +1507,245 @@ def edit_cell(event):
             def cancel_edit(event):
                 text_widget.destroy()
                 tooltip.destroy()
+                if matches_popup:
+                    matches_popup.destroy()
             text_widget.bind('<Escape>', cancel_edit)
 
-            # Update character counts while typing
-            def update_counts(event=None):
-                try:
-                    # Update the tooltip with new counts
-                    text = text_widget.get("1.0", "end-1c")
-                    # Split by actual newlines (from pressing Enter) and properly escaped \n
-                    lines = []
-                    temp_lines = []
-                    # First split by actual newlines
-                    for part in text.split('\n'):
-                        # Then split by properly escaped \n (not just backslash)
-                        temp_lines.extend(part.split('\\n'))
-                    
-                    # Now properly handle the split parts
-                    for line in temp_lines:
-                        # Only add non-empty lines
-                        if line.strip():
-                            lines.append(line)
-                    
-                    # Clear existing labels and create new ones
-                    for child in tooltip.winfo_children():
-                        child.destroy()
-                    
-                    # Create new labels for each line
-                    for i, line in enumerate(lines):
-                        count = len(line)
-                        label = ttk.Label(tooltip, text=f"Line {i+1}: {count} chars", background="#FFFFE0")
-                        label.pack()
-                except:
-                    pass
-                return True
-            
-            text_widget.bind('<KeyRelease>', update_counts)
+def start_search_indexing():
+    """Brings the full-text search index and the translation memories of the base dir up to date in the background."""
+    global SEARCH_INDEX, MEMORY, FUZZY_INDEX
+    if SEARCH_INDEX:
+        SEARCH_INDEX.cancel()
+        SEARCH_INDEX = None
+    if not BASE_DIR:
+        return
+    FUZZY_INDEX = FuzzyIndex(os.path.join(BASE_DIR, FUZZY_INDEX_FILENAME))
+    MEMORY = TranslationMemory(FUZZY_INDEX)
+    SEARCH_INDEX = SearchIndex(os.path.join(BASE_DIR, SEARCH_INDEX_FILENAME), MEMORY)
+    search_index, fuzzy_index = SEARCH_INDEX, FUZZY_INDEX
+    base_dir, second_base_dir, game_version = BASE_DIR, SECOND_BASE_DIR, GAME_VERSION
+
+    def worker():
+        fuzzy_index.load()  # Only rebuilt by the refresh if the translated originals changed
+        search_index.refresh(base_dir, second_base_dir, game_version)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+def open_table_row(json_path, row_index):
+    """Opens a file in the table with one of its rows selected."""
+    load_table_data(json_path, select_row=row_index)
+
+def open_text_search(event=None):
+    """Opens a window to search the text of every row in the base dir."""
+    if not SEARCH_INDEX:
+        messagebox.showinfo("Info", "Please select a base directory.")
+        return
+
+    window = tk.Toplevel(root)
+    window.title("Find Text")
+    window.geometry("900x500")
+
+    query_frame = ttk.Frame(window, padding=10)
+    query_frame.pack(side=tk.TOP, fill=tk.X)
+    query_var = tk.StringVar()
+    query_entry = ttk.Entry(query_frame, textvariable=query_var)
+    query_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    query_entry.focus()
+    result_label = ttk.Label(query_frame, text="")
+    result_label.pack(side=tk.LEFT, padx=10)
+
+    results_frame = ttk.Frame(window, padding=(10, 0, 10, 10))
+    results_frame.pack(fill=tk.BOTH, expand=True)
+    results_scroll = ttk.Scrollbar(results_frame)
+    results_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+    results_tree = ttk.Treeview(results_frame, columns=("FILE", "ID", "LABEL", "ORIGINAL TEXT", "TRANSLATED TEXT"),
+                                show="headings", yscrollcommand=results_scroll.set)
+    for column, width in (("FILE", 200), ("ID", 50), ("LABEL", 120), ("ORIGINAL TEXT", 250), ("TRANSLATED TEXT", 250)):
+        results_tree.heading(column, text=column)
+        results_tree.column(column, width=width, stretch=column.endswith("TEXT"))
+    results_tree.pack(fill=tk.BOTH, expand=True)
+    results_scroll.config(command=results_tree.yview)
+
+    results = []
+    pending = {}
+
+    def run_search():
+        pending.pop('search', None)
+        if not window.winfo_exists():
+            return
+        if not SEARCH_INDEX.ready:
+            result_label.config(text="Indexing...")
+            pending['search'] = window.after(500, run_search)  # Try again once the index is built
+            return
+        start = time.perf_counter()
+        results[:] = SEARCH_INDEX.search(query_var.get(), SEARCH_RESULT_LIMIT)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        results_tree.delete(*results_tree.get_children())
+        for index, (rel_path, _, row_id, label, original_text, translated_text) in enumerate(results):
+            results_tree.insert("", "end", iid=str(index), values=(
+                rel_path, row_id, label,
+                original_text.replace('\n', '\\n'), translated_text.replace('\n', '\\n')
+            ))
+        more = "+" if len(results) >= SEARCH_RESULT_LIMIT else ""
+        result_label.config(text=f"{len(results)}{more} rows ({elapsed:.0f} ms)")
+
+    def schedule_search(event=None):
+        # Wait for a pause in typing before searching
+        if 'search' in pending:
+            window.after_cancel(pending.pop('search'))
+        pending['search'] = window.after(150, run_search)
+
+    def open_result(event=None):
+        selected_item = results_tree.selection()
+        if selected_item:
+            rel_path, row_index = results[int(selected_item[0])][:2]
+            open_table_row(os.path.join(BASE_DIR, *rel_path.split('/')), row_index)
+
+    query_entry.bind('<KeyRelease>', schedule_search)
+    results_tree.bind("<Double-1>", open_result)
+    results_tree.bind("<Return>", open_result)
+
+def open_stats_window():
+    """Opens a window showing the timings and counters recorded by STATS."""
+    window = tk.Toplevel(root)
+    window.title("Stats")
+    window.geometry("700x450")
+
+    controls = ttk.Frame(window, padding=10)
+    controls.pack(side=tk.TOP, fill=tk.X)
+    recording_var = tk.BooleanVar(value=STATS.enabled)
+
+    def toggle_recording():
+        STATS.enabled = recording_var.get()
+    ttk.Checkbutton(controls, text="Record", variable=recording_var, command=toggle_recording).pack(side=tk.LEFT)
+    ttk.Button(controls, text="Reset", command=STATS.reset).pack(side=tk.LEFT, padx=5)
+
+    def export_trace():
+        filepath = filedialog.asksaveasfilename(parent=window, title="Export Trace", defaultextension=".json",
+                                                initialfile="bdat_trace.json", filetypes=[("Chrome trace", "*.json")])
+        if filepath:
+            try:
+                STATS.export_trace(filepath)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not write the trace: {e}", parent=window)
+    ttk.Button(controls, text="Export Trace", command=export_trace).pack(side=tk.LEFT, padx=5)
+
+    # cProfile capture of the next run of one operation
+    profile_var = tk.StringVar()
+    profile_box = ttk.Combobox(controls, textvariable=profile_var, width=22)
+    profile_box.pack(side=tk.LEFT, padx=(20, 5))
+
+    def profile_next():
+        if profile_var.get():
+            recording_var.set(True)
+            STATS.enabled = True
+            STATS.profile_next(profile_var.get())
+    ttk.Button(controls, text="Profile Next", command=profile_next).pack(side=tk.LEFT)
+
+    def show_profile():
+        if not STATS.last_profile:
+            return
+        name, _, text = STATS.last_profile
+        profile_window = tk.Toplevel(window)
+        profile_window.title(f"Profile: {name}")
+        profile_window.geometry("900x500")
+        profile_text = tk.Text(profile_window, wrap=tk.NONE, font=("Courier", 9))
+        profile_text.insert("1.0", text)
+        profile_text.config(state=tk.DISABLED)
+        profile_text.pack(fill=tk.BOTH, expand=True)
+    ttk.Button(controls, text="Show Profile", command=show_profile).pack(side=tk.LEFT, padx=5)
+    profile_label = ttk.Label(window, text="", padding=(10, 0))
+    profile_label.pack(side=tk.TOP, fill=tk.X)
+
+    stats_frame = ttk.Frame(window, padding=(10, 5, 10, 10))
+    stats_frame.pack(fill=tk.BOTH, expand=True)
+    stats_scroll = ttk.Scrollbar(stats_frame)
+    stats_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+    stats_tree = ttk.Treeview(stats_frame, columns=("OPERATION", "COUNT", "TOTAL MS", "MEAN MS", "MAX MS"),
+                              show="headings", yscrollcommand=stats_scroll.set)
+    for column, width in (("OPERATION", 220), ("COUNT", 80), ("TOTAL MS", 100), ("MEAN MS", 100), ("MAX MS", 100)):
+        stats_tree.heading(column, text=column)
+        stats_tree.column(column, width=width, stretch=column == "OPERATION", anchor=tk.W if column == "OPERATION" else tk.E)
+    stats_tree.pack(fill=tk.BOTH, expand=True)
+    stats_scroll.config(command=stats_tree.yview)
+
+    def refresh():
+        if not window.winfo_exists():
+            return
+        operations, counters = STATS.summary()
+        stats_tree.delete(*stats_tree.get_children())
+        for name, count, total, longest in operations:
+            stats_tree.insert("", "end", values=(name, count, f"{total * 1000:.1f}", f"{total * 1000 / count:.2f}", f"{longest * 1000:.1f}"))
+        for name, value in counters:
+            stats_tree.insert("", "end", values=(name, value, "", "", ""))
+        names = tuple(sorted(operation[0] for operation in operations))
+        if names != tuple(profile_box['values']):
+            profile_box['values'] = names
+        if STATS.profile_name:
+            profile_label.config(text=f"Waiting for the next '{STATS.profile_name}'...")
+        elif STATS.last_profile:
+            profile_label.config(text=f"Profile of '{STATS.last_profile[0]}' saved to {STATS.last_profile[1]}")
+        window.after(1000, refresh)
+
+    refresh()
 
 def mark_folder(status):
-    """Marks the selected folder or file with a background color."""
-    selected_item = file_list.selection()
-    if not selected_item:
+    """Marks the selected folders and files with a background color, in one database transaction."""
+    selected_items = file_list.selection()
+    if not selected_items:
         messagebox.showinfo("Info", "Please select a folder or file.")
         return
 
-    item_text = file_list.item(selected_item, 'text')
-    item_path = file_list.item(selected_item, 'values')[1]
-    item_type = file_list.item(selected_item, 'values')[0]
-
-    if status == "green":
-        color = "green"
-    elif status == "orange":
-        color = "orange"
-    else:
-        color = ""  # Set color to empty string to clear the tag
-
-    # For files, store relative path from the BDAT folder
-    if item_type == "file":
-        # Get the BDAT folder name (parent folder)
-        bdat_folder = os.path.basename(os.path.dirname(os.path.dirname(item_path)))
-        # Get relative path within BDAT folder
-        rel_path = os.path.relpath(item_path, os.path.join(BASE_DIR, bdat_folder))
-        # Convert to forward slashes for consistency
-        key = rel_path.replace('\\', '/')
-    else:
-        # For folders, just use the folder name
-        key = item_text
+    color = status or ""  # An empty tag clears the color
+    entries = []
+    for item in selected_items:
+        item_type, item_path = file_list.item(item, 'values')[:2]
+        # For files, store relative path from the BDAT folder
+        if item_type == "file":
+            key = file_status_key(item_path)
+        else:
+            # For folders, just use the folder name
+            key = file_list.item(item, 'text')
+        if not key:
+            continue
 
-    # Update the status in the dictionary
-    if key:
+        # Update the status in the dictionary
         if status:
             FOLDER_STATUS[key] = status  # Store the status
         else:
             FOLDER_STATUS.pop(key, None)  # Remove the item from the status if clearing
+        file_list.item(item, tags=(color,))
+        entries.append((key, status))
 
-        # Apply the tag to the selected item
-        file_list.item(selected_item, tags=(color,))
-
-        save_config()  # Save the configuration
+    if PROJECT_DB and entries:
+        try:
+            PROJECT_DB.set_statuses(entries)
+        except Exception as e:
+            print(f"Error saving status: {e}")
 
 def load_config():
-    """Loads the folder and file status from the config file."""
-    global FOLDER_STATUS
-    config = configparser.ConfigParser()
-    config_path = os.path.join(BASE_DIR, "translation_config.ini")
+    """Opens the project database of the base dir and loads the folder and file status from it.
+    The translation_config.ini of older versions is migrated into it the first time."""
+    global FOLDER_STATUS, PROJECT_DB
+    if PROJECT_DB:
+        PROJECT_DB.close()
+        PROJECT_DB = None
+    FOLDER_STATUS = {}
+    if not BASE_DIR:
+        return
 
     try:
-        config.read(config_path)
-        if 'FOLDER_STATUS' in config:
-            FOLDER_STATUS = {k: v for k, v in config['FOLDER_STATUS'].items()}
+        db = ProjectDB(BASE_DIR)
+        db.open()
+        FOLDER_STATUS = db.statuses()
+        PROJECT_DB = db
     except Exception as e:
-        print(f"Error loading config: {e}")
+        print(f"Error loading project database: {e}")
 
     # Apply colors to both folders and files based on loaded config
     for item in file_list.get_children():
-        item_text = file_list.item(item, 'text')
         item_path = file_list.item(item, 'values')[1]
-        item_type = file_list.item(item, 'values')[0]
 
         # Get relative path from BASE_DIR
         rel_path = os.path.relpath(item_path, BASE_DIR)
@@ -655,24 +1754,13 @@ def load_config():
         if key in FOLDER_STATUS:
             file_list.item(item, tags=(FOLDER_STATUS[key],))
 
-def save_config():
-    """Saves the folder status to the config file."""
-    config = configparser.ConfigParser()
-    config['FOLDER_STATUS'] = FOLDER_STATUS
-    config_path = os.path.join(BASE_DIR, "translation_config.ini")
-
-    try:
-        with open(config_path, 'w') as configfile:
-            config.write(configfile)
-    except Exception as e:
-        print(f"Error saving config: {e}")
-
 def save_gui_state():
     """Saves the GUI state (base directories) to the config file."""
     config = configparser.ConfigParser()
     config['GUI_STATE'] = {
         'base_dir': BASE_DIR if BASE_DIR else "",
-        'second_base_dir': SECOND_BASE_DIR if SECOND_BASE_DIR else ""
+        'second_base_dir': SECOND_BASE_DIR if SECOND_BASE_DIR else "",
+        'cache_budget_mb': str(CACHE_BUDGET_MB)
     }
     # Add quotes around the values
     for key in config['GUI_STATE']:
@@ -689,7 +1777,7 @@ def save_gui_state():
 
 def load_gui_state():
     """Loads the GUI state (base directories) from the config file."""
-    global BASE_DIR, SECOND_BASE_DIR
+    global BASE_DIR, SECOND_BASE_DIR, CACHE_BUDGET_MB
     config = configparser.ConfigParser()
     script_dir = os.path.dirname(os.path.abspath(__file__))
     script_name = os.path.splitext(os.path.basename(__file__))[0]
@@ -718,6 +1806,13 @@ def load_gui_state():
                 SECOND_BASE_DIR = None
                 print("SECOND_BASE_DIR path does not exist or is invalid")
 
+            # Memory budget of the parsed table cache, in megabytes
+            try:
+                CACHE_BUDGET_MB = int(config['GUI_STATE'].get('cache_budget_mb', str(DEFAULT_CACHE_BUDGET_MB)).strip('"'))
+            except ValueError:
+                CACHE_BUDGET_MB = DEFAULT_CACHE_BUDGET_MB
+            TABLE_CACHE.set_budget(CACHE_BUDGET_MB * 1024 * 1024)
+
     except Exception as e:
         print(f"Error loading GUI state: {e}")
     print(f"Config file path: {config_path}")
@@ -733,7 +1828,7 @@ root.option_add('*TEntry*Font', default_font)
 root.option_add('*TLabel*Font', default_font)
 
 # Call save_gui_state when the window is closed
-root.protocol("WM_DELETE_WINDOW", lambda: [save_gui_state(), root.destroy()])
+root.protocol("WM_DELETE_WINDOW", close_window)
 
 # Ensure we only have one window
 root.withdraw()
@@ -755,6 +1850,17 @@ search_entry = ttk.Entry(search_frame, textvariable=search_var, width=20)
 search_entry.pack(side=tk.LEFT, padx=5)
 search_entry.bind('<KeyRelease>', filter_folders)
 
+find_text_button = ttk.Button(search_frame, text="Find Text", command=open_text_search)
+find_text_button.pack(side=tk.LEFT, padx=5)
+root.bind('<Control-f>', open_text_search)
+root.bind('<Control-z>', undo_edit)
+root.bind('<Control-y>', redo_edit)
+root.bind('<Control-Z>', redo_edit)  # Ctrl+Shift+Z
+root.bind('<Control-S>', save_all_files)  # Ctrl+Shift+S
+
+stats_button = ttk.Button(search_frame, text="Stats", command=open_stats_window)
+stats_button.pack(side=tk.LEFT, padx=5)
+
 def update_font_size(event=None):
     """Updates the font size and repopulates the table."""
     font_size = font_size_var.get()
@@ -763,9 +1869,11 @@ def update_font_size(event=None):
         style = ttk.Style()
         style.configure('DataTable.Treeview', font=('Calibri', font_size))
         
+        # Measurements made with the previous font size are no longer valid
+        calculate_text_height.cache_clear()
+
         # Calculate and set new row height
-        font_style = font.Font(family="Calibri", size=font_size)
-        new_height = calculate_text_height("Sample Text", font_style, 200//7)
+        new_height = calculate_text_height("Sample Text", "Calibri", font_size, 200//7)
         style.configure('DataTable.Treeview', rowheight=int(new_height + 15))
         
         # Apply the style to the treeview
@@ -774,9 +1882,10 @@ def update_font_size(event=None):
         # Force refresh of the treeview
         TREE.update_idletasks()
         
-        # Repopulate table if data is loaded
-        if CURRENT_JSON_PATH and CURRENT_ORIGINAL_JSON_DATA and CURRENT_JSON_DATA:
-            populate_table(TREE, CURRENT_ORIGINAL_JSON_DATA, CURRENT_JSON_DATA)
+        # Render the table again if data is loaded, keeping unsaved edits
+        if CURRENT_JSON_PATH and CURRENT_JSON_DATA is not None:
+            update_row_height(CURRENT_JSON_DATA)
+            refresh_table_window()
 
 
 
@@ -807,12 +1916,14 @@ file_list_frame.pack(fill=tk.BOTH, expand=True)
 file_list_scrollbar = ttk.Scrollbar(file_list_frame)
 file_list_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-file_list = ttk.Treeview(file_list_frame, columns=("Type", "Path"), yscrollcommand=file_list_scrollbar.set, style='FileList.Treeview')
+file_list = ttk.Treeview(file_list_frame, columns=("Type", "Path", "Progress"), yscrollcommand=file_list_scrollbar.set, style='FileList.Treeview')
 file_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 file_list.heading("#0", text="Folders/Files", anchor=tk.W)
 file_list.heading("Type", text="Type")
 file_list.column("Type", width=50, stretch=False)
 file_list.column("Path", width=0, stretch=False)  # Hide the path column
+file_list.heading("Progress", text="Done")
+file_list.column("Progress", width=50, stretch=False, anchor=tk.E)
 file_list.bind("<Double-1>", file_list_select)  # Double-click to load
 
 def open_translated_dir(event=None):
@@ -882,6 +1993,10 @@ file_list.bind("<Button-3>", show_context_menu)
 
 file_list_scrollbar.config(command=file_list.yview)
 
+# Shows the progress of the file list scan
+scan_label = ttk.Label(left_frame, text="")
+scan_label.pack(side=tk.BOTTOM, anchor=tk.W)
+
 # Configure styles with consistent font sizes
 style = ttk.Style()
 style.configure('FileList.Treeview', font=('Calibri', 12, 'bold'))  # Bold style for file list
@@ -903,9 +2018,18 @@ button_frame.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
 save_button = ttk.Button(button_frame, text="Save", command=save_table_data, bootstyle="primary")
 save_button.pack(side=tk.LEFT, padx=5, pady=5)
 
+save_all_button = ttk.Button(button_frame, text="Save All", command=save_all_files, bootstyle="primary")
+save_all_button.pack(side=tk.LEFT, padx=5, pady=5)
+
 undo_button = ttk.Button(button_frame, text="Undo", command=undo_changes, bootstyle="warning")
 undo_button.pack(side=tk.LEFT, padx=5, pady=5)
 
+fill_button = ttk.Button(button_frame, text="Fill From Memory", command=fill_from_memory, bootstyle="info")
+fill_button.pack(side=tk.LEFT, padx=5, pady=5)
+
+propagate_button = ttk.Button(button_frame, text="Propagate", command=propagate_translations, bootstyle="info")
+propagate_button.pack(side=tk.LEFT, padx=5, pady=5)
+
 # Font Size Selection
 font_size_label = ttk.Label(button_frame, text="Font Size:")
 font_size_label.pack(side=tk.LEFT, padx=(10,0))
@@ -924,6 +2048,10 @@ mark_orange_button.pack(side=tk.LEFT, padx=5, pady=5)
 clear_color_button = ttk.Button(button_frame, text="Clear Color", command=lambda: mark_folder(None), bootstyle="secondary")
 clear_color_button.pack(side=tk.LEFT, padx=5, pady=5)
 
+# Shows background activity such as table loading
+status_label = ttk.Label(button_frame, text="")
+status_label.pack(side=tk.LEFT, padx=10)
+
 # --- Treeview Table ---
 style = ttk.Style()
 style.configure('Treeview', rowheight=40)
@@ -945,14 +2073,22 @@ TREE.column("LABEL", width=150, stretch=False)
 TREE.column("ORIGINAL TEXT", width=200, stretch=True, anchor=tk.W)
 TREE.column("TRANSLATED TEXT", width=200, stretch=True, anchor=tk.W)
 
-# Add a Scrollbar to the Treeview Table
-tree_scroll = ttk.Scrollbar(right_frame, orient="vertical", command=TREE.yview)
-TREE.configure(yscrollcommand=tree_scroll.set)
+# Add a Scrollbar to the Treeview Table, driven by the virtualized row window
+tree_scroll = ttk.Scrollbar(right_frame, orient="vertical", command=table_yview)
 tree_scroll.pack(side="right", fill="y")
 TREE.pack(fill=tk.BOTH, expand=True)
 
+# Scroll by moving the row window instead of the Treeview itself
+TREE.bind("<MouseWheel>", table_mousewheel)
+TREE.bind("<Button-4>", table_mousewheel)
+TREE.bind("<Button-5>", table_mousewheel)
+for key in ("<Up>", "<Down>", "<Prior>", "<Next>"):
+    TREE.bind(key, table_key_scroll)
+TREE.bind("<Configure>", lambda e: render_table_window())
+
 # Define tag for red background
 TREE.tag_configure("red", background="red")
+TREE.tag_configure("suggested", background="#D6EAF8")  # Untranslated rows with a translation memory suggestion
 
 # Bind double click to edit cell
 TREE.bind("<Double-1>", edit_cell)
@@ -993,35 +2129,6 @@ def copy_cell_value():
 # Bind right click to show context menu
 TREE.bind("<Button-3>", show_tree_context_menu)
 
-# Load GUI state on startup
-load_gui_state()
-
-# Load config after GUI state is loaded and BASE_DIR is set
-if BASE_DIR:
-    print(f"Loading config from: {os.path.join(BASE_DIR, 'translation_config.ini')}")
-    load_config()
-    # Apply colors to folders based on loaded config
-    for item in file_list.get_children():
-        folder_name = file_list.item(item, 'text')
-        if folder_name in FOLDER_STATUS:
-            file_list.item(item, tags=(FOLDER_STATUS[folder_name],))
-    populate_file_list()  # Ensure the file list is populated with the correct colors
-    
-    # Apply colors to files after populating the file list
-    for item in file_list.get_children():
-        item_type = file_list.item(item, 'values')[0]
-        if item_type == "folder":
-            for child in file_list.get_children(item):
-                child_path = file_list.item(child, 'values')[1]
-                # Get the BDAT folder name (parent folder)
-                bdat_folder = os.path.basename(os.path.dirname(os.path.dirname(child_path)))
-                # Get relative path within BDAT folder
-                rel_path = os.path.relpath(child_path, os.path.join(BASE_DIR, bdat_folder))
-                # Convert to forward slashes for consistency
-                key = rel_path.replace('\\', '/')
-                if key in FOLDER_STATUS:
-                    file_list.item(child, tags=(FOLDER_STATUS[key],))
-
 def delayed_populate():
     # Select the first item in the file list if there are any
     first_item = file_list.get_children()
@@ -1029,6 +2136,23 @@ def delayed_populate():
         file_list.selection_set(first_item[0])
         file_list.event_generate("<<TreeviewSelect>>")  # Trigger the select event
 
-root.after(100, delayed_populate)  # Delay the population
+# Only start up when run as a script, so benchmark.py can import the window and time its functions
+if __name__ == "__main__":
+    # Load GUI state on startup
+    load_gui_state()
+
+    # Load config after GUI state is loaded and BASE_DIR is set
+    if BASE_DIR:
+        print(f"Loading project database from: {os.path.join(BASE_DIR, PROJECT_DB_FILENAME)}")
+        load_config()
+        populate_file_list()  # Colors are applied to folders and files as the scan adds them
+
+    root.after(100, delayed_populate)  # Delay the population
+
+    # Persist search index, manifest and progress updates made by saves
+    atexit.register(lambda: SEARCH_INDEX and SEARCH_INDEX.save())
+    atexit.register(lambda: PROJECT_MANIFEST and PROJECT_MANIFEST.save())
+    atexit.register(lambda: PROGRESS and PROGRESS.save())
+    atexit.register(lambda: PROJECT_DB and PROJECT_DB.close())
 
-root.mainloop()
+    root.mainloop()
@@ -0,0 +1,2159 @@
+"""Tk-free helpers for the BDAT Translation Tool.
+
+Everything in here must work without a display, so it can be used from worker
+threads and processes as well as from the GUI."""
+import configparser
+import base64
+import cProfile
+import ctypes
+import ctypes.util
+import functools
+import hashlib
+import io
+import json
+import os
+import math
+import pstats
+import re
+import select
+import shutil
+import sqlite3
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+DEFAULT_CACHE_BUDGET_MB = 256  # Default memory budget of the parsed table cache
+PARSED_SIZE_FACTOR = 2  # Rough ratio between a parsed Table in memory and the file on disk
+SEARCH_INDEX_FILENAME = "translation_search_index.json"  # Stored in the base dir, next to the project database
+PROJECT_DB_FILENAME = "translation_project.db"  # Project database (see ProjectDB), stored in the base dir
+LEGACY_CONFIG_FILENAME = "translation_config.ini"  # Folder status of older versions, migrated into the project database
+MANIFEST_FILENAME = "translation_manifest.json"  # Cached layout of the base dir, stored in it
+PROGRESS_FILENAME = "translation_progress.json"  # Cached translation progress per file, stored in the base dir
+FUZZY_INDEX_FILENAME = "translation_fuzzy_index.json"  # Trigram index of translated originals, stored in the base dir
+SAVE_WORKERS = 4  # Files written at the same time by save_tables
+GUI_CONFIG_FILENAME = "Xenoblade2-Translation-GUI.ini"  # GUI state, written by the GUI next to the scripts
+
+# --- Instrumentation ---
+STATS_ENV_VAR = "BDAT_STATS"  # Set to 1 to record stats from startup
+TRACE_EVENT_LIMIT = 20000  # Most recent spans kept for the trace export
+
+class _NullSpan:
+    """Context manager handed out by Stats.span while recording is off."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('stats', 'name', 'args', 'start', 'profiler')
+
+    def __init__(self, stats, name, args):
+        self.stats = stats
+        self.name = name
+        self.args = args
+        self.profiler = None
+
+    def __enter__(self):
+        self.profiler = self.stats._start_profile(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter() - self.start
+        if self.profiler:
+            self.stats._finish_profile(self.name, self.profiler)
+        self.stats._record(self.name, self.start, duration, self.args)
+        return False
+
+class Stats:
+    """Timings and counters of the tool's hot paths: loads, scans, table population, text
+    measurements, filters and saves.
+
+    Nothing is recorded while disabled: span() hands out a shared do-nothing context manager
+    and count() returns right away, so the calls can stay in the hot paths. When enabled,
+    every span is added to per-name totals and to a bounded list of recent events, which
+    can be exported as a Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+    profile_next() captures the next run of one operation with cProfile."""
+
+    def __init__(self, enabled=False, event_limit=TRACE_EVENT_LIMIT):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=event_limit)  # (name, start, duration, thread id, args)
+        self.totals = {}  # Name -> [count, total seconds, max seconds]
+        self.counters = Counter()
+        self.thread_names = {}  # Thread id -> name, for the trace
+        self.profile_name = None  # Operation whose next run is profiled
+        self.last_profile = None  # (operation, .prof path, text summary)
+        self._lock = threading.Lock()
+
+    def span(self, name, **args):
+        """Returns a context manager timing one run of the operation name. args are shown in the trace."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def timed(self, name):
+        """Decorator timing every call of a function as the operation name."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, name, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, amount=1):
+        """Adds amount to the counter name."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += amount
+
+    def _record(self, name, start, duration, args):
+        thread = threading.current_thread()
+        with self._lock:
+            total = self.totals.get(name)
+            if total is None:
+                self.totals[name] = [1, duration, duration]
+            else:
+                total[0] += 1
+                total[1] += duration
+                if duration > total[2]:
+                    total[2] = duration
+            self.events.append((name, start, duration, thread.ident, args))
+            self.thread_names[thread.ident] = thread.name
+
+    def reset(self):
+        """Drops everything recorded so far."""
+        with self._lock:
+            self.events.clear()
+            self.totals.clear()
+            self.counters.clear()
+            self.origin = time.perf_counter()
+
+    def summary(self):
+        """Returns (name, runs, total seconds, max seconds) per operation, slowest in total first,
+        and the counters as a sorted list of (name, value)."""
+        with self._lock:
+            operations = [(name, count, total, longest) for name, (count, total, longest) in self.totals.items()]
+            counters = sorted(self.counters.items())
+        operations.sort(key=lambda operation: operation[2], reverse=True)
+        return operations, counters
+
+    def trace(self):
+        """Returns the recorded events in the Chrome trace event format."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+            counters = dict(self.counters)
+        trace_events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                        for tid, name in thread_names.items()]
+        for name, start, duration, tid, args in events:
+            trace_events.append({'name': name, 'cat': 'bdat', 'ph': 'X', 'pid': pid, 'tid': tid,
+                                 'ts': round((start - self.origin) * 1e6, 1), 'dur': round(duration * 1e6, 1),
+                                 'args': {key: str(value) for key, value in args.items()}})
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms', 'otherData': {'counters': counters}}
+
+    def export_trace(self, filepath):
+        """Writes the recorded events to a Chrome trace JSON file."""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.trace(), f)
+
+    def profile_next(self, name):
+        """Profiles the next run of the operation name with cProfile, see last_profile."""
+        with self._lock:
+            self.profile_name = name
+
+    def _start_profile(self, name):
+        if self.profile_name != name:
+            return None
+        with self._lock:
+            if self.profile_name != name:
+                return None  # Another thread got there first
+            self.profile_name = None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None  # Another profiler is already running
+        return profiler
+
+    def _finish_profile(self, name, profiler):
+        profiler.disable()
+        path = os.path.join(tempfile.gettempdir(), f"bdat_profile_{re.sub(r'[^A-Za-z0-9]+', '_', name)}_{int(time.time())}.prof")
+        profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(40)
+        self.last_profile = (name, path, output.getvalue())
+
+STATS = Stats(enabled=os.environ.get(STATS_ENV_VAR) == '1')  # Shared by the GUI and the helpers in here
+
+# --- File Helpers ---
+def file_signature(filepath):
+    """Returns (mtime, size) of a file, used to detect changes on disk."""
+    stat = os.stat(filepath)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def detect_game_version(base_dir):
+    """Detects whether this is Xenoblade 2, 3 or X based on folder structure and bschema files."""
+    # Check for Xenoblade 3 structure (has game/ and evt/ folders)
+    game_path = os.path.join(base_dir, "game")
+    evt_path = os.path.join(base_dir, "evt")
+
+    if os.path.exists(game_path) and os.path.exists(evt_path):
+        return "Xenoblade3"
+
+    # Check for Xenoblade X structure (Modern schema but direct bdat folders)
+    for entry in os.scandir(base_dir):
+        if entry.is_dir():
+            # Check for bschema file
+            bschema_path = os.path.join(entry.path, f"{entry.name}.bschema")
+            if os.path.exists(bschema_path):
+                try:
+                    with open(bschema_path, 'r') as f:
+                        bschema = json.load(f)
+                        if "version" in bschema and isinstance(bschema["version"], dict) and "Legacy" in bschema["version"]:
+                            return "Xenoblade2"
+                        elif "version" in bschema and bschema["version"] == "Modern":
+                            # Check if this is X or 3 by looking for game/evt folders
+                            if not os.path.exists(game_path) and not os.path.exists(evt_path):
+                                return "XenobladeX"
+                            else:
+                                return "Xenoblade3"
+                except:
+                    continue
+    return "Xenoblade2"  # Default to XB2 if unsure
+
+def dir_mtime(path):
+    """Returns the mtime of a directory, which changes whenever an entry is added, removed or renamed.
+    Returns None if it doesn't exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def subdir_signature(path):
+    """Returns a hash of the names of the directories in path, or None if it doesn't exist.
+    Unlike the mtime, it stays the same when files are written next to them, like the manifest,
+    indexes and project database this tool keeps in the base dir."""
+    try:
+        names = sorted(entry.name for entry in os.scandir(path) if entry.is_dir())
+    except OSError:
+        return None
+    return hashlib.blake2b('\0'.join(names).encode('utf-8'), digest_size=16).hexdigest()
+
+def bdat_roots(base_dir, game_version):
+    """Returns (display prefix, path) of the directories holding BDAT folders.
+    Xenoblade 3 keeps its BDAT folders in game/ and evt/, the other games directly in the base dir."""
+    if game_version == "Xenoblade3":
+        return [(f"{top_folder}/", os.path.join(base_dir, top_folder)) for top_folder in ["game", "evt"]]
+    return [("", base_dir)]
+
+def _scandir(path):
+    try:
+        return list(os.scandir(path))
+    except OSError:
+        return []
+
+def iter_bdat_folders(base_dir, game_version):
+    """Yields (display name, path) of every BDAT folder in a base dir."""
+    for prefix, root_path in bdat_roots(base_dir, game_version):
+        for entry in _scandir(root_path):
+            if entry.is_dir():
+                yield prefix + entry.name, entry.path
+
+@STATS.timed("scan base dir")
+def scan_base_dir(base_dir, emit, cancelled, manifest=None, batch_size=25):
+    """Scans a base dir for BDAT folders and their JSON files, meant to run on a worker thread.
+
+    Results are passed to emit as they are found: ('version', game version) first, then
+    ('folders', [(display name, folder path, JSON file names), ...]) batches and finally
+    ('done', display names of all folders). The scan stops early once the cancelled event is set.
+
+    With a loaded ProjectManifest, directories whose mtime didn't change are not listed again
+    and only folders that differ from the manifest are emitted. The base dir itself is compared by
+    the names of its directories (see subdir_signature), since the tool writes its own files there.
+    The manifest is updated and saved at the end of the scan."""
+    base_mtime = subdir_signature(base_dir)
+    cached = manifest is not None and manifest.game_version and manifest.roots.get('.') == base_mtime
+    game_version = manifest.game_version if cached else detect_game_version(base_dir)
+    emit(('version', game_version))
+
+    roots = {'.': base_mtime}
+    folders = OrderedDict()
+    batch = []
+    for prefix, root_path in bdat_roots(base_dir, game_version):
+        root_key = os.path.relpath(root_path, base_dir).replace('\\', '/')
+        root_mtime = roots[root_key] = base_mtime if root_key == '.' else dir_mtime(root_path)
+        if cached and manifest.roots.get(root_key) == root_mtime:
+            # Nothing was added to or removed from this directory, reuse the cached folder list
+            bdat_folders = [(name, os.path.join(base_dir, entry['path'])) for name, entry in manifest.folders.items()
+                            if name.startswith(prefix) and '/' not in name[len(prefix):]]
+        else:
+            bdat_folders = [(prefix + entry.name, entry.path) for entry in _scandir(root_path) if entry.is_dir()]
+
+        for display_name, bdat_folder_path in bdat_folders:
+            if cancelled.is_set():
+                return
+            inner_folder_path = os.path.join(bdat_folder_path, os.path.basename(bdat_folder_path))
+            inner_mtime = dir_mtime(inner_folder_path)
+            entry = manifest.folders.get(display_name) if manifest is not None else None
+            if entry and entry['mtime'] == inner_mtime:
+                folders[display_name] = entry  # Unchanged, the UI already shows it
+                continue
+
+            old_files = entry['files'] if entry else {}
+            files = {}
+            for json_file in list_json_files(bdat_folder_path):
+                try:
+                    signature = list(file_signature(os.path.join(inner_folder_path, json_file)))
+                except OSError:
+                    continue
+                old = old_files.get(json_file)
+                # Keep the row count if the file is unchanged
+                files[json_file] = signature + [old[2] if old and old[:2] == signature else None]
+            folders[display_name] = {
+                'path': os.path.relpath(bdat_folder_path, base_dir).replace('\\', '/'),
+                'mtime': inner_mtime,
+                'files': files
+            }
+            batch.append((display_name, bdat_folder_path, list(files)))
+            STATS.count("folders listed by scan")
+            if len(batch) >= batch_size:
+                emit(('folders', batch))
+                batch = []
+    if batch:
+        emit(('folders', batch))
+
+    if manifest is not None:
+        manifest.update(game_version, roots, folders)
+        manifest.save()
+    emit(('done', list(folders)))
+
+def list_json_files(bdat_folder_path):
+    """Returns the names of the JSON files in a BDAT folder, which live in an inner folder of the same name."""
+    inner_folder_path = os.path.join(bdat_folder_path, os.path.basename(bdat_folder_path))
+    try:
+        return [entry.name for entry in os.scandir(inner_folder_path) if entry.name.endswith(".json")]
+    except OSError:
+        return []
+
+def iter_json_files(base_dir, game_version):
+    """Yields the path of every BDAT JSON file in a base dir, in file list order."""
+    for _, bdat_folder_path in iter_bdat_folders(base_dir, game_version):
+        inner_folder_path = os.path.join(bdat_folder_path, os.path.basename(bdat_folder_path))
+        for json_file in list_json_files(bdat_folder_path):
+            yield os.path.join(inner_folder_path, json_file)
+
+def row_text(row):
+    """Returns the text of a row, which is always its last field."""
+    if not row:
+        return ''
+    text = row[next(reversed(row))]
+    return text if isinstance(text, str) else ('' if text is None else str(text))
+
+def extract_row_texts(json_path, original_path=None):
+    """Returns [id, label, original text, translated text] for every row of a translated file.
+    Original rows are joined with translated rows by $id or label, like the table does."""
+    table = Table.load(json_path)
+    if not original_path:
+        return [[table.value(index, '$id'), table.value(index, 'label'), '', text]
+                for index, text in enumerate(table.iter_texts())]
+    original = Table.load(original_path)
+    return [[table.value(index, '$id'), table.value(index, 'label'), original_text, text]
+            for index, original_text, text in align_rows(table, original).text_pairs(table, original)]
+
+def resolve_original_path(json_path, base_dir, second_base_dir, game_version):
+    """Finds the original language file matching a translated file in the second base dir.
+    Returns None if there is no matching file."""
+    if not second_base_dir:
+        return None
+    # Get relative path from first base dir and build path in second base dir
+    rel_path = os.path.relpath(json_path, base_dir)
+    original_path = os.path.join(second_base_dir, rel_path)
+    if os.path.exists(original_path):
+        return original_path
+    if game_version in ["Xenoblade3", "XenobladeX"]:
+        # For XB3, also check if the file exists in the other top-level folder (game/evt)
+        parts = rel_path.split(os.sep)
+        if len(parts) > 1 and parts[0] in ["game", "evt"]:
+            opposite_folder = "evt" if parts[0] == "game" else "game"
+            opposite_path = os.path.join(second_base_dir, opposite_folder, *parts[1:])
+            if os.path.exists(opposite_path):
+                return opposite_path
+    return None
+
+def saved_gui_dirs():
+    """Returns the (base dir, second base dir) saved by the GUI, with None for unset ones.
+    Lets the command line tools default to the directories the GUI was last used with."""
+    config = configparser.ConfigParser()
+    config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), GUI_CONFIG_FILENAME))
+    base_dir = config.get('GUI_STATE', 'base_dir', fallback="").strip('"')
+    second_base_dir = config.get('GUI_STATE', 'second_base_dir', fallback="").strip('"')
+    return base_dir or None, second_base_dir or None
+
+# --- Line Length ---
+# Characters per line by filename prefix; games without their own table use the Xenoblade 2 one.
+# Override or extend per game in line_limits.ini next to the scripts, one [GameVersion] section of prefix = limit
+GAME_LINE_LIMITS = {
+    "Xenoblade2": {"bf": 55, "campfev": 41, "fev": 41, "kizuna": 41, "qst": 41, "tlk": 41},
+}
+LINE_LIMITS_FILENAME = "line_limits.ini"
+
+_TAG_RE = re.compile(r'\[.*?\]')  # Square bracket tags, which don't count towards the line length
+
+def display_text(text):
+    """Formats a row text the way the table shows it, with special characters made visible."""
+    if not text:
+        return ""
+    return text.replace('\n', '\\n').replace('\t', '\\t').replace('\r', '\\r')
+
+def stored_text(text):
+    """Turns a shown text back into the text stored in the file (the inverse of display_text)."""
+    return text.replace('\\n', '\n').replace('\\t', '\t').replace('\\r', '\r')
+
+def line_lengths(text):
+    """Returns the length of every line of a displayed text, ignoring characters within square brackets."""
+    return [len(_TAG_RE.sub('', line)) if '[' in line else len(line) for line in text.split('\\n')]
+
+def line_length_violations(text, limit):
+    """Returns (line number, length) for every line of a displayed text that exceeds the limit."""
+    if len(text) <= limit:
+        return []  # Splitting and removing tags only make lines shorter
+    return [(line_number, length) for line_number, length in enumerate(line_lengths(text), 1) if length > limit]
+
+def line_too_long(text, limit):
+    """Checks if any line of a displayed text exceeds the limit. A limit of None never does."""
+    if limit is None or not text or len(text) <= limit:
+        return False
+    for line in text.split('\\n'):
+        # Tags are only stripped from lines that are too long with them
+        if len(line) > limit and ('[' not in line or len(_TAG_RE.sub('', line)) > limit):
+            return True
+    return False
+
+class LineLimitRules:
+    """Resolves the character limit per line of a file from a table of filename prefixes.
+    The longest matching prefix wins, and the limit is resolved once per filename."""
+
+    def __init__(self, prefix_limits):
+        self.prefix_limits = dict(prefix_limits)
+        self.prefix_lengths = sorted({len(prefix) for prefix in self.prefix_limits}, reverse=True)
+        self.limits = {}
+
+    def limit(self, filename):
+        """Returns the limit for a filename, or None if the file has no limit."""
+        try:
+            return self.limits[filename]
+        except KeyError:
+            pass
+        limit = None
+        for length in self.prefix_lengths:
+            limit = self.prefix_limits.get(filename[:length])
+            if limit is not None:
+                break
+        self.limits[filename] = limit
+        return limit
+
+def load_line_limit_rules(game_version, config_path=None):
+    """Returns the line limit rules for a game, with the overrides of line_limits.ini applied."""
+    prefix_limits = dict(GAME_LINE_LIMITS.get(game_version) or GAME_LINE_LIMITS["Xenoblade2"])
+    if config_path is None:
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), LINE_LIMITS_FILENAME)
+    config = configparser.ConfigParser()
+    try:
+        config.read(config_path, encoding='utf-8')
+    except configparser.Error as e:
+        print(f"Error reading {config_path}: {e}")
+    if game_version and config.has_section(game_version):
+        for prefix, value in config.items(game_version):
+            try:
+                prefix_limits[prefix] = int(value)
+            except ValueError:
+                print(f"Invalid line limit for {prefix} in {config_path}: {value}")
+    return LineLimitRules(prefix_limits)
+
+def check_line_length(filename, text, rules):
+    """Checks if any line in the text exceeds the character limit based on the filename.
+    Ignores characters within square brackets."""
+    return line_too_long(text, rules.limit(filename))
+
+def check_file_line_lengths(json_path, limit):
+    """Returns a violation dict for every over-limit line of a translated file.
+    Runs in worker processes of the line length checker."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        rows = json.load(f).get('rows', [])
+    violations = []
+    for row in rows:
+        for line_number, length in line_length_violations(display_text(row_text(row)), limit):
+            violations.append({'id': row.get('$id', ''), 'label': row.get('label', ''),
+                               'line': line_number, 'length': length, 'limit': limit})
+    return violations
+
+# --- Table Model ---
+class Table:
+    """A parsed BDAT table stored column by column.
+
+    Each field of the rows is kept in one list per field instead of one dict per row, and
+    integer columns are packed into arrays. The text field, which is always the last field,
+    is resolved once for the whole table. Rows whose fields differ from the first row's are
+    kept as they are. to_json() gives back exactly the document the table was built from."""
+
+    __slots__ = ('header', 'fields', 'positions', 'columns', 'irregular', 'row_count', 'alignment')
+
+    def __init__(self, header, fields=(), columns=None, irregular=None, row_count=0):
+        self.header = header  # Top level of the document, 'rows' holds None; the document itself if it's not a table
+        self.fields = fields
+        self.positions = {field: position for position, field in enumerate(fields)}
+        self.columns = columns  # One list or array per field, None if the document is not a table
+        self.irregular = irregular or {}  # Row index -> row, for rows with other fields than the first row
+        self.row_count = row_count
+        self.alignment = None  # (original Table, RowAlignment), see align_tables
+
+    @classmethod
+    def from_json(cls, data):
+        """Builds a table from a parsed BDAT JSON document."""
+        if not isinstance(data, dict) or not isinstance(data.get('rows'), list):
+            return cls(data)  # Not a table, kept as it is
+        header = dict(data)
+        rows = header['rows']
+        header['rows'] = None
+        fields = tuple(rows[0]) if rows and isinstance(rows[0], dict) else ()
+        placeholder = (None,) * len(fields)
+        irregular = {}
+        values = []
+        for index, row in enumerate(rows):
+            if isinstance(row, dict) and len(row) == len(fields) and tuple(row) == fields:
+                values.append(row.values())
+            else:
+                irregular[index] = row
+                values.append(placeholder)
+        columns = [list(column) for column in zip(*values)] if fields else []
+        for position, column in enumerate(columns[:-1]):  # The text column stays a list, it is edited
+            if all(type(value) is int for value in column):
+                try:
+                    columns[position] = array('q', column)
+                except OverflowError:
+                    pass
+        return cls(header, fields, columns, irregular, len(rows))
+
+    @classmethod
+    def load(cls, filepath):
+        """Parses a BDAT JSON file into a table."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls.from_json(json.load(f))
+
+    def __len__(self):
+        return self.row_count
+
+    def to_json(self):
+        """Returns the JSON document of the table, with the rows as dicts again."""
+        if self.columns is None:
+            return self.header
+        data = dict(self.header)
+        data['rows'] = self.rows()
+        return data
+
+    def row(self, index):
+        """Returns the row at index as a dict."""
+        if index in self.irregular:
+            return self.irregular[index]
+        return {field: column[index] for field, column in zip(self.fields, self.columns)}
+
+    def rows(self, start=0, end=None):
+        """Returns the rows from start to end as dicts."""
+        start, end, _ = slice(start, end).indices(self.row_count)
+        if self.columns:
+            rows = [dict(zip(self.fields, values)) for values in zip(*(column[start:end] for column in self.columns))]
+        else:
+            rows = [{} for _ in range(start, end)]
+        for index, row in self.irregular.items():
+            if start <= index < end:
+                rows[index - start] = row
+        return rows
+
+    def value(self, index, field, default=''):
+        """Returns one field of the row at index, or default if the row has no such field."""
+        if index in self.irregular:
+            row = self.irregular[index]
+            return row.get(field, default) if isinstance(row, dict) else default
+        position = self.positions.get(field)
+        return default if position is None else self.columns[position][index]
+
+    def text(self, index):
+        """Returns the text of the row at index, like row_text does for a row dict."""
+        if index in self.irregular:
+            row = self.irregular[index]
+            return row_text(row) if isinstance(row, dict) else ''
+        text = self.columns[-1][index] if self.columns else ''
+        return text if isinstance(text, str) else ('' if text is None else str(text))
+
+    def iter_texts(self):
+        """Yields the text of every row in order."""
+        if self.irregular or not self.columns:
+            for index in range(self.row_count):
+                yield self.text(index)
+            return
+        for text in self.columns[-1]:
+            yield text if isinstance(text, str) else ('' if text is None else str(text))
+
+    def set_text(self, index, text):
+        """Sets the text (last field) of the row at index."""
+        if index in self.irregular:
+            row = self.irregular[index]
+            if row:
+                row[next(reversed(row))] = text
+        elif self.columns:
+            self.columns[-1][index] = text
+
+# --- Row Alignment ---
+def row_keys(table):
+    """Returns the join key of every row of a table: its $id, or ('label', label) for rows
+    without an id. Rows with neither get None."""
+    id_column = table.columns[table.positions['$id']] if table.columns and '$id' in table.positions else None
+    if id_column is not None and not table.irregular and None not in id_column and '' not in id_column:
+        return id_column  # The common case, every row has an id
+    keys = []
+    for index in range(len(table)):
+        key = table.value(index, '$id', None)
+        if key is None or key == '':
+            label = table.value(index, 'label', None)
+            key = None if label is None or label == '' else ('label', label)
+        keys.append(key)
+    return keys
+
+class RowAlignment:
+    """Pairs the rows of a translated table with the rows of its original table.
+
+    original_indices holds the index of the original row of every translated row, or -1 if
+    there is none. It is None when both tables have the same rows in the same order."""
+
+    __slots__ = ('original_indices', 'missing', 'unmatched')
+
+    def __init__(self, original_indices=None, missing=(), unmatched=()):
+        self.original_indices = original_indices
+        self.missing = missing  # Translated row indices without an original row
+        self.unmatched = unmatched  # Original row indices that no translated row has
+
+    def original_index(self, index):
+        """Returns the index of the original row of the translated row at index, or -1."""
+        if self.original_indices is None:
+            return index
+        return self.original_indices[index]
+
+    def text_pairs(self, table, original):
+        """Yields (index, original text, translated text) for every row of table."""
+        if self.original_indices is None:
+            yield from zip(range(len(table)), original.iter_texts(), table.iter_texts())
+            return
+        for index, (original_index, text) in enumerate(zip(self.original_indices, table.iter_texts())):
+            yield index, original.text(original_index) if original_index >= 0 else '', text
+
+@STATS.timed("align rows")
+def align_rows(table, original):
+    """Joins the rows of a translated table with its original on $id, or on the label for
+    rows without an id, using a hash index of the original rows. Tables without any keys
+    are paired by position. Rows with the same key are paired in order."""
+    keys, original_keys = row_keys(table), row_keys(original)
+    if all(key is None for key in keys) and all(key is None for key in original_keys):
+        keys, original_keys = range(len(keys)), range(len(original_keys))  # Nothing to join on
+    if len(keys) == len(original_keys) and keys == original_keys:
+        return RowAlignment()  # Same rows in the same order
+
+    positions = {}
+    duplicates = {}  # Key -> later original rows with that key
+    for original_index, key in enumerate(original_keys):
+        if key is None:
+            continue
+        if key in positions:
+            duplicates.setdefault(key, []).append(original_index)
+        else:
+            positions[key] = original_index
+
+    original_indices = array('q', bytes(8 * len(keys)))
+    paired = bytearray(len(original_keys))
+    missing = []
+    for index, key in enumerate(keys):
+        original_index = positions.pop(key, -1) if key is not None else -1
+        if original_index < 0 and key in duplicates and duplicates[key]:
+            original_index = duplicates[key].pop(0)
+        original_indices[index] = original_index
+        if original_index < 0:
+            missing.append(index)
+        else:
+            paired[original_index] = 1
+    unmatched = [original_index for original_index, is_paired in enumerate(paired) if not is_paired]
+    if not missing and not unmatched and all(original_index == index for index, original_index in enumerate(original_indices)):
+        return RowAlignment()
+    return RowAlignment(original_indices, missing, unmatched)
+
+def align_tables(table, original):
+    """Returns the RowAlignment of table with original. It is cached on the table, so it lives
+    and dies with the table in the TableCache and is only computed again for another original."""
+    cached = table.alignment
+    if cached is not None and cached[0] is original:
+        return cached[1]
+    alignment = align_rows(table, original)
+    table.alignment = (original, alignment)
+    return alignment
+
+# --- Table Rows ---
+class TableRows:
+    """The rows of the table as shown: (id, label, original text, translated text), with special
+    characters made visible (see display_text).
+
+    Rows are read from the translated and original Table when they are rendered, so nothing is
+    copied per row, and original rows are found through the tables' RowAlignment. Edited texts
+    are kept here in their shown form until they are saved."""
+
+    __slots__ = ('table', 'original', 'alignment', 'edits')
+
+    def __init__(self, table=None, original=None):
+        self.table = table
+        self.original = original
+        self.alignment = align_tables(table, original) if table is not None and original is not None else None
+        self.edits = {}  # Row index -> edited text as shown
+
+    def __len__(self):
+        return len(self.table) if self.table is not None else 0
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return (self.table.value(index, '$id'), self.table.value(index, 'label'),
+                self.original_text(index), self.text(index))
+
+    def original_row_text(self, index):
+        """Returns the original text of the row at index as stored, '' if there is no original row."""
+        if self.alignment is None:
+            return ''
+        original_index = self.alignment.original_index(index)
+        if not 0 <= original_index < len(self.original):
+            return ''
+        return self.original.text(original_index)
+
+    def original_text(self, index):
+        """Returns the shown original text of the row at index, '' if there is no original row."""
+        return display_text(self.original_row_text(index))
+
+    def text(self, index):
+        """Returns the shown translated text of the row at index, including unsaved edits."""
+        text = self.edits.get(index)
+        return text if text is not None else display_text(self.table.text(index))
+
+    def set_text(self, index, text):
+        """Stores an edited text, in its shown form."""
+        self.edits[index] = text
+
+    def text_pairs(self):
+        """Yields (original text, translated text) for every row, as shown."""
+        for index in range(len(self)):
+            yield self.original_text(index), self.text(index)
+
+    def apply_edits(self):
+        """Writes the edited texts into the table. Returns the indices of the rows written."""
+        indices = sorted(index for index in self.edits if index < len(self))
+        for index in indices:
+            self.table.set_text(index, stored_text(self.edits.pop(index)))
+        return indices
+
+# --- Edit History ---
+class EditHistory:
+    """Undo and redo of the cell edits of one table.
+
+    Every step is a tuple of (row index, text before, text after) changes in their shown form,
+    so edits of many rows at once (like Fill From Memory) are undone in one go. Only the last
+    limit steps are kept; undo and redo never look at more than one step."""
+
+    __slots__ = ('undo_steps', 'redo_steps')
+
+    def __init__(self, limit=500):
+        self.undo_steps = deque(maxlen=limit)
+        self.redo_steps = []
+
+    def record(self, changes):
+        """Adds a step of (row index, text before, text after) changes. A new step clears the redo steps."""
+        step = tuple(change for change in changes if change[1] != change[2])
+        if step:
+            self.undo_steps.append(step)
+            self.redo_steps.clear()
+
+    def undo(self):
+        """Returns the (row index, text) changes that revert the last step, or None if there is none."""
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return [(row_index, before) for row_index, before, _ in reversed(step)]
+
+    def redo(self):
+        """Returns the (row index, text) changes that repeat the last undone step, or None if there is none."""
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return [(row_index, after) for row_index, _, after in step]
+
+# --- Edit Session ---
+class EditSession:
+    """Unsaved edits of the files that are not open in the table, kept in memory until they are saved.
+
+    Every file keeps its TableRows, which hold the parsed tables and the edited texts, along with
+    the rows encoded by an earlier save (see write_json_atomic)."""
+
+    __slots__ = ('files',)
+
+    def __init__(self):
+        self.files = {}  # JSON path -> (TableRows, encoded rows or None)
+
+    def __contains__(self, json_path):
+        return json_path in self.files
+
+    def __len__(self):
+        return len(self.files)
+
+    def stash(self, json_path, rows, encoded_rows=None):
+        """Keeps the rows of a file that is being closed, if they have unsaved edits."""
+        if rows.edits:
+            self.files[json_path] = (rows, encoded_rows)
+        else:
+            self.files.pop(json_path, None)
+
+    def take(self, json_path):
+        """Removes the kept rows of a file and returns them as (TableRows, encoded rows), or None."""
+        return self.files.pop(json_path, None)
+
+    def edit_count(self):
+        """Returns the number of edited rows over all files."""
+        return sum(len(rows.edits) for rows, _ in self.files.values())
+
+def save_tables(jobs, emit, max_workers=SAVE_WORKERS):
+    """Writes (path, table, row chunks) jobs at the same time with write_json_atomic.
+    emit(path, error) is called from this thread as each file is done, error is None if it was written."""
+    with STATS.span("save tables", files=len(jobs)), ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(write_json_atomic, path, table, row_chunks): path for path, table, row_chunks in jobs}
+        for future in as_completed(futures):
+            emit(futures[future], future.exception())
+
+# --- JSON Writing ---
+# Encodes flat rows with the C encoder; the separators reproduce json.dump's indent=2 layout
+_ROW_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',\n      ', ': '))
+
+def _encode_nested(value, indent):
+    """Encodes a value exactly like json.dump(indent=2) does when it is nested `indent` spaces deep."""
+    return json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n' + ' ' * indent)
+
+def encode_row(row):
+    """Encodes one table row as it appears in the 'rows' list of a file saved with indent=2."""
+    if not row or not isinstance(row, dict):
+        return _encode_nested(row, 4)  # Empty, or not an object at all (e.g. a list row)
+    for value in row.values():
+        if isinstance(value, (dict, list)):
+            return _encode_nested(row, 4)  # Nested values need the pure-Python indenting encoder
+    return '{\n      ' + _ROW_ENCODER.encode(row)[1:-1] + '\n    }'
+
+def encode_rows(rows):
+    """Encodes a whole 'rows' list, returning one encode_row chunk per row.
+    Flat rows are encoded in a single call to the C encoder and split afterwards."""
+    for row in rows:
+        if not row or not isinstance(row, dict):
+            return [encode_row(row) for row in rows]
+        for value in row.values():
+            if isinstance(value, (dict, list)):
+                return [encode_row(row) for row in rows]
+    # Encoded strings never contain raw newlines and flat rows never contain '{', so the
+    # separator between two rows is the only place where '},\n      {' can appear
+    bodies = _ROW_ENCODER.encode(rows)[2:-2].split('},\n      {')
+    return ['{\n      ' + body + '\n    }' for body in bodies]
+
+def dump_json_streaming(data, f, row_chunks=None):
+    """Writes data, a JSON document or a Table, to f with the exact output of
+    json.dump(data, f, ensure_ascii=False, indent=2), one block of rows at a time.
+
+    row_chunks, if given, is a list parallel to the rows holding encoded rows. Entries set
+    to None are encoded and stored back, so later saves only encode the rows that changed.
+    It must have the same length as the rows."""
+    table = None
+    if isinstance(data, Table):
+        if data.columns is not None:
+            table = data
+        data = data.header
+
+    if not isinstance(data, dict) or not data:
+        f.write(json.dumps(data, ensure_ascii=False, indent=2))
+        return
+
+    f.write('{')
+    first = True
+    for key, value in data.items():
+        f.write('\n  ' if first else ',\n  ')
+        first = False
+        f.write(json.dumps(key, ensure_ascii=False) + ': ')
+        if key == 'rows' and table is not None:
+            row_count, get_row, get_rows = len(table), table.row, table.rows
+        elif key == 'rows' and isinstance(value, list):
+            row_count, get_row, get_rows = len(value), value.__getitem__, lambda start, end: value[start:end]
+        else:
+            row_count = 0
+        if not row_count:
+            f.write(_encode_nested([] if table is not None and key == 'rows' else value, 2))
+            continue
+
+        if row_chunks is None or row_chunks.count(None) > len(row_chunks) // 2:
+            # Mostly unencoded, encoding blocks of rows in one go is cheaper
+            chunks = []
+            for start in range(0, row_count, 1000):
+                chunks.extend(encode_rows(get_rows(start, start + 1000)))
+            if row_chunks is not None:
+                row_chunks[:] = chunks
+        else:
+            chunks = row_chunks
+            for index, chunk in enumerate(chunks):
+                if chunk is None:
+                    chunks[index] = encode_row(get_row(index))
+
+        f.write('[\n    ')
+        for start in range(0, len(chunks), 1000):  # Stream in blocks of rows
+            if start:
+                f.write(',\n    ')
+            f.write(',\n    '.join(chunks[start:start + 1000]))
+        f.write('\n  ]')
+    f.write('\n}')
+
+@STATS.timed("save json")
+def write_json_atomic(filepath, data, row_chunks=None):
+    """Saves data as indented JSON without ever leaving a truncated file behind.
+
+    The JSON is streamed to a temporary file in the same directory, flushed to disk and
+    then swapped in place of the target with an atomic rename."""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filepath) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            dump_json_streaming(data, f, row_chunks)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filepath):
+            shutil.copymode(filepath, temp_path)  # mkstemp creates the file as private
+        os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename itself durable where directories can be synced
+    if hasattr(os, 'O_DIRECTORY'):
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+# --- Project Manifest ---
+class ProjectManifest:
+    """Cached layout of a base dir, so the file list can be shown right away at startup.
+
+    Records the detected game version, the BDAT folders with their JSON files, the mtime of
+    every directory (to tell cheaply whether its listing changed) and the mtime, size and row
+    count of every file. Row counts are filled in as files are opened."""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, MANIFEST_FILENAME)
+        self.game_version = None
+        self.roots = {}  # Directory holding BDAT folders, relative to the base dir -> mtime ('.' -> subdir_signature)
+        self.folders = OrderedDict()  # Display name -> {'path', 'mtime', 'files': {name: [mtime, size, rows]}}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def load(self):
+        """Reads the manifest from the base dir. Returns False if there is none."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != 1:
+            return False
+        self.game_version = data.get('game_version')
+        self.roots = data.get('roots', {})
+        self.folders = OrderedDict((folder.pop('name'), folder) for folder in data.get('folders', []))
+        return True
+
+    def save(self):
+        """Writes the manifest if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                'version': 1,
+                'game_version': self.game_version,
+                'roots': dict(self.roots),
+                'folders': [dict(entry, name=name) for name, entry in self.folders.items()]
+            }
+            self._dirty = False
+        try:
+            write_json_atomic(self.path, data)
+        except OSError as e:
+            print(f"Error saving manifest: {e}")
+
+    def cached_folders(self):
+        """Returns the cached folders as (display name, folder path, JSON file names) tuples."""
+        with self._lock:
+            return [(name, os.path.join(self.base_dir, entry['path']), list(entry['files']))
+                    for name, entry in self.folders.items()]
+
+    def update(self, game_version, roots, folders):
+        """Replaces the cached layout with the result of a scan."""
+        with self._lock:
+            self.game_version = game_version
+            self.roots = roots
+            self.folders = folders
+            self._dirty = True
+
+    def set_row_count(self, json_path, row_count):
+        """Records the row count of a file, along with its current mtime and size."""
+        inner_folder_path = os.path.dirname(json_path)
+        rel_folder = os.path.relpath(os.path.dirname(inner_folder_path), self.base_dir).replace('\\', '/')
+        try:
+            signature = list(file_signature(json_path))
+        except OSError:
+            return
+        with self._lock:
+            for entry in self.folders.values():
+                if entry['path'] == rel_folder:
+                    entry['files'][os.path.basename(json_path)] = signature + [row_count]
+                    self._dirty = True
+                    return
+
+# --- Project Database ---
+_PROJECT_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS status (
+    key TEXT PRIMARY KEY,  -- Folder display name, or file path relative to its BDAT folder (see the GUI's file_status_key)
+    status TEXT NOT NULL
+);
+"""
+
+class ProjectDB:
+    """Project database of a base dir: a SQLite file in WAL mode holding the color status of folders and files.
+
+    Status changes are written in one transaction however many items are marked, instead of rewriting
+    a whole INI file per click. The status kept in translation_config.ini by older versions is copied
+    over the first time the database is opened; the INI is left as it was."""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, PROJECT_DB_FILENAME)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Opens or creates the database, migrating translation_config.ini once. Raises sqlite3.Error."""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # Durable once checkpointed, commits don't wait for the disk
+            with conn:
+                conn.executescript(_PROJECT_DB_SCHEMA)
+                conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', '1')")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._conn = conn
+        if self.meta('ini_migrated') is None:
+            self.migrate_ini(os.path.join(self.base_dir, LEGACY_CONFIG_FILENAME))
+
+    def close(self):
+        """Closes the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def migrate_ini(self, config_path):
+        """Copies the FOLDER_STATUS section of an INI file into the database, keeping newer statuses."""
+        config = configparser.ConfigParser(interpolation=None)
+        try:
+            config.read(config_path, encoding='utf-8')
+        except configparser.Error as e:
+            print(f"Error reading {config_path}: {e}")
+        entries = []
+        if config.has_section('FOLDER_STATUS'):
+            for key, status in config.items('FOLDER_STATUS'):
+                if status:
+                    entries.append((key, status))
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO status VALUES (?, ?)", entries)
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('ini_migrated', ?)", (str(len(entries)),))
+
+    def meta(self, key, default=None):
+        """Returns a metadata value, e.g. whether the INI was migrated."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def statuses(self):
+        """Returns {status key: color} of every marked folder and file."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, status FROM status"))
+
+    def set_statuses(self, entries):
+        """Marks (key, color) entries in one transaction; a color of None clears it."""
+        marked = [(key, status) for key, status in entries if status]
+        cleared = [(key,) for key, status in entries if not status]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO status VALUES (?, ?)", marked)
+            self._conn.executemany("DELETE FROM status WHERE key = ?", cleared)
+
+# --- Translation Progress ---
+def is_translated(original_text, text):
+    """A row is translated if its text is non-empty and differs from the original."""
+    return bool(text) and text != original_text
+
+def count_translated(text_pairs):
+    """Counts (translated rows, rows) over (original text, translated text) pairs.
+    Rows that are empty in both are skipped."""
+    translated = total = 0
+    for original_text, text in text_pairs:
+        if not original_text and not text:
+            continue
+        total += 1
+        if is_translated(original_text, text):
+            translated += 1
+    return translated, total
+
+def file_progress(json_path, original_path):
+    """Returns (translated rows, rows) of a translated file compared with its original."""
+    rows = extract_row_texts(json_path, original_path)
+    return count_translated((original_text, text) for _, _, original_text, text in rows)
+
+def folder_progress(jobs):
+    """Computes the progress of the (JSON path, original path) jobs of one folder.
+    Returns (JSON path, translated rows, rows) tuples; unreadable files are left out."""
+    results = []
+    for json_path, original_path in jobs:
+        try:
+            results.append((json_path,) + file_progress(json_path, original_path))
+        except (OSError, ValueError):
+            continue
+    return results
+
+def progress_worker(stdin, stdout, max_workers=None):
+    """Reads folders of jobs as JSON from stdin and writes one JSON line of results per folder.
+    Runs in its own process (see run_progress), so the process pool never has to import the GUI."""
+    folders = json.load(stdin)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for results in executor.map(folder_progress, folders):
+            stdout.write(json.dumps(results, ensure_ascii=False) + '\n')
+            stdout.flush()
+
+def run_progress(folders, emit, cancelled):
+    """Computes progress for folders of (JSON path, original path) jobs in parallel, meant to run on a
+    worker thread. Results are passed to emit per folder as lists of (JSON path, translated rows, rows)."""
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'progress'],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, encoding='utf-8',
+                               creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))  # No console window on Windows
+    try:
+        json.dump(folders, process.stdin)
+        process.stdin.close()
+        for line in process.stdout:
+            if cancelled.is_set():
+                break
+            emit([tuple(result) for result in json.loads(line)])
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+class TranslationProgress:
+    """Per-file translation progress of a base dir, cached by the mtime and size of the translated
+    and the original file so only changed files are compared again."""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, PROGRESS_FILENAME)
+        self.files = {}  # rel path -> [signature of both files, translated rows, rows]
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def load(self):
+        """Reads the cached progress from the base dir."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.files = {}
+
+    def save(self):
+        """Writes the cached progress if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'files': dict(self.files)}
+            self._dirty = False
+        try:
+            write_json_atomic(self.path, data)
+        except OSError as e:
+            print(f"Error saving progress: {e}")
+
+    def _rel_path(self, json_path):
+        return os.path.relpath(json_path, self.base_dir).replace('\\', '/')
+
+    @staticmethod
+    def _signature(json_path, original_path):
+        signature = list(file_signature(json_path))
+        if original_path:
+            signature.extend(file_signature(original_path))
+        return signature
+
+    def get(self, json_path, original_path):
+        """Returns the cached (translated rows, rows) of a file, or None if it changed since."""
+        try:
+            signature = self._signature(json_path, original_path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self.files.get(self._rel_path(json_path))
+        if entry and entry[0] == signature:
+            return entry[1], entry[2]
+        return None
+
+    def set(self, json_path, original_path, translated, total):
+        """Records the progress of a file, along with the current mtime and size of both files."""
+        try:
+            signature = self._signature(json_path, original_path)
+        except OSError:
+            return
+        with self._lock:
+            self.files[self._rel_path(json_path)] = [signature, translated, total]
+            self._dirty = True
+
+# --- Parsed Table Cache ---
+class TableCache:
+    """Thread-safe LRU cache of parsed BDAT tables (see Table).
+
+    Entries are keyed by path and validated against the file's mtime and size, so a
+    file changed on disk is parsed again. The memory used by a table is estimated from
+    its file size, and the least recently used tables are dropped once the estimate
+    exceeds the budget."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._entries = OrderedDict()  # path -> (signature, data, cost)
+        self._lock = threading.Lock()
+        self._loading = {}  # path -> Event set once the thread parsing it is done
+
+    @staticmethod
+    def _key(filepath):
+        return os.path.normcase(os.path.abspath(filepath))
+
+    def load(self, filepath):
+        """Returns the Table of a file, reading it from disk only when it is not cached."""
+        key = self._key(filepath)
+        while True:
+            signature = file_signature(filepath)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] == signature:
+                    self._entries.move_to_end(key)
+                    STATS.count("table cache hits")
+                    return entry[1]
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # Another thread (e.g. the prefetcher) is already parsing this file, wait for it
+            loading.wait()
+
+        # Parse outside the lock so other threads can keep using the cache
+        try:
+            with STATS.span("load table", file=os.path.basename(filepath)):
+                data = Table.load(filepath)
+            self.store(filepath, data, signature)
+            return data
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set()
+
+    def get(self, filepath):
+        """Returns the cached Table of a file if it is cached and unchanged on disk, else None."""
+        key = self._key(filepath)
+        try:
+            signature = file_signature(filepath)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                self._entries.move_to_end(key)
+                return entry[1]
+        return None
+
+    def store(self, filepath, data, signature=None):
+        """Adds a Table to the cache, e.g. right after it was saved."""
+        key = self._key(filepath)
+        if signature is None:
+            signature = file_signature(filepath)
+        cost = signature[1] * PARSED_SIZE_FACTOR
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self.used_bytes -= old[2]
+            if cost > self.budget_bytes:
+                return  # Too big to ever fit, don't flush the whole cache for it
+            self._entries[key] = (signature, data, cost)
+            self.used_bytes += cost
+            self._evict()
+
+    def invalidate_changed(self, filepath):
+        """Drops a file from the cache if it changed on disk since it was parsed.
+        Returns whether it was dropped."""
+        try:
+            signature = file_signature(filepath)
+        except OSError:
+            signature = None
+        with self._lock:
+            key = self._key(filepath)
+            entry = self._entries.get(key)
+            if entry is None or entry[0] == signature:
+                return False
+            del self._entries[key]
+            self.used_bytes -= entry[2]
+            return True
+
+    def invalidate(self, filepath):
+        """Drops a file from the cache."""
+        with self._lock:
+            old = self._entries.pop(self._key(filepath), None)
+            if old:
+                self.used_bytes -= old[2]
+
+    def clear(self):
+        """Drops all cached tables."""
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def set_budget(self, budget_bytes):
+        """Changes the memory budget, dropping tables that no longer fit."""
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._evict()
+
+    def _evict(self):
+        while self._entries and self.used_bytes > self.budget_bytes:
+            _, (_, _, cost) = self._entries.popitem(last=False)
+            self.used_bytes -= cost
+
+# --- Prefetching ---
+class Prefetcher:
+    """Warms a TableCache with the files the user is likely to open next, and their row alignments.
+
+    Files are parsed one at a time on a single background thread, with a short pause
+    before each one so foreground loads and the UI get the CPU first. Scheduling new
+    work cancels whatever was still pending."""
+
+    def __init__(self, cache, delay=0.05):
+        self.cache = cache
+        self.delay = delay  # Pause before each prefetched file, in seconds
+        self._pending = []
+        self._generation = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, paths, resolve_original=None):
+        """Replaces the pending work with paths. resolve_original, if given, maps a
+        path to its original language counterpart, which is prefetched as well."""
+        with self._condition:
+            self._generation += 1
+            self._pending = [(path, resolve_original) for path in paths]
+            self._condition.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                self._thread.start()
+
+    def cancel(self):
+        """Drops all pending prefetch work."""
+        self.schedule([])
+
+    def _is_current(self, generation):
+        with self._condition:
+            return generation == self._generation
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                path, resolve_original = self._pending.pop(0)
+                generation = self._generation
+
+            paths = [path]
+            if resolve_original:
+                try:
+                    original_path = resolve_original(path)
+                except Exception:
+                    original_path = None
+                if original_path:
+                    paths.append(original_path)
+
+            tables = []
+            for prefetch_path in paths:
+                time.sleep(self.delay)  # Yield to the UI and foreground loads
+                if not self._is_current(generation):
+                    break  # Cancelled
+                try:
+                    table = self.cache.get(prefetch_path)
+                    if table is None:  # A cached table without rows is still cached
+                        table = self.cache.load(prefetch_path)
+                    tables.append(table)
+                except Exception:
+                    pass  # Prefetching is best effort, real loads report errors
+            if len(tables) == 2 and self._is_current(generation):
+                align_tables(*tables)  # Cached on the table for when it is opened
+
+# --- File Watching ---
+WATCH_POLL_SECONDS = 2.0  # How often the polling watcher compares file signatures
+WATCH_SETTLE_SECONDS = 0.3  # Quiet time before a burst of changes is reported
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x1000000
+_IN_ISDIR = 0x40000000
+_IN_LISTING = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO  # Events that change a directory listing
+_IN_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_LISTING | _IN_DELETE_SELF | _IN_ONLYDIR
+_IN_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+def is_bdat_json(name):
+    """Returns whether a file name is a BDAT JSON file, rather than e.g. the temp file of an atomic write."""
+    return name.endswith('.json') and not name.startswith('.')
+
+class _Inotify:
+    """Minimal inotify binding through ctypes. Raises OSError if inotify is not available."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') if sys.platform.startswith('linux') else None
+        if not libc_name:
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read(self, timeout):
+        """Returns the (wd, mask, name) events that arrive within timeout seconds."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            buffer = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = _IN_EVENT.unpack_from(buffer, offset)
+            offset += _IN_EVENT.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class FileWatcher:
+    """Watches the BDAT folders of base dirs for JSON files changed by other programs, meant to run
+    on a worker thread.
+
+    Uses inotify on Linux, with a watch on every BDAT root, BDAT folder and inner folder. Elsewhere,
+    or once inotify runs out of watches, the signatures of all JSON files are compared every
+    poll_seconds instead. Changes are passed to emit once they settled: ('files', changed JSON paths)
+    for files that were written, added or removed, ('folders', BDAT folder paths) for folders whose
+    file list changed or that were added or removed, and ('rescan', None) if changes were lost.
+    ('mode', 'inotify' or 'polling') is emitted first."""
+
+    def __init__(self, base_dirs, game_version, emit, poll_seconds=WATCH_POLL_SECONDS, settle_seconds=WATCH_SETTLE_SECONDS):
+        self.base_dirs = [base_dir for base_dir in base_dirs if base_dir]
+        self.game_version = game_version
+        self.emit = emit
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        self.mode = None
+
+    def run(self, cancelled):
+        """Watches until the cancelled event is set."""
+        try:
+            inotify = _Inotify()
+        except OSError:
+            inotify = None
+        if inotify is not None:
+            try:
+                if self._watch_inotify(inotify, cancelled):
+                    return
+            finally:
+                inotify.close()
+        self._watch_polling(cancelled)
+
+    def _roots(self):
+        return [root_path for base_dir in self.base_dirs for _, root_path in bdat_roots(base_dir, self.game_version)]
+
+    # Inotify
+    def _add_folder_watches(self, inotify, watches, bdat_folder_path):
+        inner_folder_path = os.path.join(bdat_folder_path, os.path.basename(bdat_folder_path))
+        for path, level in ((bdat_folder_path, 1), (inner_folder_path, 2)):
+            try:
+                watches[inotify.add_watch(path, _IN_MASK)] = (path, level)
+            except FileNotFoundError:
+                pass  # The inner folder is watched once its BDAT folder reports it
+            except NotADirectoryError:
+                return
+
+    def _watch_inotify(self, inotify, cancelled):
+        """Returns False if inotify ran out of watches and polling has to take over."""
+        watches = {}  # wd -> (directory path, level): 0 for BDAT roots, 1 for BDAT folders, 2 for inner folders
+        try:
+            for root_path in self._roots():
+                try:
+                    watches[inotify.add_watch(root_path, _IN_MASK)] = (root_path, 0)
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+                for entry in _scandir(root_path):
+                    if entry.is_dir():
+                        self._add_folder_watches(inotify, watches, entry.path)
+        except OSError:
+            return False  # Out of watches (ENOSPC) or not permitted
+        self.mode = 'inotify'
+        self.emit(('mode', self.mode))
+
+        files, folders = set(), set()
+        while not cancelled.is_set():
+            events = inotify.read(self.settle_seconds if files or folders else 0.5)
+            if not events:
+                if files or folders:
+                    self._emit_changes(files, folders)
+                    files, folders = set(), set()
+                continue
+            for wd, mask, name in events:
+                if mask & _IN_Q_OVERFLOW:
+                    files, folders = set(), set()
+                    self.emit(('rescan', None))
+                    continue
+                watch = watches.get(wd)
+                if watch is None:
+                    continue
+                if mask & _IN_IGNORED:
+                    del watches[wd]  # The directory was removed
+                    continue
+                path, level = watch
+                if level == 2:
+                    if is_bdat_json(name):
+                        files.add(os.path.join(path, name))
+                        if mask & _IN_LISTING:
+                            folders.add(os.path.dirname(path))
+                elif mask & _IN_ISDIR and mask & _IN_LISTING:
+                    if level == 0:
+                        folder_path = os.path.join(path, name)
+                        if mask & (_IN_CREATE | _IN_MOVED_TO):
+                            try:
+                                self._add_folder_watches(inotify, watches, folder_path)
+                            except OSError:
+                                return False
+                        folders.add(folder_path)
+                    elif name == os.path.basename(path):
+                        if mask & (_IN_CREATE | _IN_MOVED_TO):
+                            inner_folder_path = os.path.join(path, name)
+                            try:
+                                watches[inotify.add_watch(inner_folder_path, _IN_MASK)] = (inner_folder_path, 2)
+                            except FileNotFoundError:
+                                pass
+                            except OSError:
+                                return False
+                        folders.add(path)
+        return True
+
+    def _emit_changes(self, files, folders):
+        with STATS.span("file changes", files=len(files), folders=len(folders)):
+            if folders:
+                self.emit(('folders', sorted(folders)))
+            if files:
+                self.emit(('files', sorted(files)))
+
+    # Polling
+    def _snapshot(self):
+        """Returns {BDAT folder path: {JSON file name: signature}} of all watched folders."""
+        snapshot = {}
+        for root_path in self._roots():
+            for entry in _scandir(root_path):
+                if not entry.is_dir():
+                    continue
+                files = snapshot[entry.path] = {}
+                for file_entry in _scandir(os.path.join(entry.path, entry.name)):
+                    if is_bdat_json(file_entry.name):
+                        try:
+                            stat = file_entry.stat()
+                        except OSError:
+                            continue
+                        files[file_entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _watch_polling(self, cancelled):
+        self.mode = 'polling'
+        self.emit(('mode', self.mode))
+        snapshot = self._snapshot()
+        while not cancelled.wait(self.poll_seconds):
+            new_snapshot = self._snapshot()
+            files, folders = set(), set()
+            for folder_path in snapshot.keys() | new_snapshot.keys():
+                old_files, new_files = snapshot.get(folder_path), new_snapshot.get(folder_path)
+                if old_files == new_files:
+                    continue
+                old_files, new_files = old_files or {}, new_files or {}
+                if old_files.keys() != new_files.keys() or folder_path not in snapshot or folder_path not in new_snapshot:
+                    folders.add(folder_path)
+                inner_folder_path = os.path.join(folder_path, os.path.basename(folder_path))
+                for name in old_files.keys() | new_files.keys():
+                    if old_files.get(name) != new_files.get(name):
+                        files.add(os.path.join(inner_folder_path, name))
+            snapshot = new_snapshot
+            if files or folders:
+                self._emit_changes(files, folders)
+
+# --- Translation Memory ---
+class TranslationMemory:
+    """Exact-match translation memory over the rows of a project.
+
+    Maps every original text to the translations it already has (with how often each is used)
+    and to the rows it occurs in, both in dicts keyed by the original text. Fed with the rows
+    extracted by SearchIndex, as {rel path: [[id, label, original, translated], ...]}."""
+
+    def __init__(self, fuzzy=None):
+        self.fuzzy = fuzzy  # FuzzyIndex over the originals that have a translation
+        self.ready = False  # True once the first build finished
+        self._lock = threading.Lock()
+        self._files = {}  # rel path -> rows
+        self._translations = {}  # original text -> {translation: count}
+        self._occurrences = {}  # original text -> {(rel path, row index), ...}
+
+    def build(self, files):
+        """Replaces the memory with the rows of every file."""
+        translations = {}
+        occurrences = {}
+        for rel_path, rows in files.items():
+            self._add(rel_path, rows, translations, occurrences)
+        with self._lock:
+            self._files = dict(files)
+            self._translations = translations
+            self._occurrences = occurrences
+        self.ready = True
+        if self.fuzzy is not None:
+            self.fuzzy.update(translations)
+
+    def update_file(self, rel_path, rows):
+        """Replaces the rows of one file, e.g. after it was saved."""
+        with self._lock:
+            old_rows = self._files.get(rel_path)
+            if old_rows:
+                self._remove(rel_path, old_rows)
+            self._add(rel_path, rows, self._translations, self._occurrences)
+            self._files[rel_path] = rows
+            # Originals whose last translation was cleared are dropped from the fuzzy index
+            cleared = {original_text for _, _, original_text, _ in old_rows or ()
+                       if original_text and original_text not in self._translations}
+        if self.fuzzy is not None:
+            for original_text in cleared:
+                self.fuzzy.remove(original_text)
+            for _, _, original_text, text in rows:
+                if original_text and is_translated(original_text, text):
+                    self.fuzzy.add(original_text)
+
+    @staticmethod
+    def _add(rel_path, rows, translations, occurrences):
+        for row_index, (_, _, original_text, text) in enumerate(rows):
+            if not original_text:
+                continue
+            row_occurrences = occurrences.get(original_text)
+            if row_occurrences is None:
+                row_occurrences = occurrences[original_text] = set()
+            row_occurrences.add((rel_path, row_index))
+            if is_translated(original_text, text):
+                counts = translations.get(original_text)
+                if counts is None:
+                    counts = translations[original_text] = {}
+                counts[text] = counts.get(text, 0) + 1
+
+    def _remove(self, rel_path, rows):
+        for row_index, (_, _, original_text, text) in enumerate(rows):
+            if not original_text:
+                continue
+            row_occurrences = self._occurrences.get(original_text)
+            if row_occurrences:
+                row_occurrences.discard((rel_path, row_index))
+                if not row_occurrences:
+                    del self._occurrences[original_text]
+            counts = self._translations.get(original_text)
+            if counts and text in counts:
+                counts[text] -= 1
+                if not counts[text]:
+                    del counts[text]
+                if not counts:
+                    del self._translations[original_text]
+
+    def lookup(self, original_text):
+        """Returns the most used translation of an original text, or None."""
+        with self._lock:
+            counts = self._translations.get(original_text)
+            if not counts:
+                return None
+            return max(counts.items(), key=lambda item: item[1])[0]
+
+    def untranslated_rows(self, original_texts):
+        """Returns {rel path: [(row index, original text), ...]} of the untranslated rows whose
+        original is one of original_texts."""
+        targets = {}
+        with self._lock:
+            for original_text in original_texts:
+                for rel_path, row_index in self._occurrences.get(original_text, ()):
+                    if not is_translated(original_text, self._files[rel_path][row_index][3]):
+                        targets.setdefault(rel_path, []).append((row_index, original_text))
+        return targets
+
+def apply_translations(json_path, row_translations):
+    """Writes translations into the rows of a file that are still untranslated.
+    row_translations is a list of (row index, original text, translation). Returns the number of rows changed."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    rows = data.get('rows', [])
+    changed = 0
+    for row_index, original_text, translation in row_translations:
+        if row_index < len(rows) and rows[row_index] and not is_translated(original_text, row_text(rows[row_index])):
+            rows[row_index][next(reversed(rows[row_index]))] = translation
+            changed += 1
+    if changed:
+        write_json_atomic(json_path, data)
+    return changed
+
+# --- Fuzzy Matching ---
+def trigrams(text):
+    """Returns the set of character trigrams of a text, lowercased and padded so short texts have some."""
+    text = f"  {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def similarity(query_trigrams, text_trigrams):
+    """Dice coefficient of two trigram sets, from 0 to 1."""
+    return 2 * len(query_trigrams & text_trigrams) / (len(query_trigrams) + len(text_trigrams))
+
+class FuzzyIndex:
+    """Trigram index for finding originals similar to a text.
+
+    Texts are numbered in order of their trigram count, so each posting list is also sorted by
+    length and a lookup only counts shared trigrams in the slice of texts whose length can reach
+    the threshold. Trigrams found in more than 1% of the texts are left out of the count unless
+    they are needed to find every match; every text whose count can still reach the threshold
+    is then scored exactly, so results are the same as comparing against every text.
+    The index is persisted in the base dir and rebuilt in the background when the set
+    of translated originals changed; texts translated since are checked one by one and
+    texts whose translation was cleared are skipped."""
+
+    def __init__(self, path):
+        self.path = path
+        self.ready = False
+        self._lock = threading.Lock()
+        self._texts = []  # text id -> original text, ordered by trigram count
+        self._sizes = array('I')  # text id -> trigram count
+        self._postings = {}  # trigram -> array of text ids
+        self._added = {}  # Texts added since the last build, in order
+        self._removed = set()  # Built texts whose translation was cleared since
+        self._known = set()  # Every built or added text
+
+    def load(self):
+        """Reads the index from the base dir. Returns False if there is none."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != 1:
+            return False
+        sizes = array('I')
+        sizes.frombytes(base64.b64decode(data['sizes']))
+        postings = {}
+        for trigram, encoded in data['postings'].items():
+            postings[trigram] = array('I')
+            postings[trigram].frombytes(base64.b64decode(encoded))
+        with self._lock:
+            self._texts = data['texts']
+            self._sizes = sizes
+            self._postings = postings
+            self._added = {}
+            self._removed = set()
+            self._known = set(self._texts)
+        self.ready = True
+        return True
+
+    def save(self):
+        """Writes the index to the base dir."""
+        with self._lock:
+            data = {
+                'version': 1,
+                'texts': self._texts,
+                'sizes': base64.b64encode(self._sizes.tobytes()).decode('ascii'),
+                'postings': {trigram: base64.b64encode(text_ids.tobytes()).decode('ascii')
+                             for trigram, text_ids in self._postings.items()}
+            }
+        try:
+            write_json_atomic(self.path, data)
+        except OSError as e:
+            print(f"Error saving fuzzy index: {e}")
+
+    def update(self, texts):
+        """Rebuilds and saves the index if the set of texts differs from the indexed one."""
+        with self._lock:
+            unchanged = not self._added and not self._removed and len(texts) == len(self._texts) and self._known.issuperset(texts)
+        if unchanged:
+            return
+        self.build(texts)
+        self.save()
+
+    def build(self, texts):
+        """Indexes texts, replacing the previous index."""
+        entries = sorted((len(text_trigrams), text, text_trigrams) for text, text_trigrams in
+                         ((text, trigrams(text)) for text in texts))
+        sizes = array('I')
+        postings = {}
+        for text_id, (size, _, text_trigrams) in enumerate(entries):
+            sizes.append(size)
+            for trigram in text_trigrams:
+                text_ids = postings.get(trigram)
+                if text_ids is None:
+                    text_ids = postings[trigram] = array('I')
+                text_ids.append(text_id)
+        with self._lock:
+            self._texts = [text for _, text, _ in entries]
+            self._sizes = sizes
+            self._postings = postings
+            self._added = {}
+            self._removed = set()
+            self._known = set(self._texts)
+        self.ready = True
+
+    def add(self, text):
+        """Adds a newly translated original without rebuilding the index."""
+        with self._lock:
+            if text in self._removed:
+                self._removed.discard(text)
+            elif text not in self._known:
+                self._known.add(text)
+                self._added[text] = None
+
+    def remove(self, text):
+        """Stops suggesting an original whose translation was cleared."""
+        with self._lock:
+            if text in self._added:
+                del self._added[text]
+                self._known.discard(text)
+            elif text in self._known:
+                self._removed.add(text)
+
+    def search(self, query, limit=5, threshold=0.6):
+        """Returns up to limit (similarity, text) pairs for the texts most similar to query,
+        best first, leaving out texts less similar than threshold."""
+        query_trigrams = trigrams(query)
+        size = len(query_trigrams)
+        # Dice >= threshold bounds the trigram count of a match and the trigrams it must share
+        min_size = math.ceil(size * threshold / (2 - threshold))
+        max_size = math.floor(size * (2 - threshold) / threshold)
+        min_shared = math.ceil(threshold * (size + min_size) / 2)
+
+        shared = Counter()
+        with self._lock:
+            first = bisect_left(self._sizes, min_size)
+            end = bisect_right(self._sizes, max_size)
+            postings = sorted((text_ids for text_ids in map(self._postings.get, query_trigrams) if text_ids), key=len)
+            # Every match has one of the rarest size - min_shared + 1 query trigrams, so counting those finds
+            # all of them. Other trigrams are only counted while they are rare enough to be cheap.
+            required = size - min_shared + 1 - (size - len(postings))
+            common = max(1, len(self._texts) // 100)
+            uncounted = 0
+            for position, text_ids in enumerate(postings):
+                if position >= required and len(text_ids) > common:
+                    uncounted = len(postings) - position
+                    break
+                shared.update(text_ids[bisect_left(text_ids, first):bisect_left(text_ids, end)])
+            # A text may share every uncounted trigram, so only texts that can't reach min_shared even then are dropped
+            texts = [self._texts[text_id] for text_id, count in shared.items() if count + uncounted >= min_shared]
+            if self._removed:
+                texts = [text for text in texts if text not in self._removed]
+            texts.extend(self._added)
+
+        # The remaining candidates are scored on all their trigrams
+        results = []
+        for text in texts:
+            score = similarity(query_trigrams, trigrams(text))
+            if score >= threshold:
+                results.append((score, text))
+        results.sort(key=lambda result: (-result[0], result[1]))
+        return results[:limit]
+
+# --- Full-Text Search ---
+# Runs of word characters are terms; CJK characters are terms on their own, since those
+# scripts don't separate words with spaces
+_CJK_CHARS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+_TERM_RE = re.compile(f'[{_CJK_CHARS}]|[^\\W{_CJK_CHARS}]+')
+
+def tokenize(text):
+    """Splits text into lowercase search terms."""
+    return _TERM_RE.findall(text.lower())
+
+class SearchIndex:
+    """Inverted index over the original and translated text of every row in a project.
+
+    The extracted row texts are persisted in the base dir together with the mtime and size
+    of the files they came from, so a refresh only reads files that changed. Term postings
+    are kept in memory and point at documents, one per row."""
+
+    def __init__(self, index_path, memory=None):
+        self.index_path = index_path
+        self.memory = memory  # TranslationMemory kept in sync with the indexed rows
+        self.ready = False  # True once the first refresh finished
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._files = {}  # rel path -> {'signature': [...], 'rows': [[id, label, original, translated], ...]}
+        self._docs = []  # doc id -> (rel path, row index), None for rows of files that since have fewer rows
+        self._file_docs = {}  # rel path -> range of its doc ids
+        self._postings = {}  # term -> array of doc ids
+        self._terms = None  # Sorted terms for prefix lookups, built on demand
+        self._dirty = False  # Whether _files changed since it was persisted
+
+    def cancel(self):
+        """Stops a running refresh, e.g. because the base dir changed."""
+        self._cancelled.set()
+
+    @staticmethod
+    def _signature(json_path, original_path):
+        signature = list(file_signature(json_path))
+        if original_path:
+            signature.extend(file_signature(original_path))
+        return signature
+
+    @STATS.timed("index base dir")
+    def refresh(self, base_dir, second_base_dir, game_version):
+        """Brings the index up to date with the files on disk, reading only changed files."""
+        stored = {}
+        if not self._files and os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f).get('files', {})
+            except (OSError, ValueError):
+                stored = {}
+        else:
+            stored = dict(self._files)
+
+        files = {}
+        changed = False
+        for json_path in iter_json_files(base_dir, game_version):
+            if self._cancelled.is_set():
+                return
+            rel_path = os.path.relpath(json_path, base_dir).replace('\\', '/')
+            try:
+                original_path = resolve_original_path(json_path, base_dir, second_base_dir, game_version)
+                signature = self._signature(json_path, original_path)
+                entry = stored.get(rel_path)
+                if not entry or entry['signature'] != signature:
+                    entry = {'signature': signature, 'rows': extract_row_texts(json_path, original_path)}
+                    changed = True
+            except (OSError, ValueError):
+                continue  # Unreadable files are skipped, they are indexed once they can be read
+            files[rel_path] = entry
+        changed = changed or len(files) != len(stored)
+
+        self._build(files)
+        if self.memory is not None:
+            self.memory.build({rel_path: entry['rows'] for rel_path, entry in files.items()})
+        self.ready = True
+        if changed:
+            self._dirty = True
+            self.save()
+
+    def _build(self, files):
+        docs = []
+        file_docs = {}
+        postings = {}
+        for rel_path, entry in files.items():
+            start = len(docs)
+            self._index_rows(rel_path, entry['rows'], docs, postings)
+            file_docs[rel_path] = range(start, len(docs))
+        with self._lock:
+            self._files = files
+            self._docs = docs
+            self._file_docs = file_docs
+            self._postings = postings
+            self._terms = None
+
+    @staticmethod
+    def _index_rows(rel_path, rows, docs, postings):
+        for row_index, (_, _, original_text, translated_text) in enumerate(rows):
+            doc_id = len(docs)
+            docs.append((rel_path, row_index))
+            for term in set(tokenize(original_text + '\n' + translated_text)):
+                term_docs = postings.get(term)
+                if term_docs is None:
+                    term_docs = postings[term] = array('I')
+                term_docs.append(doc_id)
+
+    def _unindex_rows(self, rows, doc_ids):
+        """Removes the doc ids of a file's rows from the postings of their terms."""
+        terms = set()
+        for _, _, original_text, translated_text in rows:
+            terms.update(tokenize(original_text + '\n' + translated_text))
+        for term in terms:
+            term_docs = self._postings.get(term)
+            if term_docs is None:
+                continue
+            # Postings are sorted, so the file's doc ids are one slice of them
+            del term_docs[bisect_left(term_docs, doc_ids.start):bisect_left(term_docs, doc_ids.stop)]
+            if not term_docs:
+                del self._postings[term]
+
+    def _reindex_rows(self, rows, doc_ids):
+        """Indexes the rows of a file again under the doc ids they had before."""
+        for doc_id, (_, _, original_text, translated_text) in zip(doc_ids, rows):
+            for term in set(tokenize(original_text + '\n' + translated_text)):
+                term_docs = self._postings.get(term)
+                if term_docs is None:
+                    term_docs = self._postings[term] = array('I')
+                insort(term_docs, doc_id)
+
+    def update_file(self, base_dir, second_base_dir, game_version, json_path):
+        """Indexes one file again, e.g. after it was saved."""
+        rel_path = os.path.relpath(json_path, base_dir).replace('\\', '/')
+        original_path = resolve_original_path(json_path, base_dir, second_base_dir, game_version)
+        try:
+            entry = {'signature': self._signature(json_path, original_path),
+                     'rows': extract_row_texts(json_path, original_path)}
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            doc_ids = self._file_docs.get(rel_path)
+            if doc_ids is not None:
+                self._unindex_rows(self._files[rel_path]['rows'], doc_ids)
+            if doc_ids is not None and len(doc_ids) == len(entry['rows']):
+                # Saving keeps the rows of a file, so its documents are reused
+                self._reindex_rows(entry['rows'], doc_ids)
+            else:
+                for doc_id in doc_ids or ():
+                    self._docs[doc_id] = None
+                start = len(self._docs)
+                self._index_rows(rel_path, entry['rows'], self._docs, self._postings)
+                self._file_docs[rel_path] = range(start, len(self._docs))
+            self._files[rel_path] = entry
+            self._terms = None
+            self._dirty = True
+        if self.memory is not None:
+            self.memory.update_file(rel_path, entry['rows'])
+
+    def save(self):
+        """Persists the extracted row texts if they changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            files = dict(self._files)
+            self._dirty = False
+        try:
+            write_json_atomic(self.index_path, {'version': 1, 'files': files})
+        except OSError as e:
+            print(f"Error saving search index: {e}")
+
+    def _term_docs(self, term, prefix):
+        """Returns the posting arrays of term, or of every term starting with it."""
+        if not prefix:
+            term_docs = self._postings.get(term)
+            return [term_docs] if term_docs is not None else []
+        if self._terms is None:
+            self._terms = sorted(self._postings)
+        matches = []
+        for position in range(bisect_left(self._terms, term), len(self._terms)):
+            if not self._terms[position].startswith(term):
+                break
+            matches.append(self._postings[self._terms[position]])
+        return matches
+
+    def search(self, query, limit=200):
+        """Returns up to limit (rel path, row index, id, label, original, translated) tuples for
+        rows containing every term of query. The last term may be incomplete."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        prefix_last = not query[-1:].isspace() and len(terms[-1]) >= 2
+        whole_terms = set(terms[:-1] if prefix_last else terms)
+
+        with self._lock:
+            # Start from the rarest term, the remaining terms are checked against the text
+            candidates = None
+            for position, term in enumerate(terms):
+                term_docs = self._term_docs(term, prefix_last and position == len(terms) - 1)
+                size = sum(len(docs) for docs in term_docs)
+                if candidates is None or size < candidates[0]:
+                    candidates = (size, term_docs)
+            if not candidates[0]:
+                return []
+            doc_ids = candidates[1][0] if len(candidates[1]) == 1 else sorted(set().union(*candidates[1]))
+
+            results = []
+            for doc_id in doc_ids:
+                doc = self._docs[doc_id]
+                if doc is None:
+                    continue
+                rel_path, row_index = doc
+                row_id, label, original_text, translated_text = self._files[rel_path]['rows'][row_index]
+                text_terms = set(tokenize(original_text + '\n' + translated_text))
+                if whole_terms <= text_terms and (not prefix_last or
+                                                  any(term.startswith(terms[-1]) for term in text_terms)):
+                    results.append((rel_path, row_index, row_id, label, original_text, translated_text))
+                    if len(results) >= limit:
+                        break
+            return results
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['progress']:
+        # run_progress talks UTF-8 over the pipes, whatever the locale encoding is (e.g. cp1252 on Windows)
+        progress_worker(io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8'),
+                        io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8'))
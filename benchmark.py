@@ -0,0 +1,557 @@
+"""Benchmarks for the BDAT Translation Tool.
+
+Generates Xenoblade 2, 3 and X base directories, times the file list, table and save
+functions on them and writes the results as JSON, so runs can be compared over time.
+The GUI functions run with the window hidden, under Xvfb if there is no display.
+
+Run with: python benchmark.py [--games ...] [--folders N] [--files N] [--rows N] [--output FILE]"""
+import argparse
+import configparser
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+from bdat_core import (FuzzyIndex, ProjectDB, Stats, Table, align_rows, check_line_length, detect_game_version, display_text,
+                       dump_json_streaming, iter_json_files, line_too_long, load_line_limit_rules, resolve_original_path,
+                       scan_base_dir, write_json_atomic, MANIFEST_FILENAME, PROGRESS_FILENAME)
+
+# --- Synthetic Data ---
+def make_table(row_count, seed=0):
+    """Builds a BDAT-like table with row_count dialogue rows."""
+    rng = random.Random(seed)
+    words = ["Rex", "Pyra", "Nia", "Blade", "Titan", "[ML:Feeling ]", "Driver", "Alrest", "core", "crystal", "the", "of", "and"]
+    rows = []
+    for row_id in range(1, row_count + 1):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(4, 30)))
+        rows.append({"$id": row_id, "label": f"msg_{row_id:05d}", "style": rng.randint(0, 5), "name": text.replace(" of ", "\nof ", 1)})
+    return {"schema": [{"name": "$id", "type": "HashRef"}, {"name": "label", "type": "DebugString"},
+                       {"name": "style", "type": "UnsignedInt"}, {"name": "name", "type": "MessageString"}],
+            "rows": rows}
+
+def make_sentences(count, vocabulary_size=20000, seed=0):
+    """Builds count unique sentences from a Zipf-distributed vocabulary of made-up words,
+    so trigram frequencies look like those of natural text."""
+    rng = random.Random(seed)
+    letters = "eeeeeeeaaaaaooooiiiiuunnnnnrrrrttttsssslllhhddcmwyfgpbvk"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(2, 9))) for _ in range(vocabulary_size)]
+    weights = [1 / rank for rank in range(1, vocabulary_size + 1)]
+    sentences = set()
+    while len(sentences) < count:
+        words = rng.choices(vocabulary, weights, k=rng.randint(2, 18))
+        if rng.random() < 0.3:
+            words.append(str(rng.randint(1, 999)))
+        sentences.add(" ".join(words).capitalize() + rng.choice(".!?"))
+    return sorted(sentences)
+
+def timed(func, repeat=3):
+    """Returns the best wall time of func in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+# --- Synthetic Corpus ---
+GUI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Xenoblade2-Translation-GUI.py")
+CORPUS_PREFIXES = {  # File name prefixes of the generated JSON files, per game
+    "Xenoblade2": ["bf", "tlk", "fev", "qst", "kizuna", "campfev", "menu", "itm"],
+    "Xenoblade3": ["msg_ev", "msg_fld", "msg_qst", "msg_mnu", "msg_btl", "msg_item"],
+    "XenobladeX": ["ms_ev", "ms_qst", "ms_menu", "ms_item", "ms_tlk"],
+}
+CORPUS_BSCHEMA_VERSIONS = {"Xenoblade2": {"Legacy": "Switch"}, "Xenoblade3": "Modern", "XenobladeX": "Modern"}
+
+def make_corpus(directory, game_version, folders=20, files=10, rows=500, seed=0):
+    """Writes a translated and an original base dir with the layout of game_version into directory:
+    BDAT folders holding a .bschema file and an inner folder of JSON files, split between game/
+    and evt/ for Xenoblade 3. File sizes vary around rows, and about half of the rows are
+    translated. Returns (base dir, second base dir)."""
+    rng = random.Random(seed)
+    base_dir = os.path.join(directory, "translated")
+    second_base_dir = os.path.join(directory, "original")
+    prefixes = CORPUS_PREFIXES[game_version]
+    bschema = {"version": CORPUS_BSCHEMA_VERSIONS[game_version], "tables": []}
+    for folder_index in range(folders):
+        if game_version == "Xenoblade3":
+            folder_name = f"{'game' if folder_index % 2 == 0 else 'evt'}_{folder_index:03d}"
+            rel_folder = os.path.join("game" if folder_index % 2 == 0 else "evt", folder_name)
+        else:
+            folder_name = f"bdat_{folder_index:03d}"
+            rel_folder = folder_name
+        file_names = [f"{prefixes[(folder_index + file_index) % len(prefixes)]}{folder_index:03d}_{file_index:02d}.json"
+                      for file_index in range(files)]
+        for root_dir in (base_dir, second_base_dir):
+            inner_folder = os.path.join(root_dir, rel_folder, folder_name)
+            os.makedirs(inner_folder)
+            with open(os.path.join(root_dir, rel_folder, f"{folder_name}.bschema"), 'w', encoding='utf-8') as f:
+                json.dump(dict(bschema, tables=[os.path.splitext(name)[0] for name in file_names]), f, indent=2)
+        for file_name in file_names:
+            original = make_table(max(1, int(rows * rng.uniform(0.2, 1.8))), seed=rng.randrange(1 << 30))
+            translated = json.loads(json.dumps(original))
+            for row in translated['rows']:
+                if rng.random() < 0.5:
+                    row['name'] = " ".join(reversed(row['name'].split(" ")))  # Stands in for a translation
+            for root_dir, data in ((base_dir, translated), (second_base_dir, original)):
+                with open(os.path.join(root_dir, rel_folder, folder_name, file_name), 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+    return base_dir, second_base_dir
+
+# --- Benchmarks ---
+def bench_save_json(row_count=50000):
+    """Compares the streaming atomic save with a plain json.dump of the same table."""
+    data = make_table(row_count)
+    directory = tempfile.mkdtemp()
+    plain_path = os.path.join(directory, "plain.json")
+    atomic_path = os.path.join(directory, "atomic.json")
+
+    def plain():
+        with open(plain_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    row_chunks = [None] * row_count
+    results = {
+        "json.dump indent=2": timed(plain),
+        "write_json_atomic": timed(lambda: write_json_atomic(atomic_path, data)),
+    }
+    write_json_atomic(atomic_path, data, row_chunks)  # Fill the encoded row cache
+
+    def one_edit():
+        index = random.randrange(row_count)
+        data['rows'][index]['name'] += "!"
+        row_chunks[index] = None
+        write_json_atomic(atomic_path, data, row_chunks)
+    results["write_json_atomic, 1 edited row"] = timed(one_edit)
+
+    plain()
+    write_json_atomic(atomic_path, data)
+    with open(plain_path, 'rb') as f_plain, open(atomic_path, 'rb') as f_atomic:
+        identical = f_plain.read() == f_atomic.read()
+    for name, seconds in results.items():
+        print(f"save_json {row_count} rows | {name:<35} {seconds * 1000:9.1f} ms")
+    print(f"save_json {row_count} rows | byte-identical output: {identical}")
+    results["byte-identical output"] = identical
+    return results
+
+def legacy_check_line_length(filename, text):
+    """The per-row check the table used before the rule engine, kept for comparison."""
+    if not text:
+        return False
+    if filename.startswith("bf"):
+        limit = 55
+    elif filename.startswith("campfev") or filename.startswith("fev") or filename.startswith("kizuna") or filename.startswith("qst") or filename.startswith("tlk"):
+        limit = 41
+    else:
+        return False
+    for line in text.split('\\n'):
+        if len(re.sub(r'\[.*?\]', '', line)) > limit:
+            return True
+    return False
+
+def bench_line_limits(row_count=100000):
+    """Compares the per-row cost of the line limit rule engine with the old startswith chain."""
+    texts = [display_text(row['name']) for row in make_table(row_count)['rows']]
+    filename = "tlk_ev01.json"
+    rules = load_line_limit_rules("Xenoblade2")
+
+    def legacy():
+        return sum(legacy_check_line_length(filename, text) for text in texts)
+
+    def engine():
+        limit = rules.limit(filename)  # Resolved once per file
+        return sum(line_too_long(text, limit) for text in texts)
+
+    results = {"same red rows": legacy() == engine()}
+    for name, func in (("startswith chain + re.sub", legacy), ("LineLimitRules + line_too_long", engine)):
+        seconds = results[name] = timed(func)
+        print(f"line limits {row_count} rows | {name:<35} {seconds * 1000:9.1f} ms {seconds / row_count * 1e9:7.0f} ns/row")
+    print(f"line limits {row_count} rows | same red rows: {results['same red rows']}")
+    return results
+
+def bench_fuzzy_lookup(text_count=100000, query_count=200):
+    """Measures near-match lookups in a FuzzyIndex of text_count originals, against a full scan."""
+    texts = make_sentences(text_count)
+    index = FuzzyIndex(os.path.join(tempfile.mkdtemp(), "fuzzy.json"))
+    start = time.perf_counter()
+    index.build(texts)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index.save()
+    index.load()
+    reload_seconds = time.perf_counter() - start
+
+    # Queries are originals with one word replaced, like a line that differs by a name or number
+    rng = random.Random(1)
+    queries = []
+    for text in rng.sample(texts, query_count):
+        words = text.split()
+        words[rng.randrange(len(words))] = rng.choice(rng.choice(texts).split())
+        queries.append(" ".join(words))
+    timings = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        found += bool(index.search(query))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"fuzzy lookup {text_count} texts | build {build_seconds:.1f} s, save and load {reload_seconds:.1f} s")
+    print(f"fuzzy lookup {text_count} texts | median {timings[len(timings) // 2] * 1000:.1f} ms, "
+          f"95th percentile {timings[len(timings) * 95 // 100] * 1000:.1f} ms, {found}/{query_count} queries matched")
+    return {"build": build_seconds, "save and load": reload_seconds, "median lookup": timings[len(timings) // 2],
+            "95th percentile lookup": timings[len(timings) * 95 // 100], "queries matched": found}
+
+def traced_memory(func):
+    """Returns (result of func, bytes still allocated by it, peak bytes allocated while it ran)."""
+    tracemalloc.start()
+    try:
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, current, peak
+
+def bench_table_model(row_count=100000):
+    """Compares the memory and text iteration cost of a Table with the parsed dict-per-row JSON."""
+    data = make_table(row_count)
+    data['rows'] = [dict(row, flags=row['$id'] % 7, voice=row['$id'] * 3) for row in data['rows']]  # More fields, like real tables
+    for row in data['rows']:
+        row['name'] = row.pop('name')  # The text stays the last field
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    del data
+
+    parsed, parsed_bytes, _ = traced_memory(lambda: json.loads(text))
+    table, table_bytes, table_peak = traced_memory(lambda: Table.from_json(json.loads(text)))
+    print(f"table model {row_count} rows | file {len(text) / 1e6:.1f} MB, dict rows {parsed_bytes / 1e6:.1f} MB, "
+          f"Table {table_bytes / 1e6:.1f} MB (peak while building {table_peak / 1e6:.1f} MB)")
+    results = {"file bytes": len(text), "dict rows bytes": parsed_bytes, "Table bytes": table_bytes, "Table peak bytes": table_peak}
+
+    def dict_texts():
+        return sum(len(list(row.values())[-1]) for row in parsed['rows'])
+
+    def table_texts():
+        return sum(len(text) for text in table.iter_texts())
+    for name, func in (("list(row.values())[-1]", dict_texts), ("Table.iter_texts", table_texts)):
+        seconds = results[name] = timed(func)
+        print(f"table model {row_count} rows | {name:<35} {seconds * 1000:9.1f} ms")
+
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        seconds = timed(lambda: dump_json_streaming(table, devnull))
+    output = io.StringIO()
+    dump_json_streaming(table, output)
+    print(f"table model {row_count} rows | {'dump_json_streaming(Table)':<35} {seconds * 1000:9.1f} ms")
+    print(f"table model {row_count} rows | byte-identical output: {output.getvalue() == text}")
+    results["dump_json_streaming(Table)"] = seconds
+    results["byte-identical output"] = output.getvalue() == text
+    return results
+
+def bench_row_alignment(row_count=100000):
+    """Measures joining a table with an original whose rows were reordered, with some rows
+    removed and added, like dumps of two game versions."""
+    data = make_table(row_count)
+    table = Table.from_json(data)
+    rng = random.Random(2)
+    original_rows = [row for row in data['rows'] if rng.random() > 0.01]
+    rng.shuffle(original_rows)
+    original_rows += [dict(row, **{"$id": row_count + index}) for index, row in enumerate(original_rows[:500])]
+    original = Table.from_json(dict(data, rows=original_rows))
+    alignment = align_rows(table, original)
+    results = {}
+    for name, other in (("same row order", table), ("reordered rows", original)):
+        seconds = results[name] = timed(lambda: align_rows(table, other))
+        print(f"row alignment {row_count} rows | {name:<35} {seconds * 1000:9.1f} ms")
+    print(f"row alignment {row_count} rows | {len(alignment.missing)} rows without original, "
+          f"{len(alignment.unmatched)} original rows left over")
+    results["rows without original"] = len(alignment.missing)
+    results["original rows left over"] = len(alignment.unmatched)
+    return results
+
+def bench_instrumentation(call_count=200000):
+    """Measures what a Stats span costs per call while recording is off and on."""
+    stats = Stats()
+
+    @stats.timed("decorated")
+    def decorated():
+        pass
+
+    def spans():
+        for _ in range(call_count):
+            with stats.span("span"):
+                pass
+
+    def calls():
+        for _ in range(call_count):
+            decorated()
+    results = {}
+    for enabled in (False, True):
+        stats.enabled = enabled
+        for name, func in (("span", spans), ("timed decorator", calls)):
+            name = f"{name}, {'recording' if enabled else 'off'}"
+            seconds = results[name] = timed(func) / call_count
+            print(f"instrumentation | {name:<35} {seconds * 1e9:9.0f} ns/call")
+    return results
+
+def legacy_save_config(config_path, folder_status):
+    """The INI status file as the GUI used to write it, rewritten whole on every mark."""
+    config = configparser.ConfigParser()
+    config['FOLDER_STATUS'] = folder_status
+    with open(config_path, 'w') as configfile:
+        config.write(configfile)
+
+def bench_project_db(file_count=20000, folder_count=500):
+    """Compares marking files in the project database against rewriting the INI status file,
+    and measures loading every status."""
+    entries = [(f"../game/bdat{i % folder_count}/bdat{i % folder_count}/file{i}.json", "orange" if i % 3 else "green")
+               for i in range(file_count)]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db = ProjectDB(directory)
+        db.open()
+        try:
+            folder_status = dict(entries)
+            config_path = os.path.join(directory, "translation_config.ini")
+            cases = (
+                ("INI, mark 1 file", lambda: legacy_save_config(config_path, folder_status)),
+                ("database, mark 1 file", lambda: db.set_statuses(entries[:1])),
+                (f"database, mark {file_count} files", lambda: db.set_statuses(entries)),
+                ("database, load all statuses", db.statuses),
+            )
+            for name, func in cases:
+                seconds = results[name] = timed(func)
+                print(f"project database {file_count} files | {name:<35} {seconds * 1000:8.2f} ms")
+        finally:
+            db.close()
+    return results
+
+# --- Corpus Benchmarks ---
+def timings(func, repeat=5, setup=None):
+    """Runs func repeat times, calling setup before each run, and summarizes the wall times in seconds."""
+    seconds = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    seconds.sort()
+    return {"min": seconds[0], "median": seconds[len(seconds) // 2], "max": seconds[-1], "runs": repeat}
+
+def print_timing(game_version, name, timing):
+    print(f"{game_version:<11} | {name:<35} {timing['min'] * 1000:9.1f} ms min {timing['median'] * 1000:9.1f} ms median")
+
+def largest_file(base_dir, game_version):
+    """Returns the path of the largest JSON file of a base dir."""
+    return max(iter_json_files(base_dir, game_version), key=os.path.getsize)
+
+def bench_corpus_core(game_version, base_dir, second_base_dir):
+    """Times the display-free operations on a generated corpus."""
+    results = {}
+    json_path = largest_file(base_dir, game_version)
+    original_path = resolve_original_path(json_path, base_dir, second_base_dir, game_version)
+    rules = load_line_limit_rules(game_version)
+    filename = os.path.basename(json_path)
+    table = Table.load(json_path)
+    texts = [display_text(text) for text in table.iter_texts()]
+    save_path = os.path.join(tempfile.mkdtemp(), filename)
+    row_chunks = [None] * len(table)
+    write_json_atomic(save_path, table, row_chunks)
+
+    def one_edit():
+        index = random.randrange(len(table))
+        table.set_text(index, table.text(index) + "!")
+        row_chunks[index] = None
+        write_json_atomic(save_path, table, row_chunks)
+
+    cases = [
+        ("detect_game_version", lambda: detect_game_version(base_dir)),
+        ("scan_base_dir", lambda: scan_base_dir(base_dir, lambda item: None, threading.Event())),
+        ("load_json", lambda: Table.load(json_path)),
+        ("align original rows", lambda: align_rows(table, Table.load(original_path))),
+        ("check_line_length, all rows", lambda: [check_line_length(filename, text, rules) for text in texts]),
+        ("save_json", lambda: write_json_atomic(save_path, table)),
+        ("save_json, 1 edited row", one_edit),
+    ]
+    for name, func in cases:
+        results[name] = timings(func)
+        print_timing(game_version, name, results[name])
+    return results
+
+def start_virtual_display():
+    """Starts Xvfb when there is no display on Linux. Returns the process, or None."""
+    if not sys.platform.startswith("linux") or os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None
+    display = ":97"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)  # Give the server time to accept connections
+    os.environ["DISPLAY"] = display
+    return process
+
+def load_gui():
+    """Imports the GUI script without starting it and hides its window. Dialogs are answered
+    automatically so saves don't wait for a click. Returns (module, None) or (None, reason)."""
+    import importlib.util
+    import tkinter
+    spec = importlib.util.spec_from_file_location("translation_gui", GUI_SCRIPT)
+    gui = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(gui)
+    except (ImportError, tkinter.TclError) as e:  # No display, or the GUI's dependencies are missing
+        return None, str(e)
+    gui.root.withdraw()
+    gui.messagebox = types.SimpleNamespace(showinfo=lambda *args, **kwargs: None, showwarning=lambda *args, **kwargs: None,
+                                           showerror=lambda *args, **kwargs: None, askyesno=lambda *args, **kwargs: True)
+    return gui, None
+
+def pump_events(gui, done, timeout=300):
+    """Runs the Tk event loop until done() returns True."""
+    deadline = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("GUI operation did not finish")
+        gui.root.update()
+        time.sleep(0.001)
+
+def bench_corpus_gui(gui, game_version, base_dir, second_base_dir):
+    """Times the GUI functions on a generated corpus, with the window hidden."""
+    results = {}
+    gui.BASE_DIR, gui.SECOND_BASE_DIR = base_dir, second_base_dir
+    scanned = []
+    gui.file_list_scanned = lambda: scanned.append(True)  # Stop at the scan, no indexing or progress
+
+    def populate_file_list():
+        scanned.clear()
+        gui.populate_file_list()
+        pump_events(gui, lambda: scanned)
+
+    def remove_manifest():
+        for filename in (MANIFEST_FILENAME, PROGRESS_FILENAME):
+            if os.path.exists(os.path.join(base_dir, filename)):
+                os.remove(os.path.join(base_dir, filename))
+
+    results["populate_file_list"] = timings(populate_file_list, setup=remove_manifest)
+    results["populate_file_list, from manifest"] = timings(populate_file_list)
+
+    json_path = largest_file(base_dir, game_version)
+    original_path = resolve_original_path(json_path, base_dir, second_base_dir, game_version)
+    results["load_json"] = timings(lambda: gui.load_json(json_path))
+    table, original = gui.load_json(json_path), gui.load_json(original_path)
+    gui.CURRENT_JSON_PATH, gui.CURRENT_ORIGINAL_JSON_PATH = json_path, original_path
+    gui.CURRENT_JSON_DATA, gui.CURRENT_ORIGINAL_JSON_DATA = table, original
+
+    def populate_table():
+        table.alignment = None  # Measure the first open, not a cached join
+        gui.populate_table(gui.TREE, original, table)
+        gui.root.update_idletasks()
+    results["populate_table"] = timings(populate_table)
+
+    # Typing a file name into the filter box, one keystroke at a time
+    filename = os.path.splitext(os.path.basename(json_path))[0]
+
+    def type_filter():
+        for length in range(1, len(filename) + 1):
+            gui.search_var.set(filename[:length])
+            gui.apply_file_filter()
+        gui.root.update_idletasks()
+
+    def clear_filter():
+        gui.search_var.set("")
+        gui.apply_file_filter()
+    results["filter_folders, per keystroke"] = {key: value / len(filename) if key != "runs" else value
+                                                for key, value in timings(type_filter, setup=clear_filter).items()}
+
+    def save_table_data():
+        rng = random.Random(len(gui.DIRTY_ROWS))
+        for index in rng.sample(range(len(table)), min(10, len(table))):
+            gui.TABLE_ROWS.set_text(index, gui.TABLE_ROWS.text(index) + "!")
+            gui.DIRTY_ROWS.add(index)
+        gui.save_table_data()
+    gui.populate_table(gui.TREE, original, table)
+    results["save_table_data, 10 edited rows"] = timings(save_table_data)
+    results["save_json"] = timings(lambda: gui.save_json(json_path, table))
+
+    clear_filter()
+    for name, timing in results.items():
+        print_timing(game_version, name, timing)
+    return results
+
+def git_commit():
+    """Returns the commit the benchmark ran on, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BDAT Translation Tool on generated corpora.")
+    parser.add_argument("--games", nargs="+", choices=list(CORPUS_PREFIXES), default=list(CORPUS_PREFIXES),
+                        help="game layouts to generate (default: all)")
+    parser.add_argument("--folders", type=int, default=20, help="BDAT folders per game (default: 20)")
+    parser.add_argument("--files", type=int, default=10, help="JSON files per folder (default: 10)")
+    parser.add_argument("--rows", type=int, default=500, help="rows of the average file (default: 500)")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to")
+    parser.add_argument("--no-gui", action="store_true", help="skip the benchmarks that need a display")
+    parser.add_argument("--no-micro", action="store_true", help="skip the single-function benchmarks")
+    args = parser.parse_args(argv)
+
+    report = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus": {"folders": args.folders, "files": args.files, "rows": args.rows},
+        "games": {},
+    }
+    display = None
+    gui = None
+    if not args.no_gui:
+        display = start_virtual_display()
+        gui, reason = load_gui()
+        if gui is None:
+            print(f"Skipping GUI benchmarks: {reason}")
+            report["gui_skipped"] = reason
+    try:
+        for game_version in args.games:
+            with tempfile.TemporaryDirectory() as directory:
+                start = time.perf_counter()
+                base_dir, second_base_dir = make_corpus(directory, game_version, args.folders, args.files, args.rows)
+                print(f"{game_version:<11} | corpus generated in {time.perf_counter() - start:.1f} s")
+                results = report["games"][game_version] = bench_corpus_core(game_version, base_dir, second_base_dir)
+                if gui is not None:
+                    results.update(bench_corpus_gui(gui, game_version, base_dir, second_base_dir))
+    finally:
+        if gui is not None:
+            gui.root.destroy()
+        if display is not None:
+            display.terminate()
+
+    if not args.no_micro:
+        report["micro"] = {
+            "save_json": bench_save_json(),
+            "line limits": bench_line_limits(),
+            "fuzzy lookup": bench_fuzzy_lookup(),
+            "table model": bench_table_model(),
+            "row alignment": bench_row_alignment(),
+            "instrumentation": bench_instrumentation(),
+            "project database": bench_project_db(),
+        }
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Headless line length check for a translated base directory.
+
+Applies the same line limits as the red rows in the GUI to every JSON file under the
+base dir and prints one JSON object per over-limit line. Exits with 1 if any line is
+too long and 2 if the base dir or a file can't be read, so it can gate a build.
+
+Run with: python check_lines.py [BASE_DIR] [--jobs N]
+Without BASE_DIR, the base directory saved by the GUI is used."""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bdat_core import check_file_line_lengths, detect_game_version, iter_json_files, load_line_limit_rules, saved_gui_dirs
+
+def check_file(job):
+    """Checks one (path, limit) job in a worker process. Returns (path, violations, error message)."""
+    json_path, limit = job
+    try:
+        return json_path, check_file_line_lengths(json_path, limit), None
+    except (OSError, ValueError) as e:
+        return json_path, [], str(e)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report lines that exceed the line length limit.")
+    parser.add_argument("base_dir", nargs="?", help="translated base directory (default: the one saved by the GUI)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    base_dir = args.base_dir or saved_gui_dirs()[0]
+    if not base_dir or not os.path.isdir(base_dir):
+        print(f"Base directory not found: {base_dir}", file=sys.stderr)
+        return 2
+    base_dir = os.path.normpath(base_dir)
+
+    game_version = detect_game_version(base_dir)
+    rules = load_line_limit_rules(game_version)
+    # Files without a limit are never opened
+    jobs = [(json_path, rules.limit(os.path.basename(json_path))) for json_path in iter_json_files(base_dir, game_version)]
+    jobs = [job for job in jobs if job[1] is not None]
+    chunksize = max(1, len(jobs) // (args.jobs * 8))  # Few round trips, still balanced across workers
+    violation_count = error_count = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        for json_path, violations, error in executor.map(check_file, jobs, chunksize=chunksize):
+            rel_path = os.path.relpath(json_path, base_dir)
+            if error:
+                error_count += 1
+                print(f"Error reading {rel_path}: {error}", file=sys.stderr)
+            for violation in violations:
+                print(json.dumps({'file': rel_path, **violation}, ensure_ascii=False))
+            violation_count += len(violations)
+            sys.stdout.flush()  # Stream the report while the remaining files are checked
+
+    print(f"Checked {len(jobs)} files with a line limit: {violation_count} lines too long, {error_count} unreadable files",
+          file=sys.stderr)
+    if violation_count:
+        return 1
+    return 2 if error_count else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
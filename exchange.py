@@ -0,0 +1,305 @@
+"""Bulk export and import of the row texts of a base directory.
+
+Exports (file, $id, label, original, translation) for every row to CSV, gettext PO or
+XLIFF 1.2, and imports edited files back, writing each translation into the row's last
+field like the GUI does when saving. Tables are read and written one at a time, so memory
+use does not grow with the size of the project, and import only rewrites files in which
+a row actually changed.
+
+Run with:
+    python exchange.py export texts.po [--base-dir DIR] [--second-dir DIR]
+    python exchange.py import texts.po [--base-dir DIR] [--dry-run]
+The format follows the file extension (.csv, .po, .xlf/.xliff) unless --format is given.
+Without --base-dir/--second-dir, the directories saved by the GUI are used."""
+import argparse
+import csv
+import json
+import os
+import sys
+import xml.etree.ElementTree as ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+from bdat_core import (detect_game_version, extract_row_texts, is_translated, iter_json_files,
+                       resolve_original_path, row_text, saved_gui_dirs, write_json_atomic)
+
+FORMATS = {".csv": "csv", ".po": "po", ".xlf": "xliff", ".xliff": "xliff"}
+CSV_HEADER = ["file", "id", "label", "original", "translation"]
+XLIFF_NAMESPACE = "urn:oasis:names:tc:xliff:document:1.2"
+XML_ENTITIES = {'\r': '&#13;'}  # Keeps carriage returns, which XML parsers turn into newlines
+
+# --- Export ---
+def iter_records(base_dir, second_base_dir):
+    """Yields (file, id, label, original, translation) for every row under the base dir, a table at a time.
+    file is the path of the table relative to the base dir, with forward slashes."""
+    game_version = detect_game_version(base_dir)
+    for json_path in iter_json_files(base_dir, game_version):
+        rel_path = os.path.relpath(json_path, base_dir).replace('\\', '/')
+        try:
+            original_path = resolve_original_path(json_path, base_dir, second_base_dir, game_version)
+            rows = extract_row_texts(json_path, original_path)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {rel_path}: {e}", file=sys.stderr)
+            continue
+        for row_id, label, original_text, text in rows:
+            yield rel_path, row_id, label, original_text, text
+
+def write_csv(f, records):
+    """Writes records as CSV with a header row. The translation column holds the current text of every row."""
+    writer = csv.writer(f)
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+def po_quote(text):
+    """Quotes a string for a PO file."""
+    text = text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+    return f'"{text}"'
+
+def write_po(f, records):
+    """Writes records as a gettext PO file. Untranslated rows get an empty msgstr.
+    msgctxt holds "file|id|label", which import uses to find the row again."""
+    f.write('msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n')
+    count = 0
+    for rel_path, row_id, label, original_text, text in records:
+        f.write(f"\n#: {rel_path}\n")
+        f.write(f"msgctxt {po_quote(f'{rel_path}|{row_id}|{label}')}\n")
+        f.write(f"msgid {po_quote(original_text)}\n")
+        f.write(f"msgstr {po_quote(text if is_translated(original_text, text) else '')}\n")
+        count += 1
+    return count
+
+def write_xliff(f, records, source_language="en", target_language=None):
+    """Writes records as XLIFF 1.2 with one <file> per table. Untranslated rows have no <target>.
+    Each trans-unit's id is the row's $id and its resname the row's label."""
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write(f'<xliff version="1.2" xmlns="{XLIFF_NAMESPACE}">\n')
+    target_attribute = f" target-language={quoteattr(target_language)}" if target_language else ""
+    current_file = None
+    count = 0
+    for rel_path, row_id, label, original_text, text in records:
+        if rel_path != current_file:
+            if current_file is not None:
+                f.write('    </body>\n  </file>\n')
+            f.write(f'  <file original={quoteattr(rel_path)} source-language={quoteattr(source_language)}'
+                    f'{target_attribute} datatype="plaintext">\n    <body>\n')
+            current_file = rel_path
+        f.write(f'      <trans-unit id={quoteattr(str(row_id))} resname={quoteattr(str(label))}>\n')
+        f.write(f'        <source>{escape(original_text, XML_ENTITIES)}</source>\n')
+        if is_translated(original_text, text):
+            f.write(f'        <target>{escape(text, XML_ENTITIES)}</target>\n')
+        f.write('      </trans-unit>\n')
+        count += 1
+    if current_file is not None:
+        f.write('    </body>\n  </file>\n')
+    f.write('</xliff>\n')
+    return count
+
+# --- Import ---
+def read_csv(f):
+    """Yields (file, id, label, translation) from a CSV file written by write_csv."""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header != CSV_HEADER:
+        raise ValueError(f"Expected the columns {', '.join(CSV_HEADER)}")
+    for line_number, record in enumerate(reader, 2):
+        if len(record) != len(CSV_HEADER):
+            raise ValueError(f"Line {line_number}: expected {len(CSV_HEADER)} columns, found {len(record)}")
+        rel_path, row_id, label, _, text = record
+        yield rel_path, row_id, label, text
+
+def po_unquote(text):
+    """Reverses po_quote for one quoted line."""
+    text = text.strip()
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+        raise ValueError(f"Expected a quoted string: {text}")
+    result = []
+    chars = iter(text[1:-1])
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            result.append({'n': '\n', 'r': '\r', 't': '\t'}.get(char, char))
+        else:
+            result.append(char)
+    return ''.join(result)
+
+def read_po(f):
+    """Yields (file, id, label, translation) from a PO file written by write_po, an entry at a time."""
+    entry = {}
+    field = None
+
+    def finish():
+        context = entry.get('msgctxt')
+        if context is not None:
+            rel_path, row_id, label = (context.split('|', 2) + ['', ''])[:3]
+            return rel_path, row_id, label, entry.get('msgstr', '')
+        return None
+
+    for line in f:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('"'):
+            if field is None:
+                raise ValueError(f"Unexpected string: {line}")
+            entry[field] += po_unquote(line)
+            continue
+        keyword, _, value = line.partition(' ')
+        if keyword not in ('msgctxt', 'msgid', 'msgstr'):
+            raise ValueError(f"Unsupported PO line: {line}")
+        if keyword in ('msgctxt', 'msgid') and 'msgstr' in entry:
+            record = finish()
+            if record:
+                yield record
+            entry = {}
+        field = keyword
+        entry[field] = po_unquote(value)
+    record = finish()
+    if record:
+        yield record
+
+def read_xliff(f):
+    """Yields (file, id, label, translation) from an XLIFF file written by write_xliff.
+    Parsed elements are dropped as soon as they are read."""
+    rel_path = None
+    body = None
+    for event, element in ElementTree.iterparse(f, events=('start', 'end')):
+        tag = element.tag.rpartition('}')[2]
+        if event == 'start':
+            if tag == 'file':
+                rel_path = element.get('original')
+            elif tag == 'body':
+                body = element
+            continue
+        if tag == 'trans-unit':
+            target = element.find(f'{{{XLIFF_NAMESPACE}}}target')
+            if target is None:
+                target = element.find('target')
+            if target is not None:
+                yield rel_path, element.get('id', ''), element.get('resname', ''), ''.join(target.itertext())
+            if body is not None:
+                body.clear()  # The processed units are the only children
+        elif tag == 'file':
+            element.clear()
+
+def find_row(rows_by_id, rows_by_label, row_id, label):
+    """Finds a row by its $id, falling back to its label."""
+    row = rows_by_id.get(str(row_id)) if row_id != '' else None
+    if row is None and label:
+        row = rows_by_label.get(label)
+    return row
+
+def apply_file_records(json_path, records, dry_run=False):
+    """Writes the (id, label, translation) records into a table. Empty translations are ignored.
+    Returns (rows changed, rows not found); the file is only written if a row changed."""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    rows = data.get('rows', [])
+    rows_by_id = {str(row['$id']): row for row in rows if row and '$id' in row}
+    rows_by_label = {row['label']: row for row in rows if row and row.get('label')}
+    changed = missing = 0
+    for row_id, label, text in records:
+        if not text:
+            continue
+        row = find_row(rows_by_id, rows_by_label, row_id, label)
+        if row is None:
+            missing += 1
+        elif row_text(row) != text:
+            row[next(reversed(row))] = text  # Same last-field rule as saving in the GUI
+            changed += 1
+    if changed and not dry_run:
+        write_json_atomic(json_path, data)
+    return changed, missing
+
+def import_records(base_dir, records, dry_run=False):
+    """Imports (file, id, label, translation) records into the tables of a base dir.
+    Records of one table are expected to be next to each other; a table is read and written once per run of records.
+    Returns a dict of counts."""
+    stats = {'files': 0, 'rows': 0, 'missing_rows': 0, 'missing_files': 0}
+    base_dir = os.path.abspath(base_dir)
+
+    def flush(rel_path, file_records):
+        json_path = os.path.abspath(os.path.join(base_dir, *rel_path.split('/')))
+        if os.path.commonpath([base_dir, json_path]) != base_dir or not os.path.isfile(json_path):
+            print(f"Skipping unknown file {rel_path}", file=sys.stderr)
+            stats['missing_files'] += 1
+            return
+        try:
+            changed, missing = apply_file_records(json_path, file_records, dry_run)
+        except (OSError, ValueError) as e:
+            print(f"Could not update {rel_path}: {e}", file=sys.stderr)
+            stats['missing_files'] += 1
+            return
+        if changed:
+            stats['files'] += 1
+            stats['rows'] += changed
+        stats['missing_rows'] += missing
+
+    current_file = None
+    file_records = []
+    for rel_path, row_id, label, text in records:
+        if rel_path != current_file:
+            if current_file is not None:
+                flush(current_file, file_records)
+            current_file = rel_path
+            file_records = []
+        file_records.append((row_id, label, text))
+    if current_file is not None:
+        flush(current_file, file_records)
+    return stats
+
+# --- Command Line ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import the texts of a base directory as CSV, PO or XLIFF.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="file to write or read")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="default: from the file extension")
+    parser.add_argument("--base-dir", help="translated base directory (default: the one saved by the GUI)")
+    parser.add_argument("--second-dir", help="original base directory (default: the one saved by the GUI)")
+    parser.add_argument("--source-lang", default="en", help="XLIFF source language (default: en)")
+    parser.add_argument("--target-lang", help="XLIFF target language")
+    parser.add_argument("--dry-run", action="store_true", help="import: report changes without writing files")
+    args = parser.parse_args(argv)
+
+    file_format = args.format or FORMATS.get(os.path.splitext(args.path)[1].lower())
+    if not file_format:
+        parser.error("Can't tell the format from the file extension, use --format")
+    saved_base_dir, saved_second_base_dir = saved_gui_dirs()
+    base_dir = args.base_dir or saved_base_dir
+    second_base_dir = args.second_dir or saved_second_base_dir
+    if not base_dir or not os.path.isdir(base_dir):
+        print(f"Base directory not found: {base_dir}", file=sys.stderr)
+        return 2
+
+    if args.command == "export":
+        records = iter_records(base_dir, second_base_dir if second_base_dir and os.path.isdir(second_base_dir) else None)
+        encoding = 'utf-8-sig' if file_format == "csv" else 'utf-8'  # The BOM makes Excel read CSV as UTF-8
+        with open(args.path, 'w', encoding=encoding, newline='') as f:
+            if file_format == "csv":
+                count = write_csv(f, records)
+            elif file_format == "po":
+                count = write_po(f, records)
+            else:
+                count = write_xliff(f, records, args.source_lang, args.target_lang)
+        print(f"Exported {count} rows to {args.path}", file=sys.stderr)
+        return 0
+
+    try:
+        if file_format == "xliff":
+            with open(args.path, 'rb') as f:
+                stats = import_records(base_dir, read_xliff(f), args.dry_run)
+        else:
+            with open(args.path, 'r', encoding='utf-8-sig', newline='') as f:
+                stats = import_records(base_dir, read_csv(f) if file_format == "csv" else read_po(f), args.dry_run)
+    except (OSError, ValueError, ElementTree.ParseError) as e:
+        print(f"Could not import {args.path}: {e}", file=sys.stderr)
+        return 2
+    action = "Would update" if args.dry_run else "Updated"
+    print(f"{action} {stats['rows']} rows in {stats['files']} files; "
+          f"{stats['missing_rows']} rows and {stats['missing_files']} files not found", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Checks that FuzzyIndex finds the same matches as comparing a query against every text.
+
+Run with: python -m unittest discover tests"""
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bdat_core import FuzzyIndex, similarity, trigrams
+
+WORDS = ("the", "a", "blade", "driver", "core", "crystal", "titan", "of", "to", "and",
+         "Rex", "Pyra", "Mythra", "Nia", "Tora", "Poppi", "attack", "arts", "level", "up")
+
+def sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8)))
+
+def brute_force(texts, query, limit, threshold):
+    query_trigrams = trigrams(query)
+    results = [(score, text) for score, text in
+               ((similarity(query_trigrams, text_trigrams), text) for text, text_trigrams in texts.items())
+               if score >= threshold]
+    results.sort(key=lambda result: (-result[0], result[1]))
+    return results[:limit]
+
+class FuzzyIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(1)
+        self.texts = {text: trigrams(text) for text in sorted({sentence(rng) for _ in range(5000)})}
+        self.queries = [sentence(rng) for _ in range(100)]
+        self.index = FuzzyIndex(os.devnull)
+        self.index.build(self.texts)
+
+    def test_same_as_brute_force(self):
+        for query in self.queries:
+            self.assertEqual(self.index.search(query, limit=5, threshold=0.6),
+                             brute_force(self.texts, query, 5, 0.6), query)
+
+    def test_added_and_removed(self):
+        removed = next(iter(self.texts))
+        self.index.remove(removed)
+        self.index.add("Pyra and Mythra level up")
+        self.index.add("Rex attack arts")
+        self.index.remove("Rex attack arts")
+        texts = {text: text_trigrams for text, text_trigrams in self.texts.items() if text != removed}
+        texts["Pyra and Mythra level up"] = trigrams("Pyra and Mythra level up")
+        for query in self.queries + [removed, "Rex attack arts"]:
+            self.assertEqual(self.index.search(query, limit=5, threshold=0.6),
+                             brute_force(texts, query, 5, 0.6), query)
+
+        self.index.add(removed)  # Translated again
+        self.assertEqual(self.index.search(removed, limit=1)[0], (1.0, removed))
+
+if __name__ == "__main__":
+    unittest.main()
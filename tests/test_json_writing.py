@@ -0,0 +1,54 @@
+"""Checks that dump_json_streaming writes exactly what json.dump(indent=2) would.
+
+Run with: python -m unittest discover tests"""
+import io
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bdat_core import Table, dump_json_streaming
+
+def expected(document):
+    return json.dumps(document, ensure_ascii=False, indent=2)
+
+def dumped(data, row_chunks=None):
+    f = io.StringIO()
+    dump_json_streaming(data, f, row_chunks)
+    return f.getvalue()
+
+class ListRowsTest(unittest.TestCase):
+    """Rows that are not objects are kept as they are, like json.dump did."""
+
+    document = {
+        "schema": [{"name": "$id", "type": "HashRef"}, {"name": "name", "type": "String"}],
+        "rows": [
+            [1, "list row"],
+            {"$id": 2, "name": "object row"},
+            [],
+            {"$id": 3, "name": "ünïcödé\nline"},
+            ["nested", {"a": [1, 2]}],
+        ]
+    }
+
+    def test_document(self):
+        self.assertEqual(dumped(self.document), expected(self.document))
+
+    def test_table(self):
+        table = Table.from_json(json.loads(json.dumps(self.document)))
+        self.assertEqual(dumped(table), expected(self.document))
+
+    def test_reused_row_chunks(self):
+        table = Table.from_json(json.loads(json.dumps(self.document)))
+        row_chunks = [None] * len(table)
+        self.assertEqual(dumped(table, row_chunks), expected(self.document))
+        row_chunks[0] = None  # Only the list row is encoded again
+        self.assertEqual(dumped(table, row_chunks), expected(self.document))
+
+    def test_round_trip(self):
+        self.assertEqual(json.loads(dumped(Table.from_json(self.document))), self.document)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Checks that SearchIndex keeps its postings in step with files indexed again after a save.
+
+Run with: python -m unittest discover tests"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bdat_core import SearchIndex
+
+def write_rows(json_path, texts):
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({"schema": [{"name": "$id", "type": "HashRef"}, {"name": "name", "type": "String"}],
+                   "rows": [{"$id": row_id, "name": text} for row_id, text in enumerate(texts, 1)]}, f)
+
+class UpdateFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = self.temp_dir.name
+        self.index = SearchIndex(os.path.join(self.base_dir, 'index.json'))
+        self.paths = [os.path.join(self.base_dir, name) for name in ('a.json', 'b.json')]
+        write_rows(self.paths[0], ["Rex's core crystal", "Pyra"])
+        write_rows(self.paths[1], ["Mythra", "Nia's blade"])
+        for json_path in self.paths:
+            self.update(json_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def update(self, json_path):
+        self.index.update_file(self.base_dir, None, None, json_path)
+
+    def found(self, query):
+        return [(rel_path, row_index) for rel_path, row_index, *_ in self.index.search(query)]
+
+    def test_same_row_count_reuses_docs(self):
+        write_rows(self.paths[0], ["Rex's core", "Poppi"])
+        self.update(self.paths[0])
+        self.update(self.paths[0])
+        self.assertEqual(len(self.index._docs), 4)
+        self.assertEqual(self.found("pyra"), [])
+        self.assertEqual(self.found("crystal"), [])
+        self.assertEqual(self.found("poppi"), [('a.json', 1)])
+        self.assertEqual(self.found("nia"), [('b.json', 1)])
+        for term_docs in self.index._postings.values():
+            self.assertEqual(list(term_docs), sorted(term_docs))
+
+    def test_changed_row_count_drops_old_docs(self):
+        write_rows(self.paths[0], ["Pyra"])
+        self.update(self.paths[0])
+        self.assertEqual(self.found("pyra"), [('a.json', 0)])
+        self.assertEqual(self.found("rex"), [])
+        self.assertNotIn('crystal', self.index._postings)
+        for term_docs in self.index._postings.values():
+            self.assertTrue(all(self.index._docs[doc_id] is not None for doc_id in term_docs))
+
+    def test_punctuation_in_query(self):
+        self.assertEqual(self.found("Rex's core"), [('a.json', 0)])
+        self.assertEqual(self.found("rex, crys"), [('a.json', 0)])
+        self.assertEqual(self.found("nia's"), [('b.json', 1)])
+
+if __name__ == "__main__":
+    unittest.main()